@@ -0,0 +1,122 @@
+"""
+Load test for the conditional GET / compression cache of the JSON endpoints.
+
+Builds a synthetic data/ and models/ tree in a temporary directory, then
+polls each endpoint through an in-process test client in four modes:
+
+  uncached     payload rebuilt and serialized on every request (old behaviour)
+  cached       identity body served from the per-version cache
+  gzip         compressed variant served from the per-version cache
+  conditional  client revalidates with If-None-Match and gets 304
+
+and reports bytes on the wire and CPU time per request for each.
+
+Usage (from backend/):
+    python benchmarks/http_cache_load.py --rows 5000 --requests 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def write_fixture(root, rows, freq="D"):
+    os.makedirs(os.path.join(root, "data"))
+    os.makedirs(os.path.join(root, "models"))
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2010-01-01", periods=rows, freq=freq)
+    close = 5000 + rng.standard_normal(rows).cumsum() * 10
+    df = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d" if freq == "D" else "%Y-%m-%d %H:%M:%S"),
+        "Close": close,
+        "High": close + 5,
+        "Low": close - 5,
+        "Open": close + rng.standard_normal(rows),
+        "Volume": rng.integers(1e8, 1e9, rows),
+    })
+    # dataset.csv carries two metadata rows under the header (yfinance export)
+    with open(os.path.join(root, "data", "dataset.csv"), "w") as f:
+        f.write(",".join(df.columns) + "\n")
+        f.write("Ticker," + ",".join(["^FTSE"] * (len(df.columns) - 1)) + "\n")
+        f.write("Date" + "," * (len(df.columns) - 1) + "\n")
+        df.to_csv(f, header=False, index=False)
+    preds = df[["Date", "Close"]].copy()
+    preds["prediction"] = np.where(rng.random(rows) > 0.5, "BUY", "SELL")
+    preds["confidence"] = rng.random(rows).round(3)
+    preds.to_csv(os.path.join(root, "data", "predictions.csv"), index=False)
+    with open(os.path.join(root, "models", "model_accuracies.json"), "w") as f:
+        json.dump([{"model": m, "accuracy": 50.0, "precision": 50.0, "recall": 50.0, "f1Score": 50.0}
+                   for m in ("VQC", "SVM (Poly)", "IBM Quantum VQC")], f)
+    with open(os.path.join(root, "models", "quantum_metrics.json"), "w") as f:
+        json.dump({"qubits": 3, "reps": 2, "entanglement": "linear", "depth": 14, "circuit_depth": 14}, f)
+
+
+def run_mode(client, route, n, headers=None, uncached=False):
+    from main import json_cache
+    wire_bytes = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(n):
+        if uncached:
+            json_cache._entries.clear()
+        response = client.get(route, headers=headers or {})
+        wire_bytes += len(response.content) if response.status_code != 304 else 0
+    return {
+        "bytes_per_request": wire_bytes / n,
+        "cpu_ms_per_request": (time.process_time() - cpu_start) * 1000 / n,
+        "wall_ms_per_request": (time.perf_counter() - wall_start) * 1000 / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as root:
+        write_fixture(root, args.rows)
+        os.chdir(root)
+        from fastapi.testclient import TestClient
+        from main import app
+
+        client = TestClient(app)
+        routes = ["/api/ftse100", "/api/predictions", "/api/model-accuracies", "/api/quantum-metrics"]
+        results = {}
+        for route in routes:
+            etag = client.get(route).headers["etag"]
+            identity = {"Accept-Encoding": "identity"}
+            # httpx decodes gzip transparently, so measure the raw compressed body separately
+            gz = client.get(route, headers={"Accept-Encoding": "gzip"})
+            results[route] = {
+                "uncached": run_mode(client, route, args.requests, identity, uncached=True),
+                "cached": run_mode(client, route, args.requests, identity),
+                "gzip": dict(run_mode(client, route, args.requests, {"Accept-Encoding": "gzip"}),
+                             bytes_per_request=float(gz.headers.get("content-length", len(gz.content)))),
+                "conditional": run_mode(client, route, args.requests, {"If-None-Match": etag}),
+            }
+
+    print(f"{'route':<24}{'mode':<13}{'bytes/req':>12}{'cpu ms/req':>12}{'wall ms/req':>13}")
+    for route, modes in results.items():
+        for mode, r in modes.items():
+            print(f"{route:<24}{mode:<13}{r['bytes_per_request']:>12.0f}"
+                  f"{r['cpu_ms_per_request']:>12.3f}{r['wall_ms_per_request']:>13.3f}")
+        base = modes["uncached"]
+        print(f"{'':<24}saved vs uncached: conditional "
+              f"{100 * (1 - modes['conditional']['cpu_ms_per_request'] / base['cpu_ms_per_request']):.0f}% CPU, "
+              f"gzip {100 * (1 - modes['gzip']['bytes_per_request'] / base['bytes_per_request']):.0f}% bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Checks the noisy local emulation of the IBM path (src/ibm_emulation.py)
+against one of qiskit's offline fake backends, in a temporary calibration
+directory:
+
+  - a stored snapshot (BackendV1 and BackendV2) gives the same Aer noise
+    model as ``NoiseModel.from_backend`` on the live backend object
+  - circuits transpiled for the emulator only use the device's basis gates
+    and coupling map
+  - measured readout errors match the snapshot's calibration
+  - one objective evaluation (all samples in one Aer job) vs one job per
+    sample, and density_matrix vs statevector trajectories
+  - ``train_ibm_vqc(emulate=...)`` trains end to end and records a row in the
+    format of the IBM row of model_accuracies.json, without touching the
+    model store
+
+Usage (from backend/):
+    python benchmarks/ibm_emulation_check.py --backend fake_manila --samples 40
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import artifact_store
+import circuit_factory
+import ibm_emulation
+from incremental_retrain_check import synthetic_dataset
+from pre_processing import preprocess_for_ml
+from quantum_ibm_vqc import train_ibm_vqc
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="fake_manila", help="qiskit fake backend to emulate")
+    parser.add_argument("--samples", type=int, default=40, help="samples per objective evaluation")
+    parser.add_argument("--maxiter", type=int, default=15, help="COBYLA iterations of the end-to-end run")
+    parser.add_argument("--shots", type=int, default=4096)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+    from qiskit.providers.fake_provider import FakeProvider, FakeProviderForBackendV2
+    from qiskit_aer.noise import NoiseModel
+
+    with tempfile.TemporaryDirectory() as root:
+        calibrations = os.path.join(root, "calibrations")
+
+        # Snapshot round trip: stored JSON -> same noise model as the backend object itself
+        device = FakeProvider().get_backend(args.backend)
+        path = ibm_emulation.capture(args.backend, directory=calibrations)
+        snapshot = ibm_emulation.load_snapshot(args.backend, directory=calibrations)
+        assert snapshot["path"] == path
+        assert ibm_emulation.noise_model(snapshot) == NoiseModel.from_backend(device)
+        # (FakeProviderForBackendV2.get_backend calls name() on V2 backends, so look it up by hand)
+        v2 = next(backend for backend in FakeProviderForBackendV2().backends() if backend.name == args.backend)
+        v2_snapshot = ibm_emulation.load_snapshot(ibm_emulation.save_snapshot(
+            ibm_emulation.snapshot_backend(v2), os.path.join(root, "v2")))
+        assert not ibm_emulation.noise_model(v2_snapshot).is_ideal()
+        print(f"snapshot {os.path.basename(path)} ({os.path.getsize(path) / 1024:.0f} KB): noise model matches "
+              f"NoiseModel.from_backend; V2 snapshot {os.path.basename(v2_snapshot['path'])} loads too")
+
+        # Transpiled as for the device
+        emulator = ibm_emulation.emulator(snapshot)
+        feature_map = circuit_factory.transpiled("feature_map", 3, 1, emulator)
+        ansatz = circuit_factory.transpiled("ansatz", 3, 1, emulator)
+        circuit = feature_map.compose(ansatz)
+        circuit.measure_all()
+        edges = {tuple(edge) for edge in snapshot["coupling_map"]}
+        for item in circuit.data:
+            name = item.operation.name
+            assert name in snapshot["basis_gates"] or name in ("measure", "barrier"), name
+            if name == "cx":
+                assert tuple(circuit.find_bit(q).index for q in item.qubits) in edges
+        print(f"transpiled for {ibm_emulation.backend_name(emulator)}: {dict(circuit.count_ops())}")
+
+        # Readout errors: prepare |0> everywhere and compare P(1) per qubit with the calibration
+        from qiskit import QuantumCircuit
+        idle = QuantumCircuit(snapshot["num_qubits"])
+        idle.measure_all()
+        sampler = ibm_emulation.make_sampler(snapshot, shots=args.shots, seed=7)
+        probabilities = sampler.run([idle]).result().quasi_dists[0].binary_probabilities()
+        for qubit, entry in enumerate(snapshot["properties"]["qubits"]):
+            expected = next(item["value"] for item in entry if item["name"] == "prob_meas1_prep0")
+            measured = sum(p for bits, p in probabilities.items() if bits[-1 - qubit] == "1")
+            tolerance = 4 * np.sqrt(expected * (1 - expected) / args.shots) + 1e-3
+            assert abs(measured - expected) <= tolerance, (qubit, measured, expected)
+        print(f"readout: P(1|0) per qubit within 4 sigma of the calibration ({args.shots} shots)")
+
+        # One objective evaluation: the batch in one job vs a job per sample
+        rng = np.random.default_rng(0)
+        values = [list(x) + list(rng.uniform(0, 2 * np.pi, ansatz.num_parameters))
+                  for x in rng.uniform(0, np.pi, (args.samples, 3))]
+        sampler.run([circuit], [values[0]]).result()
+        batch, batch_seconds = timed(lambda: sampler.run([circuit] * len(values), values).result())
+        _, loop_seconds = timed(lambda: [sampler.run([circuit], [v]).result() for v in values])
+        method = batch.metadata[0]["simulator_metadata"]["method"]
+        trajectories = ibm_emulation.make_sampler(snapshot, shots=args.shots, seed=7, method="statevector")
+        _, trajectory_seconds = timed(lambda: trajectories.run([circuit] * len(values), values).result())
+        print(f"objective evaluation over {args.samples} samples: one job {batch_seconds:.2f}s ({method}), "
+              f"job per sample {loop_seconds:.2f}s, statevector trajectories {trajectory_seconds:.2f}s")
+        assert batch_seconds < loop_seconds
+
+        # End to end, recording into a scratch report; the model store must not change
+        with contextlib.redirect_stdout(io.StringIO()):
+            X_train, _, y_train, _ = preprocess_for_ml(synthetic_dataset(400))
+        accuracies = os.path.join(artifact_store.MODELS_DIR, "model_accuracies.json")
+        before = open(accuracies).read() if os.path.exists(accuracies) else None
+        report = os.path.join(root, "emulated_accuracies.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, seconds = timed(train_ibm_vqc, X_train, y_train, n_samples=args.samples, maxiter=args.maxiter,
+                                    emulate=path, shots=args.shots, seed=0, report_path=report)
+        with open(report) as f:
+            rows = json.load(f)
+        row = rows[-1]
+        assert set(row) == {"model", "accuracy", "precision", "recall", "f1Score", "backend", "calibrated", "shots"}
+        assert row["backend"] == f"aer_simulator({args.backend})" and row["accuracy"] == round(result[0] * 100, 2)
+        assert (open(accuracies).read() if os.path.exists(accuracies) else None) == before
+        print(f"train_ibm_vqc(emulate={args.backend!r}): {args.samples} samples, {args.maxiter} iterations in "
+              f"{seconds:.1f}s -> {json.dumps(row)}")
+    print("✓ IBM emulation checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Startup benchmark based on ``python -X importtime``.
+
+Imports each module in a fresh interpreter, parses the importtime trace and
+reports the total import cost plus the heaviest top-level dependencies.
+Results can be written to JSON and compared against a saved baseline.
+
+Usage (from backend/):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --output import_times.json
+    python benchmarks/import_time.py --baseline import_times.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, directory it is imported from)
+MODULES = [
+    ("main", BACKEND_DIR),
+    ("predict", os.path.join(BACKEND_DIR, "src")),
+    ("quantum_model", os.path.join(BACKEND_DIR, "src")),
+    ("classical_model", os.path.join(BACKEND_DIR, "src")),
+    ("circuit_factory", os.path.join(BACKEND_DIR, "src")),
+    ("vqc_circuit_designer", os.path.join(BACKEND_DIR, "src")),
+]
+
+HEAVY_STACKS = ("qiskit", "qiskit_algorithms", "qiskit_machine_learning", "sklearn", "yfinance", "matplotlib")
+
+
+def import_profile(module, cwd):
+    """Returns (total_us, {top_level_package: self_us}) for importing ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    packages = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        # Outermost imports are indented by a single space
+        if depth == 1:
+            total += int(cumulative_us)
+        # Exclusive time summed per top-level package
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + int(self_us)
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per module (the fastest is kept)")
+    parser.add_argument("--top", type=int, default=5, help="heaviest packages to list per module")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file written with --output")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for module, cwd in MODULES:
+        runs = [import_profile(module, cwd) for _ in range(args.repeat)]
+        total, packages = min(runs, key=lambda run: run[0])
+        heavy = sorted(p for p in packages if p in HEAVY_STACKS)
+        results[module] = {"total_ms": total / 1000, "packages_ms": {k: v / 1000 for k, v in packages.items()},
+                           "heavy_stacks": heavy}
+        top = sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]
+        print(f"{module:<22}{total / 1000:>9.1f} ms   heavy: {', '.join(heavy) or '-'}")
+        print("    " + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in top))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = []
+        for module, result in results.items():
+            if module not in baseline:
+                continue
+            before, after = baseline[module]["total_ms"], result["total_ms"]
+            change = (after - before) / before if before else 0.0
+            flag = "REGRESSION" if change > args.threshold else ""
+            print(f"{module:<22}{before:>9.1f} -> {after:>9.1f} ms ({change:+.0%}) {flag}")
+            if flag:
+                regressions.append(module)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
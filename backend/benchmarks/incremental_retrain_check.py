@@ -0,0 +1,123 @@
+"""
+Checks incremental retraining (src/incremental.py, src/feature_stats.py)
+against a cold retrain on a synthetic price series.
+
+A bundle is trained cold on the first --rows rows and published to a
+temporary artifact store. Then --new-rows more bars arrive, and the check
+verifies that:
+
+  - the running statistics, updated with only the new rows, give the same
+    f_classif scores and MinMaxScaler range as refitting on the whole
+    training split
+  - the drift check passes rows drawn from the training distribution and
+    flags shifted ones
+  - the incremental retrain warm-starts from the published weights and
+    publishes a new bundle; time and accuracy are compared with a cold
+    retrain on the same data
+  - a second run finds no new rows
+
+Usage (from backend/):
+    python benchmarks/incremental_retrain_check.py --rows 1000 --new-rows 60
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+
+from artifact_store import ArtifactStore
+from feature_stats import FILE_NAME as STATS_FILE, FeatureStats
+from incremental import cold_retrain, drift_report, incremental_retrain
+from inference_bundle import FILE_NAME as INFERENCE_BUNDLE, export_inference_bundle
+from pre_processing import engineer_features, preprocess_for_ml
+
+
+def synthetic_dataset(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2015-01-01", periods=rows + 51, name="Date")
+    close = 7000 * np.exp(np.cumsum(rng.normal(2e-4, 0.01, len(index))))
+    prices = pd.DataFrame({"Open": close, "High": close * (1 + rng.uniform(0, 0.01, len(index))),
+                           "Low": close * (1 - rng.uniform(0, 0.01, len(index))), "Close": close,
+                           "Volume": rng.integers(1e8, 1e9, len(index)).astype(float)}, index=index)
+    return engineer_features(prices).dropna(subset=["target"])
+
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="rows the published bundle is trained on")
+    parser.add_argument("--new-rows", type=int, default=60, help="rows that arrive afterwards")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+    from sklearn.feature_selection import f_classif
+    from sklearn.preprocessing import MinMaxScaler
+
+    data = synthetic_dataset(args.rows + args.new_rows)
+    old, new = data.iloc[:args.rows].copy(), data.copy()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ArtifactStore(root, export_dir=None)
+        bundle = store.bundle()
+        seconds, _ = quiet(cold_retrain, *preprocess_for_ml(old), bundle)
+        bundle.add_file(INFERENCE_BUNDLE, lambda path: export_inference_bundle(bundle.staging, path))
+        base_id = quiet(bundle.publish)
+        print(f"published cold bundle {base_id} on {args.rows} rows in {seconds:.1f}s")
+
+        # Sufficient statistics: published stats + new rows == refit on the whole training split
+        stats = FeatureStats.from_dict(store.load_json(STATS_FILE))
+        X_train, _, y_train, _ = quiet(preprocess_for_ml, new.copy())
+        stats.update(X_train.iloc[stats.count:], y_train.iloc[stats.count:])
+        scores, _ = f_classif(X_train, y_train)
+        assert np.allclose(stats.f_scores(), scores, rtol=1e-9), (stats.f_scores(), scores)
+        selected = stats.select(3)
+        scaler = MinMaxScaler(feature_range=(0, np.pi)).fit(X_train[selected])
+        updated = stats.scaler(selected)
+        assert np.array_equal(updated.data_min_, scaler.data_min_) and np.array_equal(updated.data_max_, scaler.data_max_)
+        assert np.allclose(updated.transform(X_train[selected]), scaler.transform(X_train[selected]))
+        print(f"running statistics over {stats.count} rows match f_classif (max rel. error "
+              f"{np.max(np.abs(stats.f_scores() / scores - 1)):.1e}) and MinMaxScaler exactly")
+
+        # Drift check: resampled training rows pass, shifted rows fail
+        published = FeatureStats.from_dict(store.load_json(STATS_FILE))
+        features = store.load_json("selected_features.json")
+        X_old, _, y_old, _ = quiet(preprocess_for_ml, old.copy())
+        sample = np.random.default_rng(1).choice(len(X_old), 20, replace=False)
+        calm = drift_report(published, X_old.iloc[sample], y_old.iloc[sample], features)
+        shifted_rows = X_old.iloc[sample].copy()
+        shifted_rows[features] += 5 * np.sqrt(published.variance()[[published.columns.index(f) for f in features]])
+        shifted = drift_report(published, shifted_rows, y_old.iloc[sample], features)
+        print(f"drift check: resampled rows -> retrain={calm['retrain']}, shifted rows -> retrain={shifted['retrain']} "
+              f"({'; '.join(shifted['reasons'])})")
+        assert not calm["retrain"] and shifted["retrain"]
+
+        summary = incremental_retrain(new.copy(), store=store, force=True, compare=True)
+        assert summary["bundle_id"] and summary["bundle_id"] != base_id
+        config = store.manifest(summary["bundle_id"])["config"]["incremental"]
+        assert config["base_bundle"] == base_id and config["new_rows"] == summary["new_rows"]
+        print(f"incremental: {summary['new_rows']} new rows, warm start {summary['warm_start']}, "
+              f"{summary['seconds']:.1f}s vs cold {summary['cold']['seconds']:.1f}s; "
+              f"VQC accuracy {summary['metrics']['VQC']['accuracy']:.3f} vs {summary['cold']['metrics']['VQC']['accuracy']:.3f}")
+        if summary["warm_start"]:
+            assert summary["seconds"] < summary["cold"]["seconds"]
+
+        again = quiet(incremental_retrain, new.copy(), store=store)
+        assert again["new_rows"] == 0 and again["bundle_id"] is None
+        print("second run: no new rows, nothing published")
+    print("✓ incremental retrain checks passed")
+
+
+if __name__ == "__main__":
+    main()
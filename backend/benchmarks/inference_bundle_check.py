@@ -0,0 +1,101 @@
+"""
+Checks the flat inference bundle (src/inference_bundle.py) against sklearn.
+
+Fits the same poly-kernel SVC + MinMaxScaler + 3-feature selection the
+training pipeline uses on synthetic data, exports the bundle and then:
+
+  - compares InferenceBundle.svm_predict with SVC.predict on fresh rows
+  - times loading the bundle vs joblib-loading the pickles
+  - loads and predicts in a fresh interpreter to confirm sklearn is never imported
+
+Usage (from backend/):
+    python benchmarks/inference_bundle_check.py --train 300 --rows 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BACKEND_DIR, "src")
+sys.path.insert(0, SRC_DIR)
+
+from inference_bundle import InferenceBundle, export_inference_bundle
+from pre_processing import REQUIRED_FEATURES
+
+
+def synthetic_features(rng, rows):
+    X = pd.DataFrame(rng.standard_normal((rows, len(REQUIRED_FEATURES))), columns=REQUIRED_FEATURES)
+    X["rsi"] = X["rsi"] * 15 + 50
+    X["obv"] = X["obv"] * 1e9
+    return X
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    from sklearn.preprocessing import MinMaxScaler
+    from sklearn.svm import SVC
+
+    rng = np.random.default_rng(0)
+    X = synthetic_features(rng, args.train)
+    y = ((X["rsi"] - 50) / 15 + X["macd"] + 0.5 * rng.standard_normal(args.train) > 0).astype(int)
+    selected = ["rsi", "macd", "macd_hist"]
+    scaler = MinMaxScaler(feature_range=(0, np.pi)).fit(X[selected])
+    svm = SVC(kernel="poly", degree=3, random_state=42, probability=True).fit(scaler.transform(X[selected]), y)
+
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        joblib.dump(svm, os.path.join(artifact_dir, "svm_model.pkl"))
+        joblib.dump(scaler, os.path.join(artifact_dir, "feature_scaler.pkl"))
+        with open(os.path.join(artifact_dir, "selected_features.json"), "w") as f:
+            json.dump(selected, f)
+        np.save(os.path.join(artifact_dir, "vqc_weights.npy"), rng.uniform(0, 2 * np.pi, 16))
+        bundle_path = os.path.join(artifact_dir, "inference.bin")
+        export_inference_bundle(artifact_dir, bundle_path)
+        print(f"bundle size: {os.path.getsize(bundle_path)} bytes")
+
+        start = time.perf_counter()
+        bundle = InferenceBundle.load(bundle_path)
+        bundle_load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        joblib.load(os.path.join(artifact_dir, "svm_model.pkl"))
+        joblib.load(os.path.join(artifact_dir, "feature_scaler.pkl"))
+        pickle_load_ms = (time.perf_counter() - start) * 1000
+        print(f"load: bundle {bundle_load_ms:.2f} ms, joblib pickles {pickle_load_ms:.2f} ms")
+
+        X_new = synthetic_features(rng, args.rows)
+        start = time.perf_counter()
+        expected = svm.predict(scaler.transform(X_new[selected]))
+        sklearn_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        actual = bundle.svm_predict(X_new)
+        numpy_ms = (time.perf_counter() - start) * 1000
+        mismatches = int((expected != actual).sum())
+        print(f"predict {args.rows} rows: sklearn {sklearn_ms:.1f} ms, bundle {numpy_ms:.1f} ms, mismatches {mismatches}")
+        assert mismatches == 0, "bundle predictions differ from SVC.predict"
+        assert np.array_equal(bundle.svm_predict(X_new[REQUIRED_FEATURES].to_numpy()), actual)
+
+        probe = (
+            "import sys; sys.path.insert(0, %r)\n"
+            "import numpy as np\n"
+            "from inference_bundle import InferenceBundle\n"
+            "b = InferenceBundle.load(%r)\n"
+            "b.svm_predict(np.zeros((4, %d)))\n"
+            "assert 'sklearn' not in sys.modules, 'sklearn was imported'\n"
+            "print('sklearn imported:', 'sklearn' in sys.modules)\n"
+        ) % (SRC_DIR, bundle_path, len(REQUIRED_FEATURES))
+        subprocess.run([sys.executable, "-c", probe], check=True)
+
+
+if __name__ == "__main__":
+    main()
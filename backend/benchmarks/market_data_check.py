@@ -0,0 +1,193 @@
+"""
+Checks the local market-data store (src/market_data.py) against a fixture
+HTTP server standing in for Yahoo, and counts the upstream requests.
+
+The server keeps a synthetic 1m and 1d series for one ticker and answers the
+HTTPFetcher protocol. The check backfills, advances the series (rewriting
+the last, still-forming bar each time), syncs again and verifies that:
+
+  - every incremental sync is one request starting at the last stored bar
+  - the stored bars match the server's exactly, with no duplicates
+  - concurrent syncs within max_age share one request
+  - compaction keeps the part count bounded
+  - /api/live-metrics and load_data(ticker=...) are served from the store
+
+Usage (from backend/):
+    python benchmarks/market_data_check.py --bars 3000 --polls 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import market_data
+from http_cache_load import write_fixture
+
+TICKER = "^FTSE"
+
+
+class FixtureMarket:
+    """Synthetic bars per interval; ``advance`` adds bars and revises the last one."""
+
+    def __init__(self, bars, seed=0):
+        self.rng = np.random.default_rng(seed)
+        now = pd.Timestamp.now(tz="Europe/London")
+        self.series = {
+            "1m": self._walk(pd.date_range(end=now.floor("min"), periods=bars, freq="1min")),
+            "1d": self._walk(pd.date_range(end=now.normalize(), periods=300, freq="D")),
+        }
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def _walk(self, index):
+        close = 7500 * np.exp(np.cumsum(self.rng.normal(0, 5e-4, len(index))))
+        return pd.DataFrame({"Open": close, "High": close * 1.001, "Low": close * 0.999, "Close": close,
+                             "Volume": self.rng.integers(1, 1e6, len(index)).astype(float)},
+                            index=index.rename("Date"))
+
+    def advance(self, interval, bars):
+        with self.lock:
+            frame = self.series[interval]
+            # The stored last bar was still forming: its close and volume change
+            frame.iloc[-1, frame.columns.get_loc("Close")] *= 1.0001
+            frame.iloc[-1, frame.columns.get_loc("Volume")] += 10
+            if bars:
+                step = frame.index[-1] - frame.index[-2]
+                index = pd.date_range(frame.index[-1] + step, periods=bars, freq=step)
+                frame = pd.concat([frame, self._walk(index)])
+            self.series[interval] = frame
+
+    def history(self, interval, start=None):
+        with self.lock:
+            self.requests.append((interval, start))
+            frame = self.series[interval]
+            return frame[frame.index >= pd.Timestamp(start)] if start else frame.copy()
+
+
+def serve(market):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+            frame = market.history(query["interval"], query.get("start"))
+            body = frame.to_csv(date_format="%Y-%m-%dT%H:%M:%S%z").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def check_equal(store, market, interval):
+    stored = store.read(TICKER, interval)
+    truth = market.series[interval]
+    assert not stored.index.duplicated().any(), "duplicate bars"
+    assert len(stored) == len(truth), f"{len(stored)} stored vs {len(truth)} upstream bars"
+    assert (stored.index == truth.index).all()
+    assert np.allclose(stored[truth.columns].to_numpy(), truth.to_numpy(), rtol=0, atol=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=3000, help="1m bars on the server before the backfill")
+    parser.add_argument("--polls", type=int, default=100, help="incremental syncs (one new bar each)")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    market = FixtureMarket(args.bars)
+    server, url = serve(market)
+    with tempfile.TemporaryDirectory() as root:
+        store = market_data.MarketDataStore(os.path.join(root, "market"), market_data.HTTPFetcher(url))
+
+        start = time.perf_counter()
+        written = store.sync(TICKER, "1m")
+        print(f"backfill: {written} bars in {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"request {market.requests[-1]}")
+        assert market.requests[-1] == ("1m", None)
+        check_equal(store, market, "1m")
+
+        sync_times = []
+        for poll in range(args.polls):
+            last = store.last_timestamp(TICKER, "1m")
+            market.advance("1m", 1)
+            start = time.perf_counter()
+            written = store.sync(TICKER, "1m")
+            sync_times.append(time.perf_counter() - start)
+            # One new bar plus the revised previous one, fetched from the last stored bar on
+            assert written == 2, written
+            assert pd.Timestamp(market.requests[-1][1]) == last
+        check_equal(store, market, "1m")
+        parts = len(store.manifest(TICKER, "1m")["parts"])
+        print(f"incremental: {args.polls} syncs, {np.median(sync_times) * 1000:.1f} ms median, "
+              f"{parts} parts after compaction (limit {market_data.COMPACT_PARTS} small parts)")
+        assert parts <= market_data.COMPACT_PARTS + 2
+
+        # Nothing new upstream: the re-fetched last bar is identical and nothing is written
+        assert store.sync(TICKER, "1m") == 0
+
+        # Once the last sync is older than max_age, a burst of concurrent polls makes one upstream request
+        assert store.sync(TICKER, "1m", max_age=60) == 0
+        time.sleep(1.1)
+        before = len(market.requests)
+        market.advance("1m", 3)
+        threads = [threading.Thread(target=store.sync, args=(TICKER, "1m"), kwargs={"max_age": 1})
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"20 concurrent syncs with max_age: {len(market.requests) - before} upstream request(s)")
+        assert len(market.requests) - before == 1
+        check_equal(store, market, "1m")
+
+        # The API and load_data read from the store
+        api_root = os.path.join(root, "api")
+        write_fixture(api_root, 100)
+        previous = os.getcwd()
+        os.chdir(api_root)
+        try:
+            from fastapi.testclient import TestClient
+            import main as api
+            api.market_store.fetcher = market_data.HTTPFetcher(url)
+            client = TestClient(api.app)
+            before = len(market.requests)
+            for _ in range(10):
+                response = client.get("/api/live-metrics")
+                assert response.status_code == 200 and "error" not in response.json(), response.text
+            print(f"10 /api/live-metrics requests: {len(market.requests) - before} upstream request(s) "
+                  f"{market.requests[before:]}")
+            assert len(market.requests) - before == 2
+        finally:
+            os.chdir(previous)
+
+        market_data._default_store = store
+        from pre_processing import load_data
+        data = load_data(ticker=TICKER)
+        print(f"load_data(ticker={TICKER!r}): {data.shape}")
+        assert len(data) == len(market.series["1d"]) - 51
+    server.shutdown()
+    print("✓ market-data store checks passed")
+
+
+if __name__ == "__main__":
+    main()
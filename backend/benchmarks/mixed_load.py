@@ -0,0 +1,143 @@
+"""
+Mixed-traffic load test for the API execution model.
+
+Runs the same handlers twice against an in-process ASGI client:
+
+  before  plain ``def`` routes on Starlette's shared threadpool (~40 threads)
+  after   the app in main.py: async routes, separate io/cpu pools and
+          per-endpoint concurrency limits
+
+The market-data fetcher is replaced with a fake that sleeps
+``--upstream-latency`` seconds per call, so a burst of /api/live-metrics
+requests starts against a slow upstream (the store is emptied before each
+run; requests that arrive during the sync wait for it instead of fetching). Meanwhile the CSV/JSON endpoints are polled and p50/p99 latency is
+reported per route.
+
+Usage (from backend/):
+    python benchmarks/mixed_load.py --slow 80 --fast 200 --upstream-latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache_load import write_fixture
+
+FAST_ROUTES = ["/api/ftse100", "/api/predictions", "/api/model-accuracies", "/api/quantum-metrics"]
+
+
+def make_fake_fetcher(latency):
+    """Market-data fetcher returning a fresh random walk after sleeping ``latency`` seconds."""
+    class FakeFetcher:
+        service = "fake"
+
+        def fetch(self, ticker, interval, start=None, period=None):
+            time.sleep(latency)
+            now = pd.Timestamp.now(tz="Europe/London")
+            if interval == "1d":
+                index = pd.date_range(end=now.normalize(), periods=2, freq="D")
+            else:
+                index = pd.date_range(end=now.floor("min"), periods=300, freq="1min")
+            close = 7500 + np.random.standard_normal(len(index)).cumsum()
+            return pd.DataFrame({"Close": close, "Volume": np.full(len(index), 1000.0)}, index=index)
+
+    return FakeFetcher()
+
+
+def make_before_app():
+    """The pre-rework execution model: sync routes on the shared threadpool."""
+    import main
+    from fastapi import FastAPI, Request
+
+    app = FastAPI()
+    app.get("/api/live-metrics")(lambda: main._live_metrics())
+
+    def file_route(fn):
+        def route(request: Request):
+            return fn(request)
+        return route
+
+    app.get("/api/ftse100")(file_route(main._ftse100_data))
+    app.get("/api/predictions")(file_route(main._predictions))
+    app.get("/api/model-accuracies")(file_route(main._model_accuracies))
+    app.get("/api/quantum-metrics")(file_route(main._quantum_metrics))
+    return app
+
+
+async def run_load(app, slow, fast):
+    import httpx
+
+    latencies = defaultdict(list)
+    statuses = Counter()
+
+    async def hit(client, route, delay):
+        await asyncio.sleep(delay)
+        # Fresh request every time: measure the handler, not the 304 path
+        start = time.perf_counter()
+        response = await client.get(route, headers={"Accept-Encoding": "identity"})
+        latencies[route].append(time.perf_counter() - start)
+        statuses[(route, response.status_code)] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        tasks = [hit(client, "/api/live-metrics", 0) for _ in range(slow)]
+        # Fast requests arrive spread over the first two seconds of the burst
+        tasks += [hit(client, FAST_ROUTES[i % len(FAST_ROUTES)], 2.0 * i / fast) for i in range(fast)]
+        await asyncio.gather(*tasks)
+    return latencies, statuses
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slow", type=int, default=80, help="concurrent /api/live-metrics requests")
+    parser.add_argument("--fast", type=int, default=200, help="CSV/JSON endpoint requests")
+    parser.add_argument("--upstream-latency", type=float, default=0.5, help="fake yfinance latency (s)")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as root:
+        write_fixture(root, args.rows)
+        os.chdir(root)
+        import main as api
+        api.market_store.fetcher = make_fake_fetcher(args.upstream_latency)
+
+        for label, app in (("before", make_before_app()), ("after", api.app)):
+            api.json_cache._entries.clear()
+            api.live_states.clear()
+            api.single_flight.clear()
+            shutil.rmtree(api.market_store.root, ignore_errors=True)
+            start = time.perf_counter()
+            latencies, statuses = asyncio.run(run_load(app, args.slow, args.fast))
+            elapsed = time.perf_counter() - start
+            print(f"\n[{label}] {args.slow} slow + {args.fast} fast requests in {elapsed:.1f}s")
+            print(f"  {'route':<24}{'n':>5}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+            for route in ["/api/live-metrics"] + FAST_ROUTES:
+                values = latencies[route]
+                print(f"  {route:<24}{len(values):>5}{percentile(values, 50):>10.1f}"
+                      f"{percentile(values, 99):>10.1f}{statistics.mean(values) * 1000:>10.1f}")
+            errors = {k: v for k, v in statuses.items() if k[1] != 200}
+            if errors:
+                print(f"  non-200 responses: {errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Checks the headless render cache (src/rendering.py) behind
+/api/circuit-diagram and /api/metric-chart/{name}.
+
+Runs against a fixture tree through an in-process ASGI client and checks
+that:
+
+  - N simultaneous requests for a figure that is not cached render it once,
+    and all of them get the same image
+  - other endpoints keep answering while a render is in progress
+  - cached figures are served from disk, and a matching If-None-Match gets 304
+  - changing a chart's source file renders a new version and deletes the old one
+  - a request that waits longer than AQVH_RENDER_WAIT gets 202 and can retry
+
+Usage (from backend/):
+    python benchmarks/render_check.py --clients 20 --qubits 12
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache_load import write_fixture
+
+
+async def timed_get(client, route, headers=None):
+    start = time.perf_counter()
+    response = await client.get(route, headers=headers or {})
+    return response, time.perf_counter(), time.perf_counter() - start
+
+
+async def run(api, args, root):
+    import httpx
+
+    events = Counter()
+    rendered = []
+    observe = api.renderer._observe
+
+    def counting(spec, event, seconds):
+        events[event] += 1
+        if event == "rendered":
+            rendered.append((spec["name"], seconds, time.perf_counter()))
+        observe(spec, event, seconds)
+    api.renderer._observe = counting
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        route = f"/api/circuit-diagram?qubits={args.qubits}&format=png"
+        requests = [timed_get(client, route) for _ in range(args.clients)]
+        # Other endpoints while the render runs on the renderer's thread
+        requests += [timed_get(client, "/api/model-accuracies") for _ in range(args.clients)]
+        results = await asyncio.gather(*requests)
+        diagrams, others = results[:args.clients], results[args.clients:]
+        assert all(r.status_code == 200 for r, _, _ in diagrams), [r.status_code for r, _, _ in diagrams]
+        bodies = {r.content for r, _, _ in diagrams}
+        name, render_seconds, render_done = rendered[-1]
+        print(f"cold: {args.clients} simultaneous requests -> {events['miss']} render(s) of "
+              f"{len(next(iter(bodies))) / 1024:.0f} KB in {render_seconds:.2f}s, {len(bodies)} distinct body")
+        assert events["miss"] == 1 and len(bodies) == 1
+        other_latency = [seconds for _, _, seconds in others]
+        print(f"  /api/model-accuracies during the render: max {max(other_latency) * 1000:.0f} ms, "
+              f"{sum(done < render_done for _, done, _ in others)}/{len(others)} answered before it finished")
+        assert all(r.status_code == 200 for r, _, _ in others)
+
+        latencies = []
+        for _ in range(args.warm):
+            response, _, seconds = await timed_get(client, route)
+            assert response.status_code == 200
+            latencies.append(seconds)
+        etag = response.headers["etag"]
+        not_modified, _, _ = await timed_get(client, route, {"If-None-Match": etag})
+        print(f"warm: {args.warm} requests, median {statistics.median(latencies) * 1000:.1f} ms; "
+              f"If-None-Match -> {not_modified.status_code}")
+        assert events["miss"] == 1 and not_modified.status_code == 304
+
+        chart = "/api/metric-chart/accuracies"
+        first, _, _ = await timed_get(client, chart)
+        assert first.status_code == 200 and first.headers["content-type"] == "image/svg+xml"
+        path = os.path.join(root, "models", "model_accuracies.json")
+        with open(path) as f:
+            rows = json.load(f)
+        rows[0]["accuracy"] = 75.0
+        with open(path, "w") as f:
+            json.dump(rows, f)
+        second, _, _ = await timed_get(client, chart)
+        charts = [name for name in os.listdir(os.path.join(root, "data", "renders")) if name.startswith("chart-")]
+        print(f"chart after its data changed: ETag {first.headers['etag']} -> {second.headers['etag']}, "
+              f"{len(charts)} file(s) on disk")
+        assert second.headers["etag"] != first.headers["etag"] and len(charts) == 1
+
+        missing, _, _ = await timed_get(client, "/api/metric-chart/convergence")
+        assert missing.status_code == 404, missing.status_code
+
+        api.RENDER_WAIT_SECONDS = 0.001
+        slow_route = f"/api/circuit-diagram?qubits={args.qubits}&component=ansatz&format=svg"
+        pending, _, _ = await timed_get(client, slow_route)
+        polls = 0
+        response = pending
+        while response.status_code == 202:
+            polls += 1
+            await asyncio.sleep(float(response.headers["retry-after"]) / 10)
+            response, _, _ = await timed_get(client, slow_route)
+        print(f"short wait: {pending.status_code} first, {response.status_code} after {polls} retries")
+        assert pending.status_code == 202 and response.status_code == 200
+    print(f"render events: {dict(events)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="simultaneous requests for the cold figure")
+    parser.add_argument("--qubits", type=int, default=12, help="width of the circuit to draw")
+    parser.add_argument("--warm", type=int, default=200, help="requests for the cached figure")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+    os.environ["AQVH_RENDER_WAIT"] = "120"
+    os.environ.setdefault("AQVH_PREWARM", "")
+
+    with tempfile.TemporaryDirectory() as root:
+        write_fixture(root, 100)
+        os.chdir(root)
+        import main as api
+        asyncio.run(run(api, args, root))
+        api.renderer.shutdown()
+    print("✓ render checks passed")
+
+
+if __name__ == "__main__":
+    main()
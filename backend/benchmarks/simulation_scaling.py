@@ -0,0 +1,126 @@
+"""
+Scaling benchmark for the VQC simulation backends (src/simulation.py).
+
+For every width from --min-qubits to --max-qubits it builds the training
+circuit (ZZFeatureMap reps=2 + RealAmplitudes reps=3, linear entanglement)
+and runs one batch of --batch samples with random inputs and weights, the
+same call the VQC makes once per optimizer iteration. Every (width, backend)
+point runs in a fresh interpreter so its peak RSS is its own. The table
+reports:
+
+  seconds    fastest of --repeat batches, after one warm-up batch
+  peak MB    peak RSS of that process (includes ~200 MB of imports)
+  state MB   size of one statevector at that width
+  auto       what select_backend picks
+
+--full also times the full 2^n distribution that the VQC's sampler used to
+return, next to the readout-only one (statevector backend only).
+
+Usage (from backend/):
+    python benchmarks/simulation_scaling.py --min-qubits 3 --max-qubits 20
+    python benchmarks/simulation_scaling.py --backends statevector,mps --output scaling.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BACKEND_DIR, "src")
+
+
+def worker(num_qubits, backend, batch, repeat, full):
+    """Times one (width, backend) point in this process and prints it as JSON."""
+    sys.path.insert(0, SRC_DIR)
+    import numpy as np
+    import circuit_factory
+    import simulation
+
+    circuit = circuit_factory.complete_circuit(num_qubits)
+    readout = num_qubits if full else None
+    sampler = simulation.make_sampler(num_qubits, backend=backend, num_classes=2 ** readout if readout else 2)
+    values = np.random.default_rng(0).uniform(0, np.pi, (batch, circuit.num_parameters))
+
+    def run():
+        sampler.run([circuit] * batch, values).result()
+    run()
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    print(json.dumps({"seconds": min(runs), "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def measure(num_qubits, backend, args, full=False):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", str(num_qubits), backend,
+               "--batch", str(args.batch), "--repeat", str(args.repeat)] + (["--full"] if full else [])
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {args.timeout}s"}
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-qubits", type=int, default=3)
+    parser.add_argument("--max-qubits", type=int, default=20)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--backends", default="reference,statevector,mps")
+    parser.add_argument("--reference-max-qubits", type=int, default=12,
+                        help="skip the reference Sampler above this width")
+    parser.add_argument("--batch", type=int, default=64, help="samples per batch")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--full", action="store_true", help="also time the full 2^n distribution")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per point")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--worker", nargs=2, metavar=("QUBITS", "BACKEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(int(args.worker[0]), args.worker[1], args.batch, args.repeat, args.full)
+        return
+
+    sys.path.insert(0, SRC_DIR)
+    import circuit_factory
+    import simulation
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    columns = backends + (["statevector (full)"] if args.full else [])
+    print(f"batch of {args.batch} samples, best of {args.repeat}; seconds / peak RSS MB")
+    print(f"{'qubits':>6}{'state MB':>10}  {'auto':<12}" + "".join(f"{c:>24}" for c in columns))
+    results = []
+    for n in range(args.min_qubits, args.max_qubits + 1, args.step):
+        try:
+            auto, _ = simulation.select_backend(circuit_factory.complete_circuit(n, measure=False))
+        except ValueError:
+            auto = "-"
+        row = {"qubits": n, "statevector_mb": simulation.statevector_mb(n), "auto": auto}
+        cells = []
+        for column in columns:
+            backend = column.split()[0]
+            if backend == "reference" and n > args.reference_max_qubits:
+                point = {"error": "skipped"}
+            else:
+                point = measure(n, backend, args, full=column.endswith("(full)"))
+            row[column] = point
+            cells.append(f"{point['seconds']:>10.3f}s {point['peak_mb']:>8.0f} MB" if "seconds" in point
+                         else f"{point['error'][:22]:>24}")
+        results.append(row)
+        print(f"{n:>6}{row['statevector_mb']:>10.2f}  {auto:<12}" + "".join(f"{c:>24}" for c in cells), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"batch": args.batch, "repeat": args.repeat, "cpus": os.cpu_count(), "results": results},
+                      f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Concurrency check for the single-flight layer (utils/single_flight.py).
+
+Fires N simultaneous identical requests at /api/company-predictions and
+/api/live-metrics through an in-process ASGI client. The handlers behind
+them are wrapped to count calls and to take --work seconds, so the requests
+overlap. It checks that:
+
+  - N simultaneous identical requests run the handler exactly once, and all
+    N get the same body
+  - requests arriving within the TTL afterwards are served without a call
+  - different parameters (another company) are not coalesced together
+  - once the TTL has passed, the next request computes again
+
+Usage (from backend/):
+    python benchmarks/single_flight_check.py --clients 50 --work 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache_load import write_fixture
+from mixed_load import make_fake_fetcher
+
+COMPANIES = ["Alpha_Co", "Beta_Co"]
+
+
+def counted(calls, name, fn, work):
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        time.sleep(work)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+async def burst(client, route, clients):
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[client.get(route) for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    return responses, elapsed
+
+
+async def run(api, args):
+    import httpx
+
+    calls = Counter()
+    api._company_predictions = counted(calls, "company-predictions", api._company_predictions, args.work)
+    api._live_metrics = counted(calls, "live-metrics", api._live_metrics, args.work)
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+        for route, name in ((f"/api/company-predictions?company={COMPANIES[0]}", "company-predictions"),
+                            ("/api/live-metrics", "live-metrics")):
+            before = calls[name]
+            responses, elapsed = await burst(client, route, args.clients)
+            bodies = {r.content for r in responses}
+            print(f"{route}: {args.clients} simultaneous requests -> {calls[name] - before} call(s), "
+                  f"{len(bodies)} distinct body, {elapsed * 1000:.0f} ms")
+            assert calls[name] - before == 1, f"{name} computed {calls[name] - before} times"
+            assert len(bodies) == 1 and b'"error"' not in responses[0].content, bodies
+
+            before = calls[name]
+            await burst(client, route, args.clients)
+            print(f"  within TTL: {calls[name] - before} call(s)")
+            assert calls[name] == before
+
+        # Different normalized parameters are different computations
+        before = calls["company-predictions"]
+        await asyncio.gather(*[client.get(f"/api/company-predictions?company={company}")
+                               for company in COMPANIES for _ in range(args.clients // 2)])
+        print(f"two companies, {args.clients // 2} requests each: {calls['company-predictions'] - before} call(s) "
+              f"({COMPANIES[0]} still cached)")
+        assert calls["company-predictions"] - before == 1
+
+        await asyncio.sleep(api.single_flight.ttl + 0.1)
+        before = calls["live-metrics"]
+        await burst(client, "/api/live-metrics", args.clients)
+        print(f"after the TTL: {calls['live-metrics'] - before} call(s)")
+        assert calls["live-metrics"] - before == 1
+    print(f"single-flight stats: {api.single_flight.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="simultaneous requests per burst")
+    parser.add_argument("--work", type=float, default=0.2, help="seconds each handler call takes")
+    parser.add_argument("--ttl", type=float, default=1.0, help="AQVH_COALESCE_TTL for the check")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+    os.environ["AQVH_COALESCE_TTL"] = str(args.ttl)
+    os.environ.setdefault("AQVH_PREWARM", "")
+
+    with tempfile.TemporaryDirectory() as root:
+        write_fixture(root, 500)
+        index = pd.date_range("2023-01-02", periods=300, freq="B", name="Date")
+        for company in COMPANIES:
+            pd.DataFrame({"Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.0, "Volume": 1e6},
+                         index=index).to_csv(os.path.join(root, "data", f"{company}.csv"))
+        os.chdir(root)
+        import main as api
+        # Keep forecasts inside the fixture; materialize up front like serve.py does
+        forecast_dir = api.forecasts.FORECAST_DIR = os.path.join(root, "data", "forecasts")
+        api.forecasts.materialize(data_dir=os.path.join(root, "data"), forecast_dir=forecast_dir, workers=1)
+        api.market_store.fetcher = make_fake_fetcher(0)
+        api.refresh_company_index()
+        asyncio.run(run(api, args))
+    print("✓ single-flight checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Checks the streaming indicators in utils/streaming_stats.py against the batch
+pandas computations they replace, and times both.
+
+The synthetic intraday series is fed in chunks (one "poll" per chunk) to
+mimic /api/live-metrics; after every poll the streaming volatility, RSI,
+EMA and change are compared with the pandas result over the full history.
+
+Usage (from backend/):
+    python benchmarks/streaming_stats_check.py --bars 5000 --chunk 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from utils.streaming_stats import LiveMetricsState
+
+
+def batch_metrics(data, window=60, rsi_period=14, ema_span=20):
+    """The batch computation previously done in get_live_metrics (plus RSI/EMA)."""
+    returns = data["Close"].pct_change().dropna()
+    volatility = float(returns[-window:].std()) if len(returns) >= window else float(returns.std())
+    diff = data["Close"].diff().dropna()
+    gain = diff.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean().iloc[-1] if len(diff) else np.nan
+    loss = (-diff).clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean().iloc[-1] if len(diff) else np.nan
+    rsi = 100 - 100 / (1 + gain / loss) if loss else (100.0 if gain > 0 else 50.0)
+    ema = data["Close"].ewm(span=ema_span, adjust=False).mean().iloc[-1]
+    return volatility, rsi, ema
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--chunk", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2024-01-02 08:00", periods=args.bars, freq="1min", tz="Europe/London")
+    close = 7500 * np.exp(np.cumsum(rng.normal(0, 5e-4, args.bars)))
+    data = pd.DataFrame({"Close": close, "Volume": rng.integers(0, 1e6, args.bars).astype(float)}, index=index)
+
+    state = LiveMetricsState(volatility_window=60)
+    streaming_time = batch_time = 0.0
+    max_err = {"volatility": 0.0, "rsi": 0.0, "ema": 0.0}
+    polls = 0
+    for end in range(args.chunk, args.bars + 1, args.chunk):
+        history = data.iloc[:end]
+        start = time.perf_counter()
+        state.update_from_frame(history)
+        streaming = (state.volatility, state.rsi.value, state.ema.value)
+        streaming_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = batch_metrics(history)
+        batch_time += time.perf_counter() - start
+
+        for name, s, b in zip(max_err, streaming, batch):
+            if s is not None and not np.isnan(b):
+                max_err[name] = max(max_err[name], abs(s - b) / max(abs(b), 1e-12))
+        polls += 1
+
+    assert state.total_volume == data["Volume"].sum()
+    print(f"polls: {polls}, bars: {args.bars}")
+    for name, err in max_err.items():
+        print(f"  max relative error {name:<10} {err:.2e}")
+        assert err < 1e-6, f"{name} diverges from pandas"
+    print(f"  streaming: {streaming_time * 1000 / polls:.3f} ms/poll")
+    print(f"  batch:     {batch_time * 1000 / polls:.3f} ms/poll")
+
+
+if __name__ == "__main__":
+    main()
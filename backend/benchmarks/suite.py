@@ -0,0 +1,330 @@
+"""
+Benchmark suite for the data pipeline, models and API routes.
+
+For each dataset size it generates a synthetic OHLCV series and times:
+
+  csv_load             pre_processing.load_data on the feature CSV
+  feature_engineering  engineer_features on the OHLCV series
+  cleaning             preprocess_for_ml (NaN/inf filling and train/test split)
+  select_scale         prepare_data_for_vqc (SelectKBest + MinMaxScaler)
+  svm_fit/svm_predict  train_svm on the training subset, predict on the whole test split
+  vqc_fit/vqc_predict  train_vqc and predict on the local simulator (capped row counts)
+  <route> cold/warm    every API route through an in-process test client, with the
+                       route's cache cleared before each request (cold) and kept (warm);
+                       cold render routes draw the figure, cold VQC predictions load
+                       the company's model bundle
+
+Training uses the same 300-row subset as train.py, so the fit stages mostly
+measure model and optimizer overhead; the other stages scale with the size.
+The API fixture is capped at --api-rows because the routes return whole files.
+Its company gets a VQC bundle trained on --vqc-train-rows rows for
+/api/vqc-predictions (skipped with --skip-vqc).
+Each stage keeps the fastest of --repeat runs (warm requests: --requests;
+VQC training runs once).
+Results can be written to JSON and compared against a saved baseline.
+
+Usage (from backend/):
+    python benchmarks/suite.py --sizes 1k,100k --output bench.json
+    python benchmarks/suite.py --sizes 1k,100k,10M --baseline bench.json
+    python benchmarks/suite.py --compare new.json --baseline bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache_load import write_fixture
+from mixed_load import make_fake_fetcher
+
+COMPANY = "Benchmark_Co"
+ROUTES = [
+    "/api/ftse100",
+    "/api/predictions",
+    "/api/model-accuracies",
+    "/api/quantum-metrics",
+    "/api/companies",
+    f"/api/company-predictions?company={COMPANY}",
+    "/api/predictions-last-update",
+    "/api/live-metrics",
+    "/api/circuit-diagram",
+    "/api/metric-chart/accuracies",
+    "/api/metric-chart/convergence",
+    f"/api/vqc-predictions?company={COMPANY}",
+    f"/api/vqc-predictions?company={COMPANY}&mode=adaptive",
+    "/metrics",
+]
+# Responses that are not JSON payloads (and so cannot carry an "error" key)
+BINARY_ROUTES = ("/metrics", "/api/circuit-diagram", "/api/metric-chart/")
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def synthetic_prices(rows, seed=0):
+    """Minute-bar OHLCV random walk (daily bars would overflow pandas timestamps at 10M rows)."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = close * (1 + rng.normal(0, 0.002, rows))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.005, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.005, rows))
+    index = pd.date_range("2000-01-03", periods=rows, freq="min", name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close,
+                         "Volume": rng.integers(100_000, 10_000_000, rows).astype(float)}, index=index)
+
+
+def report(line):
+    # Stage lines go to the real stdout; the pipeline's own progress prints are discarded
+    print(line, file=sys.__stdout__, flush=True)
+
+
+def measure(fn, repeat, setup=None):
+    """Runs ``fn(setup())`` ``repeat`` times; returns (last result, timing dict)."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        result = fn(arg)
+        runs.append(time.perf_counter() - start)
+    return result, {"seconds": min(runs), "median": statistics.median(runs), "runs": len(runs)}
+
+
+def bench_pipeline(rows, args, workdir):
+    """Times loading, cleaning, preprocessing and both models on ``rows`` synthetic rows."""
+    import joblib
+    from artifact_store import ArtifactStore
+    from classical_model import train_svm
+    from pre_processing import engineer_features, load_data, preprocess_for_ml
+    from quantum_model import prepare_data_for_vqc, train_vqc
+
+    results = {}
+
+    def record(stage, n, timing):
+        results[stage] = dict(timing, rows=n)
+        report(f"  {stage:<22}{n:>11,} rows{timing['seconds'] * 1000:>12.1f} ms")
+
+    prices = synthetic_prices(rows + 50)
+    features, timing = measure(lambda _: engineer_features(prices), args.repeat)
+    record("feature_engineering", len(prices), timing)
+
+    # Sprinkle the gaps and outliers preprocess_for_ml has to repair
+    rng = np.random.default_rng(1)
+    features.loc[rng.random(len(features)) < 0.01, "rsi"] = np.nan
+    features.loc[rng.random(len(features)) < 0.001, "price_sma_ratio"] = np.inf
+    csv_path = os.path.join(workdir, "dataset.csv")
+    features.to_csv(csv_path)
+    data, timing = measure(lambda _: load_data(csv_path), args.repeat)
+    record("csv_load", len(data), timing)
+
+    (X_train, X_test, y_train, y_test), timing = measure(preprocess_for_ml, args.repeat, setup=data.copy)
+    record("cleaning", len(data), timing)
+
+    store = ArtifactStore(root=os.path.join(workdir, "store"), export_dir=None)
+    bundles = []
+
+    def select_scale(bundle):
+        bundles.append(bundle)
+        return prepare_data_for_vqc(X_train, y_train, X_test, y_test, bundle=bundle)
+    (X_small, y_small, _, _, selected), timing = measure(select_scale, args.repeat, setup=store.bundle)
+    record("select_scale", len(X_train), timing)
+    scaler = joblib.load(os.path.join(bundles[-1].staging, "feature_scaler.pkl"))
+    for bundle in bundles:
+        bundle.discard()
+    X_test_scaled = scaler.transform(X_test[selected])
+
+    (svm_model, _), timing = measure(lambda _: train_svm(X_small, y_small), args.repeat)
+    record("svm_fit", len(X_small), timing)
+    _, timing = measure(lambda _: svm_model.predict(X_test_scaled), args.repeat)
+    record("svm_predict", len(X_test_scaled), timing)
+
+    if not args.skip_vqc:
+        np.random.seed(0)
+        fit_rows = min(len(X_small), args.vqc_train_rows)
+        (vqc_model, _), timing = measure(lambda _: train_vqc(X_small[:fit_rows], y_small[:fit_rows], len(selected)), 1)
+        record("vqc_fit", fit_rows, timing)
+        X_vqc = X_test_scaled[:args.vqc_predict_rows]
+        _, timing = measure(lambda _: vqc_model.predict(X_vqc), args.repeat)
+        record("vqc_predict", len(X_vqc), timing)
+    return results
+
+
+def write_company_vqc(path, args):
+    """Publishes a company bundle with VQC weights for /api/vqc-predictions."""
+    from artifact_store import company_store
+    from companies import company_features
+    from pre_processing import preprocess_for_ml
+    from quantum_model import prepare_data_for_vqc, save_model_weights, train_vqc
+
+    labelled = company_features(path).dropna(subset=["target"])
+    X_train, X_test, y_train, y_test = preprocess_for_ml(labelled.copy())
+    bundle = company_store(COMPANY).bundle()
+    X_small, y_small, _, _, selected = prepare_data_for_vqc(X_train, y_train, X_test, y_test, bundle=bundle)
+    np.random.seed(0)
+    fit_rows = min(len(X_small), args.vqc_train_rows)
+    model, _ = train_vqc(X_small[:fit_rows], y_small[:fit_rows], len(selected))
+    save_model_weights(model, bundle=bundle)
+    bundle.publish()
+
+
+def write_convergence(path, evaluations=200):
+    """A vqc_convergence.json like vqc_profiler writes, for the convergence chart."""
+    rng = np.random.default_rng(0)
+    losses = 0.7 + 0.3 * np.exp(-np.arange(evaluations) / 30) + rng.normal(0, 0.01, evaluations)
+    with open(path, "w") as f:
+        json.dump({"model": "VQC", "converged_iteration": 120,
+                   "loss_history": [round(float(loss), 6) for loss in losses]}, f)
+
+
+def bench_api(rows, args, workdir):
+    """Times every route through the test client against a ``rows``-row fixture."""
+    import artifact_store
+    import companies
+
+    write_fixture(workdir, rows, freq="min")
+    prices = synthetic_prices(rows)
+    company_path = os.path.join(workdir, "data", f"{COMPANY}.csv")
+    prices.to_csv(company_path)
+    write_convergence(os.path.join(workdir, "models", "vqc_convergence.json"))
+    # Company bundles live inside the fixture too
+    artifact_store.COMPANY_STORES_DIR = companies.COMPANY_STORES_DIR = os.path.join(workdir, "models", "companies")
+    artifact_store._company_stores.clear()
+    routes = [route for route in ROUTES if not (args.skip_vqc and route.startswith("/api/vqc-predictions"))]
+    if not args.skip_vqc:
+        write_company_vqc(company_path, args)
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from fastapi.testclient import TestClient
+        import main as api
+
+        # Keep forecasts inside the fixture; materialize up front like serve.py does
+        forecast_dir = os.path.join(workdir, "data", "forecasts")
+        api.forecasts.FORECAST_DIR = forecast_dir
+        api.forecasts.materialize(data_dir=os.path.join(workdir, "data"), forecast_dir=forecast_dir, workers=1)
+        api.market_store.fetcher = make_fake_fetcher(0)
+        api.json_cache._entries.clear()
+        api.live_states.clear()
+        # Cold renders are timed to completion rather than answered with 202
+        api.RENDER_WAIT_SECONDS = 600
+        render_dir = api.renderer.render_dir
+
+        def reset():
+            api.json_cache._entries.clear()
+            api.company_index["version"] = None
+            api.live_states.clear()
+            api.single_flight.clear()
+            api.vqc_models.clear()
+            if os.path.isdir(render_dir):
+                for name in os.listdir(render_dir):
+                    os.remove(os.path.join(render_dir, name))
+
+        results = {}
+        # No lifespan: its shutdown closes the shared pools, and the suite opens a client per size
+        client = TestClient(api.app)
+        for route in routes:
+            for mode in ("cold", "warm"):
+                def request(_):
+                    response = client.get(route)
+                    if response.status_code != 200 or (not route.startswith(BINARY_ROUTES) and "error" in response.json()):
+                        raise RuntimeError(f"{route}: {response.status_code} {response.text[:200]}")
+                client.get(route)
+                # Cold requests rebuild the payload every time, so they get --repeat runs
+                runs = args.repeat if mode == "cold" else args.requests
+                _, timing = measure(request, runs, setup=reset if mode == "cold" else None)
+                results[f"{route} {mode}"] = dict(timing, rows=rows)
+                report(f"  {route + ' ' + mode:<58}{timing['seconds'] * 1000:>10.2f} ms")
+    finally:
+        os.chdir(previous)
+    return results
+
+
+def compare(results, baseline, threshold, min_seconds):
+    """Prints stage timings against the baseline; returns the regressed (size, stage) pairs."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if before is None:
+                continue
+            before, after = before["seconds"], result["seconds"]
+            change = (after - before) / before if before else 0.0
+            # Sub-millisecond stages are too noisy to flag on relative change alone
+            flag = "REGRESSION" if change > threshold and after - before > min_seconds else ""
+            print(f"{size:>6} {stage:<58}{before * 1000:>10.2f} -> {after * 1000:>10.2f} ms ({change:+.0%}) {flag}")
+            if flag:
+                regressions.append((size, stage))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,100k", help="comma-separated row counts (k/M suffixes)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per pipeline stage (the fastest is kept)")
+    parser.add_argument("--requests", type=int, default=20, help="warm requests per route")
+    parser.add_argument("--api-rows", type=int, default=100_000, help="row cap for the API fixture")
+    parser.add_argument("--vqc-train-rows", type=int, default=60)
+    parser.add_argument("--vqc-predict-rows", type=int, default=500)
+    parser.add_argument("--skip-vqc", action="store_true")
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file written with --output")
+    parser.add_argument("--compare", help="compare this results file against --baseline instead of running")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown flagged as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare) as f:
+            report = json.load(f)
+    else:
+        import logging
+        logging.disable(logging.WARNING)
+        os.environ.setdefault("AQVH_PREWARM", "")
+
+        report = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                           "numpy": np.__version__, "pandas": pd.__version__,
+                           "date": time.strftime("%Y-%m-%dT%H:%M:%S")}, "results": {}}
+        for label in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+            rows = parse_size(label)
+            print(f"\n[{label}] {rows:,} rows")
+            results = report["results"][label] = {}
+            with tempfile.TemporaryDirectory() as workdir:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.update(bench_pipeline(rows, args, workdir))
+                    if not args.skip_api:
+                        results.update(bench_api(min(rows, args.api_rows), args, os.path.join(workdir, "api")))
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"✓ Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(report["results"], baseline["results"], args.threshold, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
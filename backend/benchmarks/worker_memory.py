@@ -0,0 +1,140 @@
+"""
+Per-worker memory of the API with and without the shared memory-mapped snapshot.
+
+Writes a synthetic dataset/predictions/company fixture (the layout the API
+reads), publishes it the way serve.py does and then starts 1..N worker
+processes that each import main.py in the fixture and request
+
+    /api/ftse100  /api/predictions  /api/companies
+
+through an in-process test client, either
+
+  private  reading the CSVs from disk (no AQVH_SHARED_DIR)
+  shared   attached to the snapshot (AQVH_SHARED_DIR), serving from its columns
+
+Memory is sampled after the requests. Reported per worker: RSS, peak RSS,
+USS (memory unique to that process) and the serialized response bodies the
+worker's JSON cache keeps (none in shared mode, which sends the snapshot's
+published bodies from their files).
+
+Usage (from backend/):
+    python benchmarks/worker_memory.py --rows 500000 --workers 1 2 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import psutil
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache_load import write_fixture
+
+COMPANIES = ["AstraZeneca", "HSBC_Holdings", "Tesco", "Unilever"]
+ROUTES = ["/api/ftse100", "/api/predictions", "/api/companies"]
+
+
+def write_companies(data_dir, rows):
+    rng = np.random.default_rng(0)
+    for name in COMPANIES:
+        close = 100 + rng.standard_normal(rows).cumsum()
+        pd.DataFrame({
+            "Date": pd.date_range("1990-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M"),
+            "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+            "Volume": rng.integers(0, 1e9, rows),
+        }).to_csv(os.path.join(data_dir, f"{name}.csv"), index=False)
+
+
+def peak_rss():
+    """Peak RSS of this process in bytes (VmHWM; ru_maxrss would include the parent's peak before exec)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except FileNotFoundError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def worker(mode, root, shared_dir, ready, done, results):
+    import logging
+    import warnings
+    logging.disable(logging.WARNING)
+    warnings.simplefilter("ignore")
+    os.chdir(root)
+    if mode == "shared":
+        os.environ["AQVH_SHARED_DIR"] = shared_dir
+    from fastapi.testclient import TestClient
+    import main as api
+    # Workers share the machine's cores here, so large fixtures can exceed the routes' timeouts
+    for limit in api.limits.values():
+        limit.timeout = 3600
+    client = TestClient(api.app)
+    try:
+        for route in ROUTES:
+            response = client.get(route)
+            if response.status_code != 200 or "error" in response.json():
+                raise RuntimeError(f"{route}: {response.status_code} {response.text[:200]}")
+        info = psutil.Process().memory_full_info()
+        peak = peak_rss()
+        bodies = sum(len(body) for entry in api.json_cache._entries.values() for body in entry.variants.values())
+        results.put((info.rss, peak, info.uss, bodies))
+    except Exception as e:
+        results.put(e)
+    ready.wait()
+    done.wait()
+
+
+def measure(mode, n, root, shared_dir):
+    ctx = mp.get_context("spawn")
+    ready, done, results = ctx.Barrier(n + 1), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(mode, root, shared_dir, ready, done, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    ready.wait()
+    samples = [results.get() for _ in range(n)]
+    done.set()
+    for p in procs:
+        p.join()
+    for sample in samples:
+        if isinstance(sample, Exception):
+            raise sample
+    return [np.mean([s[i] for s in samples]) / 2**20 for i in range(4)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        write_fixture(root, args.rows, freq="min")
+        write_companies(os.path.join(root, "data"), args.rows)
+        shared_dir = os.path.join(root, "shared")
+        previous = os.getcwd()
+        os.chdir(root)
+        try:
+            import serve
+            serve.publish_snapshot(shared_dir)
+        finally:
+            os.chdir(previous)
+
+        print(f"{'mode':<9}{'workers':>8}{'RSS MiB/worker':>16}{'peak MiB/worker':>17}{'USS MiB/worker':>16}"
+              f"{'USS MiB total':>15}{'bodies MiB/worker':>19}")
+        for mode in ("private", "shared"):
+            for n in args.workers:
+                rss, peak, uss, bodies = measure(mode, n, root, shared_dir)
+                print(f"{mode:<9}{n:>8}{rss:>16.1f}{peak:>17.1f}{uss:>16.1f}{uss * n:>15.1f}{bodies:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,117 +1,437 @@
-from fastapi import Query, FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+import datetime
+import json
+from fastapi import Query, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse
 import os
+import sys
+import threading
 import pandas as pd
 import numpy as np
-import yfinance as yf
 
-app = FastAPI()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from lazy_imports import prewarm
+import companies
+import forecasts
+import market_data
+import rendering
+import telemetry
+from telemetry import log_event
+from utils.executors import EndpointLimit, cpu_pool, io_pool, shutdown_pools
+from utils.http_cache import VersionedJSONCache, content_version
+from utils.single_flight import SingleFlight, request_key
+from utils.shared_store import SharedStore, frame_records
+from utils.streaming_stats import LiveMetricsState
+from utils.metrics_middleware import RequestMetricsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app):
+    telemetry.configure_logging()
+    telemetry.start_snapshots()
+    # Comma-separated stacks/modules to import in the background, e.g. "yfinance,quantum"
+    stacks = [name for name in os.environ.get("AQVH_PREWARM", "yfinance").split(",") if name]
+    if stacks:
+        prewarm(*stacks)
+    refresh_company_index()
+    yield
+    renderer.shutdown()
+    shutdown_pools()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+
+def observe_cache(key, event, seconds):
+    endpoint = key.split(":", 1)[0]
+    if seconds is None:
+        telemetry.cache_requests.labels("json", event).inc()
+    else:
+        telemetry.payload_stage_seconds.labels(endpoint, event).observe(seconds)
+
+
+# Serialized (and compressed) payloads of the file-backed endpoints, per file version
+json_cache = VersionedJSONCache(observe=observe_cache)
+
+def observe_coalesce(key, event):
+    telemetry.cache_requests.labels("single_flight", event).inc()
+
+
+# Identical concurrent requests to the expensive endpoints share one computation,
+# and its result is reused for AQVH_COALESCE_TTL seconds
+COALESCE_TTL = float(os.environ.get("AQVH_COALESCE_TTL", 2))
+single_flight = SingleFlight(ttl=COALESCE_TTL, observe=observe_coalesce)
+
+# Concurrency cap and timeout (seconds) per endpoint; network-bound work runs on
+# io_pool so a slow yfinance call cannot take threads away from the CSV endpoints
+limits = {
+    "company-predictions": EndpointLimit("company-predictions", cpu_pool, max_concurrency=8, timeout=30),
+    "quantum-metrics": EndpointLimit("quantum-metrics", cpu_pool, max_concurrency=16, timeout=10),
+    "live-metrics": EndpointLimit("live-metrics", io_pool, max_concurrency=4, timeout=20),
+    "model-accuracies": EndpointLimit("model-accuracies", cpu_pool, max_concurrency=16, timeout=10),
+    "ftse100": EndpointLimit("ftse100", cpu_pool, max_concurrency=4, timeout=30),
+    "predictions": EndpointLimit("predictions", cpu_pool, max_concurrency=4, timeout=30),
+    "companies": EndpointLimit("companies", cpu_pool, max_concurrency=1, timeout=30),
+    "vqc-predictions": EndpointLimit("vqc-predictions", cpu_pool, max_concurrency=2, timeout=60),
+}
+
+# Multi-worker mode: serve.py publishes the CSVs into a shared memory-mapped snapshot
+shared_store = SharedStore(os.environ["AQVH_SHARED_DIR"]) if os.environ.get("AQVH_SHARED_DIR") else None
+
+
+def table_records(csv_path, **read_csv_kwargs):
+    """A CSV as a list of row dicts (nulls and inf as None)."""
+    return frame_records(pd.read_csv(csv_path, **read_csv_kwargs))
+
+
+def table_dates(table, csv_path):
+    """The first (date) column of a table, parsed as UTC timestamps with unparseable rows dropped."""
+    if shared_store is not None and shared_store.has_table(table):
+        values, mask = next(iter(shared_store.columns(table).values()))
+        column = pd.Series(values)
+        if mask is not None:
+            column = column.where(~mask)
+    else:
+        column = pd.read_csv(csv_path, usecols=[0]).iloc[:, 0]
+    return pd.to_datetime(column, errors="coerce", utc=True, format="ISO8601").dropna()
+
+
+def respond_table(request, key, table, csv_path, build):
+    """
+    Sends the body serve.py published for ``table`` straight from the shared
+    snapshot when attached; otherwise builds and caches it from the CSV.
+    """
+    files = shared_store.body_files(table) if shared_store is not None else None
+    if files:
+        return json_cache.respond_files(request, key, content_version(*shared_store.table_version(table)), files)
+    return json_cache.respond(request, key, [csv_path], build)
+
+
+# Companies with a price file, built at startup and rebuilt only when serve.py
+# publishes a new snapshot or company_models.json is rewritten by training
+company_index = {"version": None, "companies": []}
+company_index_lock = threading.Lock()
+# Serializes on-demand forecast builds in this process
+materialize_lock = threading.Lock()
+COMPANY_SUMMARY_PATH = os.path.join("models", "company_models.json")
+
+
+def company_index_version():
+    try:
+        summary_mtime = os.stat(COMPANY_SUMMARY_PATH).st_mtime_ns
+    except FileNotFoundError:
+        summary_mtime = None
+    tables = None
+    if shared_store is not None:
+        tables = tuple(sorted((name, digest) for name, digest in shared_store.table_hashes().items()
+                              if name.startswith("company-")))
+    return (tables, summary_mtime)
+
+
+def build_company_index():
+    summary = companies.load_summary(COMPANY_SUMMARY_PATH)
+    entries = []
+    for name, path in companies.discover_companies("data").items():
+        entry = {"name": name, "displayName": companies.display_name(name), "rows": 0,
+                 "firstDate": None, "lastDate": None, "model": None}
+        try:
+            dates = table_dates(f"company-{name}", path)
+            entry["rows"] = len(dates)
+            if len(dates):
+                entry["firstDate"] = dates.iloc[0].strftime("%Y-%m-%d")
+                entry["lastDate"] = dates.iloc[-1].strftime("%Y-%m-%d")
+        except Exception as e:
+            print(f"Warning: could not index {path}: {e}")
+        model = summary.get(name)
+        if model:
+            entry["model"] = {"bundleId": model["bundle_id"], "dataEnd": model["data_end"], "trained": model["trained"],
+                              "accuracy": {tag: m["accuracy"] for tag, m in model["metrics"].items()}}
+        entries.append(entry)
+    return entries
+
+
+def refresh_company_index():
+    version = company_index_version()
+    with company_index_lock:
+        company_index["companies"] = build_company_index()
+        company_index["version"] = version
+
+
+@app.get("/api/companies")
+async def get_companies():
+    if company_index_version() != company_index["version"]:
+        await limits["companies"](refresh_company_index)
+    return company_index["companies"]
+
 
 # New endpoint: forecast for any company in data folder
 @app.get("/api/company-predictions")
-def get_company_predictions(company: str = Query(..., description="Company CSV name without .csv extension")):
-    # Compose file path
-    data_dir = "data"
-    filename = f"{company}.csv"
-    file_path = os.path.join(data_dir, filename)
-    if not os.path.exists(file_path):
-        return {"error": f"Company data file not found: {filename}"}
+async def get_company_predictions(request: Request, company: str = Query(..., description="Company CSV name without .csv extension")):
+    return await single_flight.run(request_key("company-predictions", request),
+                                   lambda: limits["company-predictions"](_company_predictions, request, company))
+
+
+def _company_predictions(request, company):
+    # Forecasts are precomputed by src/forecasts.py; this is a file lookup
+    known = any(entry["name"] == company for entry in company_index["companies"])
+    if os.path.basename(company) != company or not (known or os.path.exists(os.path.join("data", f"{company}.csv"))):
+        return {"error": f"Company data file not found: {company}.csv"}
+    path = os.path.join(forecasts.FORECAST_DIR, f"{company}.json")
     try:
-        df = pd.read_csv(file_path)
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.astype(object).where(pd.notnull(df), None)
-        gbp_to_inr = 105.0
-        # Convert price columns to INR for historical rows
-        def convert_row_to_inr(row):
-            for col in ["Open", "High", "Low", "Close"]:
-                if col in row and row[col] is not None:
-                    try:
-                        row[col] = round(float(row[col]) * gbp_to_inr, 2)
-                    except Exception:
-                        pass
-            if "actual" in row and row["actual"] is not None:
-                try:
-                    row["actual"] = round(float(row["actual"]) * gbp_to_inr, 2)
-                except Exception:
-                    pass
-            return row
-        last_rows = df.tail(30)
-        historical = [
-            convert_row_to_inr(dict(row, **{"vqc_prediction": None, "svm_prediction": None, "actual": row.get("Close", None), "date": row.get("Date", None)}))
-            for row in last_rows.to_dict(orient="records")
-        ]
-        # Dummy forecast: next 10 days, use last close as base (already in INR)
-        import datetime
-        last_date = pd.to_datetime(historical[-1]["date"]) if historical and historical[-1]["date"] else pd.Timestamp.today()
-        last_close = float(historical[-1]["actual"]) if historical and historical[-1]["actual"] else 100.0
-        forecast = []
-        for i in range(1, 11):
-            next_date = last_date + pd.Timedelta(days=i)
-            pred = last_close * (1 + 0.01 * np.random.randn())
-            forecast_row = dict(last_rows.iloc[-1]) if not last_rows.empty else {}
-            # Set all price columns to None for forecast, except vqc_prediction/svm_prediction
-            for col in ["Open", "High", "Low", "Close"]:
-                forecast_row[col] = None
-            forecast_row.update({
-                "date": next_date.strftime("%Y-%m-%d"),
-                "actual": None,
-                "vqc_prediction": round(pred, 2),
-                "svm_prediction": round(pred * (1 + 0.005 * np.random.randn()), 2)
-            })
-            # Convert predictions to INR if not already
-            forecast_row["vqc_prediction"] = round(forecast_row["vqc_prediction"], 2)
-            forecast_row["svm_prediction"] = round(forecast_row["svm_prediction"], 2)
-            forecast.append(forecast_row)
-        return historical + forecast
+        if not os.path.exists(path):
+            # Not materialized yet (e.g. a data file added since the last refresh)
+            with materialize_lock:
+                # Requests queued behind a build find the file and skip it
+                if not os.path.exists(path):
+                    forecasts.materialize([company], workers=1)
+        def build():
+            with open(path) as f:
+                return json.load(f)
+        return json_cache.respond(request, f"company-predictions:{company}", [path], build)
     except Exception as e:
         return {"error": str(e)}
 
 
+# Last loaded (bundle id, preprocessor, VQC) per company for /api/vqc-predictions
+vqc_models = {}
+vqc_models_lock = threading.Lock()
+
+
+@app.get("/api/vqc-predictions")
+async def get_vqc_predictions(
+    company: str = Query(..., description="Company CSV name without .csv extension"),
+    mode: str = Query("exact", pattern="^(exact|shots|adaptive)$"),
+    last: int = Query(5, ge=1, le=500, description="Most recent feature rows to score"),
+    shots: int = Query(1024, ge=1, le=100_000, description="Shots per row (shots mode)"),
+    initial_shots: int = Query(64, ge=1, le=100_000, description="First round of shots (adaptive mode)"),
+    max_shots: int = Query(4096, ge=1, le=100_000, description="Shot cap per row (adaptive mode)"),
+    confidence: float = Query(0.95, gt=0, lt=1, description="Confidence the predicted class must reach (adaptive mode)"),
+):
+    options = {"shots": shots, "initial_shots": initial_shots, "max_shots": max_shots, "confidence": confidence}
+    return await limits["vqc-predictions"](_vqc_predictions, company, mode, last, options)
+
+
+def _vqc_predictions(company, mode, last, options):
+    import predict
+    from artifact_store import company_store
+    path = os.path.join("data", f"{company}.csv")
+    if os.path.basename(company) != company or not os.path.exists(path):
+        return {"error": f"Company data file not found: {company}.csv"}
+    bundle_id = companies.current_bundle_id(company)
+    store = company_store(company) if bundle_id else None
+    if bundle_id is None or "vqc_weights.npy" not in store.manifest(bundle_id)["files"]:
+        return {"error": f"No VQC trained for {company}"}
+    try:
+        with vqc_models_lock:
+            cached = vqc_models.get(company)
+            if cached is None or cached[0] != bundle_id:
+                preprocessor = predict.load_preprocessor(bundle_id, store=store)
+                model = predict.load_vqc_model(num_features=len(preprocessor[0]), bundle_id=bundle_id, store=store)
+                cached = vqc_models[company] = (bundle_id, preprocessor, model)
+        _, preprocessor, model = cached
+        features = companies.company_features(path).tail(last)
+        X = predict.preprocess_new_data(features, preprocessor=preprocessor)
+        scored = predict.run_vqc_inference(model, X, mode=mode, **options)
+    except Exception as e:
+        return {"error": str(e)}
+    probability_columns = [col for col in scored.columns if col.startswith("probability_")]
+    return {
+        "company": company,
+        "bundleId": bundle_id,
+        "mode": mode,
+        "totalShots": int(scored["shots"].sum()),
+        "predictions": [
+            {
+                "date": date.strftime("%Y-%m-%d"),
+                "label": int(row["prediction"]),
+                "prediction": "BUY" if row["prediction"] == 1 else "SELL",
+                "probabilities": {col[len("probability_"):]: round(float(row[col]), 6) for col in probability_columns},
+                "margin": round(float(row["margin"]), 6),
+                "shots": int(row["shots"]),
+            }
+            for date, (_, row) in zip(features.index, scored.iterrows())
+        ],
+    }
+
+
+@app.get("/api/predictions-last-update")
+async def get_predictions_last_update():
+    return await limits["predictions"](_predictions_last_update)
+
+
+def _predictions_last_update():
+    """When predictions.csv and each company forecast were last computed, and whether their inputs changed since."""
+    index = forecasts.load_index()
+    freshness = {}
+    for name, entry in index["companies"].items():
+        try:
+            stat = os.stat(os.path.join("data", f"{name}.csv"))
+            data_changed = (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"])
+        except FileNotFoundError:
+            data_changed = True
+        freshness[name] = {
+            "computed": entry["computed"],
+            "dataEnd": entry["data_end"],
+            "dataVersion": entry["data_version"],
+            "modelVersion": entry["model_version"],
+            "stale": data_changed or companies.current_bundle_id(name) != entry["model_version"],
+        }
+    try:
+        updated = datetime.datetime.fromtimestamp(os.path.getmtime("data/predictions.csv"))
+    except FileNotFoundError:
+        updated = datetime.datetime.fromisoformat(index["updated"]) if index["updated"] else None
+    return {
+        "lastUpdate": updated.isoformat(timespec="seconds") if updated else None,
+        "readable": updated.strftime("%Y-%m-%d %H:%M:%S") if updated else None,
+        "forecastsUpdated": index["updated"],
+        "forecasts": freshness,
+    }
+
+
 @app.get("/api/quantum-metrics")
-def get_quantum_metrics():
+async def get_quantum_metrics(request: Request):
+    return await limits["quantum-metrics"](_quantum_metrics, request)
+
+
+def _quantum_metrics(request):
     import json
-    try:
+    # Written by training runs with AQVH_PROFILE_VQC=1 (see src/vqc_profiler.py)
+    convergence_path = "models/vqc_convergence.json"
+    paths = ["models/quantum_metrics.json"]
+    if os.path.exists(convergence_path):
+        paths.append(convergence_path)
+    def build():
         with open("models/quantum_metrics.json", "r") as f:
-            data = json.load(f)
-        return data
+            metrics = json.load(f)
+        if len(paths) > 1:
+            with open(convergence_path) as f:
+                metrics["convergence"] = json.load(f)
+        return metrics
+    try:
+        return json_cache.respond(request, "quantum-metrics", paths, build)
     except Exception as e:
         return {"error": str(e)}
 
 
+def observe_render(spec, event, seconds):
+    if seconds is None:
+        telemetry.cache_requests.labels("render", event).inc()
+    else:
+        log_event("render_complete", kind=spec["kind"], name=spec["name"], format=spec["format"],
+                  seconds=round(seconds, 4))
+
+
+# Circuit diagrams and metric charts are drawn on the renderer's own thread and cached under
+# data/renders; a request waits at most AQVH_RENDER_WAIT seconds, then gets 202 and retries
+renderer = rendering.Renderer(os.path.join("data", "renders"), "models", observe=observe_render)
+RENDER_WAIT_SECONDS = float(os.environ.get("AQVH_RENDER_WAIT", 5))
+
+
+@app.get("/api/circuit-diagram")
+async def get_circuit_diagram(
+    request: Request,
+    component: str = Query("complete", pattern="^(complete|feature_map|ansatz)$"),
+    qubits: int = Query(rendering.DEFAULT_QUBITS, ge=1, le=rendering.MAX_QUBITS),
+    feature_map_reps: int = Query(2, ge=1, le=10),
+    ansatz_reps: int = Query(3, ge=1, le=10),
+    decompose: bool = Query(True, description="Draw the library blocks as their gates"),
+    format: str = Query("svg", pattern="^(svg|png)$"),
+):
+    spec = rendering.circuit_spec(component, qubits, feature_map_reps, ansatz_reps, decompose=decompose, fmt=format)
+    return await _rendered(request, spec)
+
+
+@app.get("/api/metric-chart/{name}")
+async def get_metric_chart(request: Request, name: str, format: str = Query("svg", pattern="^(svg|png)$")):
+    try:
+        spec = rendering.chart_spec(name, format)
+    except ValueError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    return await _rendered(request, spec)
+
+
+async def _rendered(request, spec):
+    try:
+        path = renderer.path(spec)
+    except FileNotFoundError:
+        return JSONResponse(status_code=404, content={"error": f"No data for the {spec['name']} chart yet"})
+    # The file name already identifies the configuration and data version
+    headers = {"ETag": f'"{os.path.splitext(os.path.basename(path))[0]}"', "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"] and os.path.exists(path):
+        return Response(status_code=304, headers=headers)
+    try:
+        path = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(renderer.submit(spec))),
+                                      timeout=RENDER_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=202, content={"status": "rendering"}, headers={"Retry-After": "1"})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    return FileResponse(path, media_type=rendering.FORMATS[spec["format"]], headers=headers)
+
+
+# Bars come from the local market-data store; each poll asks upstream only for bars newer than the
+# stored ones, and at most once per LIVE_REFRESH_SECONDS across all workers
+market_store = market_data.MarketDataStore(os.path.join("data", "market"))
+LIVE_REFRESH_SECONDS = float(os.environ.get("AQVH_LIVE_REFRESH_SECONDS", 30))
+DAILY_REFRESH_SECONDS = 3600
+
+# Incremental live-metrics state per (ticker, interval); only new bars are fed on each poll
+live_states = {}
+live_states_lock = threading.Lock()
+
+
 @app.get("/api/live-metrics")
-def get_live_metrics():
+async def get_live_metrics():
+    return await single_flight.run(("live-metrics",), lambda: limits["live-metrics"](_live_metrics))
+
+
+def _live_metrics():
     import logging
-    ticker = yf.Ticker("^FTSE")
-    data = ticker.history(period="1d", interval="1m")
+    interval = "1m"
+    market_store.refresh("^FTSE", "1m", max_age=LIVE_REFRESH_SECONDS)
+    data = market_store.latest_session("^FTSE", "1m")
     if data.empty:
         # Try a more reliable interval if 1m is empty
-        data = ticker.history(period="5d", interval="5m")
+        interval = "5m"
+        market_store.refresh("^FTSE", "5m", max_age=LIVE_REFRESH_SECONDS)
+        data = market_store.latest_session("^FTSE", "5m")
         if data.empty:
-            logging.warning("No FTSE 100 data available for 1m or 5m interval.")
+            log_event("live_metrics_no_data", level=logging.WARNING, ticker="^FTSE")
             return {"error": "No FTSE 100 data available (1m/5m)"}
-        else:
-            logging.info(f"Using 5m interval data: {data.tail(2)}")
-    else:
-        logging.info(f"Using 1m interval data: {data.tail(2)}")
-    latest = data.iloc[-1]
-    prev_close = ticker.history(period="2d").iloc[0]["Close"] if len(ticker.history(period="2d")) > 1 else latest["Close"]
-    current_price = latest["Close"]
-    daily_change = current_price - prev_close
-    volume = int(latest["Volume"]) if not pd.isna(latest["Volume"]) and latest["Volume"] > 0 else None
-    returns = data["Close"].pct_change().dropna()
-    volatility = float(returns[-60:].std()) if len(returns) >= 60 else float(returns.std())
-    if pd.isna(volatility) or volatility == 0:
-        volatility = None
+    log_event("live_metrics_bars", level=logging.DEBUG, interval=interval, rows=len(data), last=data.index[-1])
+    with live_states_lock:
+        state = live_states.get(("^FTSE", interval))
+        if state is None or (state.last_timestamp is not None and data.index[0] > state.last_timestamp):
+            # First poll, or the stored history no longer overlaps the fetched window
+            state = live_states[("^FTSE", interval)] = LiveMetricsState(volatility_window=60)
+        state.update_from_frame(data)
+        latest_date = state.last_timestamp.date()
+        if state.reference_date != latest_date:
+            # Previous close only changes once per trading day
+            market_store.refresh("^FTSE", "1d", max_age=DAILY_REFRESH_SECONDS)
+            daily = market_store.read("^FTSE", "1d", start=state.last_timestamp - pd.Timedelta(days=10))
+            previous = daily[daily.index.date < latest_date]
+            state.reference_close = float(previous["Close"].iloc[-1]) if len(previous) else state.last_close
+            state.reference_date = latest_date
+        current_price = state.last_close
+        daily_change = state.daily_change
+        volume = int(state.last_volume) if not pd.isna(state.last_volume) and state.last_volume > 0 else None
+        volatility = state.volatility
+        confidence = state.confidence
+        rsi = state.rsi.value
     next_prediction = "BUY" if daily_change > 0 else "SELL"
-    confidence = min(abs(daily_change) / (current_price if current_price else 1), 1.0)
-    logging.info(f"currentPrice: {current_price}, dailyChange: {daily_change}, volume: {volume}, volatility: {volatility}, nextPrediction: {next_prediction}, confidence: {confidence}")
+    log_event("live_metrics", level=logging.DEBUG, price=current_price, daily_change=daily_change, volume=volume,
+              volatility=volatility, prediction=next_prediction, confidence=confidence)
     # Convert GBP to INR (approximate conversion, update as needed)
     gbp_to_inr = 105.0  # Example rate, update to current rate if needed
     inr_price = float(current_price) * gbp_to_inr
@@ -121,6 +441,7 @@ def get_live_metrics():
         "dailyChange": round(inr_change, 2),
         "volume": volume if volume is not None else "N/A",
         "volatility": f"{volatility*100:.1f}%" if volatility is not None else "N/A",
+        "rsi": round(rsi, 2) if rsi is not None else "N/A",
         "nextPrediction": next_prediction,
         "confidence": round(confidence, 2),
         "currencySymbol": "₹"
@@ -128,43 +449,57 @@ def get_live_metrics():
 
 
 @app.get("/api/model-accuracies")
-def get_model_accuracies():
+async def get_model_accuracies(request: Request):
+    return await limits["model-accuracies"](_model_accuracies, request)
+
+
+def _model_accuracies(request):
     import json
-    try:
+    def build():
         with open("models/model_accuracies.json", "r") as f:
-            data = json.load(f)
-        return data
+            return json.load(f)
+    try:
+        return json_cache.respond(request, "model-accuracies", ["models/model_accuracies.json"], build)
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.get("/api/ftse100")
-def get_ftse100_data():
+async def get_ftse100_data(request: Request):
+    return await limits["ftse100"](_ftse100_data, request)
+
+
+def _ftse100_data(request):
     import logging
-    try:
+    def build():
         # Skip the metadata rows and use the first row as header
-        df = pd.read_csv("data/dataset.csv", header=0, skiprows=[1,2])
-        import logging
-        logging.warning(f"DF Columns: {df.columns.tolist()}")
-        logging.warning(f"DF Head: {df.head(5).to_dict(orient='records')}")
+        records = table_records("data/dataset.csv", header=0, skiprows=[1,2])
+        log_event("ftse100_loaded", level=logging.DEBUG, rows=len(records), columns=list(records[0]) if records else [])
         # Do not filter rows; just return all rows as objects
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.astype(object).where(pd.notnull(df), None)
-        logging.warning(f"DF After No Filter: {df.tail(5).to_dict(orient='records')}")
-        return df.to_dict(orient="records")
+        return records
+    try:
+        return respond_table(request, "ftse100", "dataset", "data/dataset.csv", build)
     except Exception as e:
-        import logging
-        logging.exception("Error in /api/ftse100 endpoint: %s", e)
+        log_event("endpoint_error", level=logging.ERROR, route="/api/ftse100", error=str(e))
         return {"error": str(e)}
 
 
 @app.get("/api/predictions")
-def get_predictions():
+async def get_predictions(request: Request):
+    return await limits["predictions"](_predictions, request)
+
+
+def _predictions(request):
     # Adjust the file path as needed
+    def build():
+        return table_records("data/predictions.csv")
     try:
-        df = pd.read_csv("data/predictions.csv")
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.astype(object).where(pd.notnull(df), None)
-        return df.to_dict(orient="records")
+        return respond_table(request, "predictions", "predictions", "data/predictions.csv", build)
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition (merged across workers when AQVH_METRICS_DIR is set)."""
+    return Response(content=telemetry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,122 @@
+"""
+Multi-worker launcher for the API.
+
+The parent process loads dataset.csv, predictions.csv and the company CSVs
+once, publishes them into a shared memory-mapped snapshot
+(utils/shared_store.py), with the JSON bodies of /api/ftse100 and
+/api/predictions serialized and compressed, and then starts uvicorn with
+several workers. Each worker attaches to the snapshot zero-copy instead of
+parsing its own copy, and sends those bodies straight from it.
+A background thread in the parent republishes whenever a source file
+changes; workers pick up the new version on their next request. The same
+thread refreshes the precomputed company forecasts (src/forecasts.py) at
+startup and whenever data or models change.
+
+Usage (from backend/):
+    python serve.py --workers 4 --port 8000
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import threading
+import time
+
+import pandas as pd
+import uvicorn
+
+from utils.shared_store import publish
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+DATA_DIR = "data"
+MODELS_DIR = "models"
+
+
+def source_files():
+    return sorted(glob.glob(os.path.join(DATA_DIR, "*.csv")) + glob.glob(os.path.join(MODELS_DIR, "*")))
+
+
+def source_signature():
+    return tuple((path, os.stat(path).st_mtime_ns) for path in source_files() if os.path.isfile(path))
+
+
+def load_tables():
+    """Loads every CSV the API serves, parsed the same way the endpoints parse them."""
+    tables = {}
+    for path in glob.glob(os.path.join(DATA_DIR, "*.csv")):
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            if name == "dataset":
+                # Skip the metadata rows and use the first row as header
+                tables["dataset"] = pd.read_csv(path, header=0, skiprows=[1, 2])
+            elif name == "predictions":
+                tables["predictions"] = pd.read_csv(path)
+            else:
+                tables[f"company-{name}"] = pd.read_csv(path)
+        except Exception as e:
+            print(f"Warning: could not load {path}: {e}")
+    return tables
+
+
+def publish_snapshot(shared_dir):
+    start = time.time()
+    # Tables the API returns whole are published as ready-to-send bodies too
+    version = publish(shared_dir, load_tables(), bodies=("dataset", "predictions"))
+    print(f"✓ Published shared snapshot v{version} to {shared_dir} in {time.time() - start:.2f}s")
+    return version
+
+
+def refresh_forecasts():
+    from forecasts import materialize
+    try:
+        start = time.time()
+        updated = materialize()
+        if updated:
+            print(f"✓ Recomputed {len(updated)} company forecasts in {time.time() - start:.2f}s")
+    except Exception as e:
+        print(f"Warning: forecast refresh failed: {e}")
+
+
+def refresh_loop(shared_dir, interval, signature, forecasts=True):
+    if forecasts:
+        refresh_forecasts()
+    while True:
+        time.sleep(interval)
+        try:
+            current = source_signature()
+            if current != signature:
+                if forecasts:
+                    refresh_forecasts()
+                publish_snapshot(shared_dir)
+                signature = current
+        except Exception as e:
+            print(f"Warning: shared snapshot refresh failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several workers sharing one data snapshot")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--shared-dir", default=os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp", "aqvh-ml"))
+    parser.add_argument("--refresh-interval", type=float, default=30.0, help="seconds between source change checks")
+    parser.add_argument("--no-forecasts", action="store_true", help="do not refresh company forecasts in this process")
+    args = parser.parse_args()
+
+    signature = source_signature()
+    publish_snapshot(args.shared_dir)
+    threading.Thread(target=refresh_loop, args=(args.shared_dir, args.refresh_interval, signature, not args.no_forecasts),
+                     daemon=True).start()
+
+    # Workers inherit the environment and attach to the snapshot on import
+    os.environ["AQVH_SHARED_DIR"] = args.shared_dir
+    # Each worker writes its metrics here so /metrics can report all of them
+    metrics_dir = os.environ.setdefault("AQVH_METRICS_DIR", os.path.join(args.shared_dir, "metrics"))
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
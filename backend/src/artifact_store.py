@@ -0,0 +1,295 @@
+"""
+Versioned, content-addressed store for trained model artifacts.
+
+A bundle is an immutable directory holding everything inference needs
+(SVM, scaler, selected features, VQC weights) plus the metrics and config
+it was produced with. Its name is a hash of its contents:
+
+    models/store/bundles/<bundle_id>/manifest.json
+    models/store/bundles/<bundle_id>/<artifact files>
+    models/store/current        id of the live bundle
+    models/store/history.jsonl  one line per publish
+
+Publishing stages the files in a private directory, renames it into place
+and then swaps the ``current`` pointer with ``os.replace``, so readers never
+see a half-written bundle and can memory-map weights without locks. A new
+bundle starts from the files of the current one, and the pointer swap is
+serialized with a lock file, so concurrent trainers that each publish a
+different component (SVM, VQC, IBM metrics) extend each other instead of
+clobbering.
+
+After each publish the current files are also exported to the flat
+``models/`` directory (svm_model.pkl, model_accuracies.json, ...), with
+atomic renames, for readers that still use those paths.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from file_io import FileLock, atomic_write, write_json, write_text
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'models'))
+STORE_DIR = os.path.join(MODELS_DIR, 'store')
+# Per-company stores (see companies.py); not exported to the flat models/ files
+COMPANY_STORES_DIR = os.path.join(STORE_DIR, 'companies')
+
+# Metric tags -> which rows of model_accuracies.json they update
+METRIC_TAGS = {
+    'SVM': lambda model: 'SVM' in model,
+    'VQC': lambda model: 'VQC' in model and 'IBM' not in model,
+    'IBM': lambda model: 'IBM' in model,
+}
+
+# Files built from other artifacts; not inherited from the base bundle when a source changes
+DERIVED_FILES = {
+    'inference.bin': {'svm_model.pkl', 'feature_scaler.pkl', 'selected_features.json', 'vqc_weights.npy'},
+    # Training profile of the weights (see vqc_profiler.py)
+    'vqc_trace.json': {'vqc_weights.npy'},
+    'vqc_convergence.json': {'vqc_weights.npy'},
+    # Running statistics the selector and scaler were derived from (see feature_stats.py)
+    'feature_stats.json': {'feature_scaler.pkl', 'selected_features.json'},
+}
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Bundle:
+    """
+    Collects artifacts, metrics and config for one publish.
+
+    Training code adds to a bundle as it goes and publishes once at the end,
+    so readers switch from one complete, consistent set to the next.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.staging = tempfile.mkdtemp(dir=store.root, prefix='.staging-')
+        self.metrics = {}
+        self.config = {}
+        self.dropped = set()
+
+    def add_file(self, name, write):
+        """Adds an artifact produced by ``write(path)``."""
+        write(os.path.join(self.staging, name))
+        return self
+
+    def add_joblib(self, name, obj):
+        import joblib
+        return self.add_file(name, lambda path: joblib.dump(obj, path))
+
+    def add_npy(self, name, array):
+        return self.add_file(name, lambda path: np.save(path, np.asarray(array)))
+
+    def add_json(self, name, data):
+        return self.add_file(name, write_json(data))
+
+    def drop(self, *names):
+        """Leaves files or metric tags of the base bundle out of this one (e.g. weights fitted to an old scaler)."""
+        self.dropped.update(names)
+        return self
+
+    def add_metrics(self, tag, metrics):
+        """Records metrics (fractions) for a METRIC_TAGS entry."""
+        self.metrics[tag] = dict(metrics)
+        return self
+
+    def set_config(self, **config):
+        self.config.update(config)
+        return self
+
+    def publish(self):
+        try:
+            return self.store._publish(self)
+        finally:
+            shutil.rmtree(self.staging, ignore_errors=True)
+
+    def discard(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+class ArtifactStore:
+    def __init__(self, root=STORE_DIR, export_dir=MODELS_DIR):
+        self.root = root
+        self.export_dir = export_dir
+        self.bundles_dir = os.path.join(root, 'bundles')
+        self.pointer_path = os.path.join(root, 'current')
+        os.makedirs(self.bundles_dir, exist_ok=True)
+
+    def bundle(self):
+        """Starts a new bundle to add artifacts to."""
+        return Bundle(self)
+
+    # --- Readers (no locks) ---
+
+    def current_id(self):
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def bundle_path(self, bundle_id=None):
+        bundle_id = bundle_id or self.current_id()
+        if bundle_id is None:
+            raise FileNotFoundError(f"No model bundle has been published to {self.root}")
+        return os.path.join(self.bundles_dir, bundle_id)
+
+    def manifest(self, bundle_id=None):
+        with open(os.path.join(self.bundle_path(bundle_id), 'manifest.json')) as f:
+            return json.load(f)
+
+    def path(self, name, bundle_id=None):
+        """Path of an artifact in the given (default: current) bundle."""
+        path = os.path.join(self.bundle_path(bundle_id), name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{name} is not part of bundle {os.path.basename(os.path.dirname(path))}")
+        return path
+
+    def load_npy(self, name='vqc_weights.npy', bundle_id=None, mmap=True):
+        return np.load(self.path(name, bundle_id), mmap_mode='r' if mmap else None)
+
+    def load_joblib(self, name, bundle_id=None):
+        import joblib
+        return joblib.load(self.path(name, bundle_id))
+
+    def load_json(self, name, bundle_id=None):
+        with open(self.path(name, bundle_id)) as f:
+            return json.load(f)
+
+    # --- Publishing ---
+
+    def _publish(self, bundle):
+        with FileLock(os.path.join(self.root, '.lock')):
+            base_id = self.current_id()
+            base = self.manifest(base_id) if base_id else {'files': {}, 'metrics': {}, 'config': {}}
+
+            # Start from the current bundle; this publish overrides what it adds
+            added = set(os.listdir(bundle.staging))
+            for name in base['files']:
+                staged = os.path.join(bundle.staging, name)
+                if name in bundle.dropped and name not in added:
+                    continue
+                if name in DERIVED_FILES and name not in added and DERIVED_FILES[name] & added:
+                    print(f"  {name} dropped: its sources changed (re-export it)")
+                    continue
+                if not os.path.exists(staged):
+                    shutil.copyfile(os.path.join(self.bundle_path(base_id), name), staged)
+            metrics = {**base.get('metrics', {}), **bundle.metrics}
+            for tag in bundle.dropped & set(metrics):
+                del metrics[tag]
+            config = {**base.get('config', {}), **bundle.config}
+            write_json(metrics)(os.path.join(bundle.staging, 'metrics.json'))
+            write_json(config)(os.path.join(bundle.staging, 'config.json'))
+
+            files = {name: _sha256(os.path.join(bundle.staging, name))
+                     for name in sorted(os.listdir(bundle.staging)) if name != 'manifest.json'}
+            bundle_id = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:16]
+            manifest = {
+                'id': bundle_id,
+                'parent': base_id,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'files': files,
+                'metrics': metrics,
+                'config': config,
+            }
+            write_json(manifest)(os.path.join(bundle.staging, 'manifest.json'))
+
+            target = os.path.join(self.bundles_dir, bundle_id)
+            if not os.path.exists(target):
+                # Same content hashes to the same id, so an existing bundle is reused as is
+                os.rename(bundle.staging, target)
+            atomic_write(self.pointer_path, write_text(bundle_id))
+            with open(os.path.join(self.root, 'history.jsonl'), 'a') as f:
+                f.write(json.dumps({'id': bundle_id, 'parent': base_id, 'created': manifest['created']}) + '\n')
+
+            if self.export_dir:
+                self._export(bundle_id, manifest)
+        print(f"✓ Published model bundle {bundle_id} ({', '.join(n for n in files if n not in ('metrics.json', 'config.json'))})")
+        return bundle_id
+
+    def _export(self, bundle_id, manifest):
+        """Mirrors the current bundle into the flat models/ directory."""
+        for name in manifest['files']:
+            if name in ('metrics.json', 'config.json'):
+                continue
+            source = os.path.join(self.bundle_path(bundle_id), name)
+            atomic_write(os.path.join(self.export_dir, name), lambda path: shutil.copyfile(source, path))
+        for name in DERIVED_FILES:
+            # A dropped derived file must not outlive its sources in the flat copy either
+            if name not in manifest['files'] and os.path.exists(os.path.join(self.export_dir, name)):
+                os.remove(os.path.join(self.export_dir, name))
+
+        accuracies_path = os.path.join(self.export_dir, 'model_accuracies.json')
+        try:
+            with open(accuracies_path) as f:
+                accuracies = json.load(f)
+        except (FileNotFoundError, ValueError):
+            accuracies = []
+        for tag, metrics in manifest['metrics'].items():
+            matches = [entry for entry in accuracies if METRIC_TAGS[tag](entry['model'])]
+            if not matches:
+                matches = [{'model': metrics.get('model', tag)}]
+                accuracies.append(matches[0])
+            for entry in matches:
+                entry.update(accuracy_fields(metrics))
+        atomic_write(accuracies_path, write_json(accuracies))
+
+
+def accuracy_fields(metrics):
+    """The model_accuracies.json fields (percentages) for metrics recorded as fractions."""
+    return {
+        'accuracy': round(metrics['accuracy'] * 100, 2),
+        'precision': round(metrics['precision'] * 100, 2),
+        'recall': round(metrics['recall'] * 100, 2),
+        'f1Score': round(metrics['f1'] * 100, 2),
+    }
+
+
+_default_store = None
+
+
+def default_store():
+    """The store under backend/models/, created on first use."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ArtifactStore()
+    return _default_store
+
+
+_company_stores = {}
+
+
+def company_store(company):
+    """The store holding one company's models, under models/store/companies/<company>/."""
+    store = _company_stores.get(company)
+    if store is None:
+        store = _company_stores[company] = ArtifactStore(os.path.join(COMPANY_STORES_DIR, company), export_dir=None)
+    return store
+
+
+def publish_or_stage(bundle, fill):
+    """
+    Runs ``fill(bundle)`` on the given bundle, or on a new one that is
+    published immediately when ``bundle`` is None (standalone calls).
+    """
+    if bundle is not None:
+        fill(bundle)
+        return None
+    own = default_store().bundle()
+    try:
+        fill(own)
+    except BaseException:
+        own.discard()
+        raise
+    return own.publish()
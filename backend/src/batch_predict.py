@@ -0,0 +1,318 @@
+"""
+Batch scoring of whole CSV/Parquet histories with the SVM and the VQC.
+
+Inputs come in two kinds, told apart by their header:
+
+- feature files, with the engineered feature columns (REQUIRED_FEATURES),
+  are streamed in chunks and scored with the main bundle
+- raw OHLCV price files (the company CSVs, dataset.csv) are loaded whole
+  with ``load_price_history`` and run through ``engineer_features``, so
+  every row has its full look-back. A company file is scored with that
+  company's own bundle (see companies.py) when it has one, and with the
+  main bundle otherwise
+
+yfinance's three-row header layout (as in dataset.csv) is detected and its
+metadata rows are skipped. Chunks are scored in a process pool; each worker
+loads the models of a bundle once, the first time it sees it. Predictions
+are appended to the output as each chunk completes, in input order, with
+the bundle that scored them, and progress is checkpointed next to the
+output so an interrupted run can continue with ``--resume``.
+
+Output formats:
+- csv:     one file (default backend/data/batch/predictions.csv), appended per chunk
+- parquet: a directory with one part file per chunk
+
+The default output sits in its own directory: backend/data/predictions.csv is
+the file /api/predictions serves, and backend/data/*.csv are read as company
+price files.
+
+Usage:
+    python backend/src/batch_predict.py backend/data/*.csv
+    python backend/src/batch_predict.py backend/data/*.csv --models svm --workers 8 --resume
+    python backend/src/batch_predict.py history.parquet --format parquet --output backend/data/batch/predictions.parquet
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import telemetry
+from pre_processing import REQUIRED_FEATURES, engineer_features, load_price_history
+
+_worker = {'models': (), 'bundles': {}}
+
+
+def _init_worker(models):
+    telemetry.start_snapshots()
+    _worker['models'] = models
+
+
+def _store(company):
+    from artifact_store import company_store, default_store
+    return company_store(company) if company else default_store()
+
+
+def _bundle_models(company, bundle_id):
+    """Preprocessor and models of one bundle (a company's, or the main one), loaded once per worker."""
+    loaded = _worker['bundles'].get((company, bundle_id))
+    if loaded is None:
+        import predict
+        store = _store(company)
+        files = store.manifest(bundle_id)['files']
+        loaded = {'preprocessor': predict.load_preprocessor(bundle_id, store=store)}
+        if 'svm' in _worker['models'] and 'svm_model.pkl' in files:
+            loaded['svm'] = predict.load_svm_model(bundle_id=bundle_id, store=store)
+        if 'vqc' in _worker['models'] and 'vqc_weights.npy' in files:
+            num_features = len(loaded['preprocessor'][0])
+            loaded['vqc'] = predict.load_vqc_model(num_features=num_features, bundle_id=bundle_id, store=store)
+        _worker['bundles'][(company, bundle_id)] = loaded
+    return loaded
+
+
+def _score_chunk(chunk, id_column, source, company, bundle_id):
+    """Scores one chunk with a bundle; returns (predictions frame, {model: seconds})."""
+    import predict
+    loaded = _bundle_models(company, bundle_id)
+    X = predict.preprocess_new_data(chunk, preprocessor=loaded['preprocessor'])
+    out = pd.DataFrame({'source': source, 'bundle': bundle_id}, index=chunk.index)
+    if id_column and id_column in chunk.columns:
+        out.insert(0, id_column, chunk[id_column].values)
+    timings = {}
+    for model in ('svm', 'vqc'):
+        if model not in _worker['models']:
+            continue
+        if model not in loaded:
+            # e.g. a company trained with --models svm; keeps the output columns the same for every input
+            out[f'{model}_prediction'] = pd.NA
+            continue
+        start = time.perf_counter()
+        out[f'{model}_prediction'] = predict.run_inference(model, loaded[model], X)
+        timings[model] = time.perf_counter() - start
+    # Pool workers exit without running atexit hooks
+    telemetry.write_snapshot()
+    return out, timings
+
+
+def _columns(path):
+    """Header columns of a CSV or Parquet file, and the rows to skip for yfinance's header layout."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names), None
+    head = pd.read_csv(path, nrows=2)
+    # yfinance layout: "Price" header, then "Ticker" and "Date" metadata rows
+    yfinance = head.columns[0] != 'Date' and head.iloc[:, 0].astype(str).tolist() == ['Ticker', 'Date']
+    return list(head.columns), [1, 2] if yfinance else None
+
+
+def input_kind(path):
+    """'features' or 'prices' (see the module docstring), plus the CSV rows to skip."""
+    columns, skiprows = _columns(path)
+    if all(feature in columns for feature in REQUIRED_FEATURES):
+        return 'features', skiprows
+    if 'Close' in columns:
+        return 'prices', skiprows
+    raise ValueError(f"{path} has neither the feature columns ({', '.join(REQUIRED_FEATURES)}) nor a Close column")
+
+
+def price_features(path):
+    """Feature frame of a raw price file, computed over its whole history (Date as a column)."""
+    if path.endswith('.parquet'):
+        prices = pd.read_parquet(path)
+        if 'Date' in prices.columns:
+            prices = prices.set_index('Date')
+        prices.index = pd.to_datetime(prices.index)
+    else:
+        prices = load_price_history(path)
+    return engineer_features(prices.sort_index()).reset_index()
+
+
+def iter_chunks(path, chunksize, skiprows=None):
+    """Yields DataFrame chunks of a CSV or Parquet file."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=skiprows)
+
+
+class _Checkpoint:
+    """Rows done per input, plus the output size they correspond to."""
+
+    def __init__(self, output, resume):
+        self.output = output
+        self.path = output.rstrip('/\\') + '.progress.json'
+        self.state = {'bundles': {}, 'inputs': {}, 'output_bytes': 0, 'parts': 0}
+        if resume and os.path.exists(self.path):
+            with open(self.path) as f:
+                self.state = json.load(f)
+
+    def rows_done(self, source):
+        return self.state['inputs'].get(source, 0)
+
+    def check_bundle(self, source, bundle_id):
+        """Records the bundle scoring ``source``; a resumed input must keep the bundle it started with."""
+        previous = self.state['bundles'].get(source)
+        if self.rows_done(source) and previous != bundle_id:
+            raise SystemExit(f"Cannot resume: {source} in {self.output} was scored with bundle {previous}, "
+                             f"current bundle is {bundle_id}")
+        self.state['bundles'][source] = bundle_id
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class _Writer:
+    def __init__(self, output, fmt, checkpoint, resume):
+        self.output = output
+        self.fmt = fmt
+        self.checkpoint = checkpoint
+        if fmt == 'csv':
+            if resume and os.path.exists(output):
+                # Drop anything written after the last checkpoint
+                with open(output, 'r+b') as f:
+                    f.truncate(checkpoint.state['output_bytes'])
+            elif os.path.exists(output):
+                os.remove(output)
+        else:
+            os.makedirs(output, exist_ok=True)
+            if not resume:
+                for part in glob.glob(os.path.join(output, 'part-*.parquet')):
+                    os.remove(part)
+
+    def write(self, frame):
+        if self.fmt == 'csv':
+            header = self.checkpoint.state['output_bytes'] == 0
+            with open(self.output, 'a', newline='') as f:
+                frame.to_csv(f, header=header, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            self.checkpoint.state['output_bytes'] = os.path.getsize(self.output)
+        else:
+            part = self.checkpoint.state['parts']
+            tmp = os.path.join(self.output, f'.part-{part:05d}.tmp')
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, os.path.join(self.output, f'part-{part:05d}.parquet'))
+            self.checkpoint.state['parts'] = part + 1
+
+
+def _input_bundle(source, kind, main_id, pinned):
+    """(company or None, bundle id) that scores an input: a price file's company bundle unless --bundle is given."""
+    if kind == 'prices' and not pinned:
+        from companies import current_bundle_id
+        company_id = current_bundle_id(source)
+        if company_id is not None:
+            return source, company_id
+    if main_id is None:
+        raise SystemExit(f"No model bundle published yet for {source} - run train.py first")
+    return None, main_id
+
+
+def _chunks(path, kind, chunksize, skiprows):
+    if kind == 'features':
+        yield from iter_chunks(path, chunksize, skiprows)
+        return
+    features = price_features(path)
+    for offset in range(0, len(features), chunksize):
+        yield features.iloc[offset:offset + chunksize]
+
+
+def run(inputs, output, models=('svm', 'vqc'), chunksize=5000, workers=None, fmt='csv',
+        resume=False, id_column='Date', skiprows=None, bundle_id=None):
+    """Scores every input file; returns {model: rows/sec} measured per worker-second of model time."""
+    from artifact_store import default_store
+    pinned = bundle_id is not None
+    main_id = bundle_id or default_store().current_id()
+    print(f"Scoring with {'bundle ' + main_id if main_id else 'company bundles'} ({', '.join(models)})")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    checkpoint = _Checkpoint(output, resume)
+    writer = _Writer(output, fmt, checkpoint, resume)
+    model_seconds = {model: 0.0 for model in models}
+    rows_scored = 0
+    start = time.perf_counter()
+    max_in_flight = 2 * (workers or os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tuple(models),)) as pool:
+        for path in inputs:
+            source = os.path.splitext(os.path.basename(path))[0]
+            kind, header_rows = input_kind(path)
+            company, input_bundle = _input_bundle(source, kind, main_id, pinned)
+            checkpoint.check_bundle(source, input_bundle)
+            print(f"  {source}: {kind}, bundle {input_bundle}{' (' + company + ')' if company else ''}")
+            skip = checkpoint.rows_done(source)
+            if skip:
+                print(f"  {source}: resuming after {skip} rows")
+            seen = 0
+            pending = []
+
+            def drain(limit):
+                nonlocal rows_scored
+                while len(pending) > limit:
+                    future, n_rows = pending.pop(0)
+                    frame, timings = future.result()
+                    writer.write(frame)
+                    checkpoint.state['inputs'][source] = checkpoint.state['inputs'].get(source, 0) + n_rows
+                    checkpoint.save()
+                    rows_scored += n_rows
+                    for model, seconds in timings.items():
+                        model_seconds[model] += seconds
+
+            for chunk in _chunks(path, kind, chunksize, header_rows if skiprows is None else skiprows):
+                chunk.index = range(seen, seen + len(chunk))
+                seen += len(chunk)
+                if seen <= skip:
+                    continue
+                if chunk.index[0] < skip:
+                    chunk = chunk.loc[skip:]
+                pending.append((pool.submit(_score_chunk, chunk, id_column, source, company, input_bundle), len(chunk)))
+                # Bounded in-flight chunks keep memory flat on large inputs
+                drain(max_in_flight)
+            drain(0)
+            print(f"  ✓ {source}: {checkpoint.rows_done(source)} rows")
+
+    elapsed = time.perf_counter() - start
+    rates = {model: rows_scored / seconds for model, seconds in model_seconds.items() if seconds > 0}
+    print(f"\n✓ Scored {rows_scored} rows in {elapsed:.1f}s ({rows_scored / elapsed if elapsed else 0:.0f} rows/sec overall)")
+    for model, rate in rates.items():
+        print(f"  {model.upper()}: {rate:,.0f} rows/sec per worker")
+    print(f"✓ Predictions written to {output}")
+    return rates
+
+
+def main():
+    telemetry.configure_logging()
+    telemetry.start_snapshots()
+    parser = argparse.ArgumentParser(description="Score CSV/Parquet files with the SVM and VQC models")
+    parser.add_argument('inputs', nargs='+', help='CSV or Parquet files (globs allowed)')
+    parser.add_argument('--output', default=None, help='default: backend/data/batch/predictions.csv (or .parquet)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--models', default='svm,vqc', help='comma-separated subset of svm,vqc')
+    parser.add_argument('--chunksize', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--resume', action='store_true', help='continue an interrupted run')
+    parser.add_argument('--id-column', default='Date', help='input column copied to the output')
+    parser.add_argument('--skiprows', type=int, nargs='*', default=None,
+                        help="CSV rows to skip (default: yfinance's metadata rows when present)")
+    parser.add_argument('--bundle', default=None,
+                        help="main model bundle id for every input (default: current, and each company's own bundle for its price file)")
+    args = parser.parse_args()
+
+    inputs = sorted({path for pattern in args.inputs for path in (glob.glob(pattern) or [pattern])})
+    # Never score our own output
+    output = args.output or f"backend/data/batch/predictions.{args.format}"
+    inputs = [path for path in inputs if os.path.abspath(path) != os.path.abspath(output)]
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+    run(inputs, output, models=models, chunksize=args.chunksize, workers=args.workers, fmt=args.format,
+        resume=args.resume, id_column=args.id_column, skiprows=args.skiprows, bundle_id=args.bundle)
+
+
+if __name__ == "__main__":
+    main()
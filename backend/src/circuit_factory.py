@@ -0,0 +1,112 @@
+"""
+Shared, memoized construction of the VQC circuits.
+
+Every caller (training, inference, the IBM path and the circuit designer)
+asks this module for its ZZFeatureMap / RealAmplitudes instead of building
+its own. Circuits are built once per (num_qubits, reps, entanglement) and
+cached, optionally decomposed or transpiled for a specific backend, and
+their metrics (depth, gate counts, parameter counts) are computed once.
+
+Cached circuits are shared objects: compose or copy them, never mutate them
+in place.
+"""
+import threading
+from functools import lru_cache
+
+from lazy_imports import lazy_import
+
+# Imported on first circuit build, not when this module is imported
+qiskit = lazy_import('qiskit')
+library = lazy_import('qiskit.circuit.library')
+primitives = lazy_import('qiskit.primitives')
+
+# Defaults used by train_vqc / load_vqc_model
+FEATURE_MAP_REPS = 2
+ANSATZ_REPS = 3
+ENTANGLEMENT = 'linear'
+
+
+def sampler_class():
+    """StatevectorSampler on newer qiskit releases, the reference Sampler otherwise."""
+    return getattr(primitives, 'StatevectorSampler', None) or primitives.Sampler
+
+
+def _built(circuit):
+    # Blueprint circuits build lazily; force it so the cached object is complete
+    _ = circuit.data
+    return circuit
+
+
+@lru_cache(maxsize=None)
+def _feature_map(num_qubits, reps, entanglement, decompose):
+    circuit = _built(library.ZZFeatureMap(feature_dimension=num_qubits, reps=reps, entanglement=entanglement))
+    return circuit.decompose() if decompose else circuit
+
+
+@lru_cache(maxsize=None)
+def _ansatz(num_qubits, reps, entanglement, decompose):
+    circuit = _built(library.RealAmplitudes(num_qubits=num_qubits, reps=reps, entanglement=entanglement,
+                                            skip_final_rotation_layer=False))
+    return circuit.decompose() if decompose else circuit
+
+
+def feature_map(num_qubits, reps=FEATURE_MAP_REPS, entanglement=ENTANGLEMENT, decompose=False):
+    """Returns the cached ZZFeatureMap for this configuration."""
+    return _feature_map(num_qubits, reps, entanglement, decompose)
+
+
+def ansatz(num_qubits, reps=ANSATZ_REPS, entanglement=ENTANGLEMENT, decompose=False):
+    """Returns the cached RealAmplitudes ansatz for this configuration."""
+    return _ansatz(num_qubits, reps, entanglement, decompose)
+
+
+@lru_cache(maxsize=None)
+def complete_circuit(num_qubits, feature_map_reps=FEATURE_MAP_REPS, ansatz_reps=ANSATZ_REPS,
+                     entanglement=ENTANGLEMENT, measure=True):
+    """Feature map followed by the ansatz (and measurements), built once per configuration."""
+    qreg = qiskit.QuantumRegister(num_qubits, 'q')
+    if measure:
+        creg = qiskit.ClassicalRegister(num_qubits, 'c')
+        circuit = qiskit.QuantumCircuit(qreg, creg)
+    else:
+        circuit = qiskit.QuantumCircuit(qreg)
+    circuit.compose(feature_map(num_qubits, feature_map_reps, entanglement), qreg, inplace=True)
+    circuit.compose(ansatz(num_qubits, ansatz_reps, entanglement), qreg, inplace=True)
+    if measure:
+        circuit.measure(qreg, creg)
+    return circuit
+
+
+_transpiled = {}
+_transpiled_lock = threading.Lock()
+
+
+def transpiled(kind, num_qubits, reps, backend, entanglement=ENTANGLEMENT, optimization_level=0):
+    """
+    Returns the feature map (kind='feature_map') or ansatz (kind='ansatz')
+    transpiled for ``backend``, cached per backend name and optimization level.
+    """
+    # BackendV1 (e.g. the Aer emulator in ibm_emulation.py) exposes name() as a method
+    name = backend.name() if callable(backend.name) else backend.name
+    key = (kind, num_qubits, reps, entanglement, name, optimization_level)
+    circuit = _transpiled.get(key)
+    if circuit is None:
+        from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+        source = feature_map if kind == 'feature_map' else ansatz
+        pm = generate_preset_pass_manager(backend=backend, optimization_level=optimization_level)
+        circuit = pm.run(source(num_qubits, reps, entanglement))
+        with _transpiled_lock:
+            _transpiled[key] = circuit
+    return circuit
+
+
+def summarize(circuit):
+    """Depth, gate counts and parameter counts of a circuit (compute once, then reuse)."""
+    return {
+        'qubits': circuit.num_qubits,
+        'classical_bits': circuit.num_clbits,
+        'depth': circuit.depth(),
+        'gates': len(circuit.data),
+        'gate_counts': dict(circuit.count_ops()),
+        'parameters': circuit.num_parameters,
+    }
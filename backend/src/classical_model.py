@@ -1,53 +1,49 @@
-import time
-import joblib
-from sklearn.svm import SVC
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, precision_score, recall_score, f1_score
+from lazy_imports import lazy_import
+from artifact_store import publish_or_stage
+from telemetry import training_stage
+
+# sklearn is imported on first use (see lazy_imports.py)
+svm = lazy_import('sklearn.svm')
+metrics = lazy_import('sklearn.metrics')
 
 def train_svm(X_train, y_train, random_seed=42):
     """Trains a classical SVM model."""
     print("\nTraining Classical SVM...")
     print("-" * 40)
     
-    svm_poly = SVC(kernel='poly', degree=3, random_state=random_seed, probability=True)
+    svm_poly = svm.SVC(kernel='poly', degree=3, random_state=random_seed, probability=True)
     
-    start_time = time.time()
-    svm_poly.fit(X_train, y_train)
-    training_time = time.time() - start_time
+    with training_stage('SVM', 'fit') as stage:
+        svm_poly.fit(X_train, y_train)
+    training_time = stage.elapsed
     
     print(f"✓ SVM (Poly) trained in {training_time:.4f} seconds")
     return svm_poly, training_time
 
-def evaluate_svm(model, X_test, y_test):
+def evaluate_svm(model, X_test, y_test, bundle=None):
     """Evaluates the trained SVM model."""
-    y_pred = model.predict(X_test)
+    with training_stage('SVM', 'evaluate'):
+        y_pred = model.predict(X_test)
     
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
+    accuracy = metrics.accuracy_score(y_test, y_pred)
+    precision = metrics.precision_score(y_test, y_pred, average='weighted', zero_division=0)
+    recall = metrics.recall_score(y_test, y_pred, average='weighted', zero_division=0)
+    f1 = metrics.f1_score(y_test, y_pred, average='weighted', zero_division=0)
     
     print(f"  Accuracy:  {accuracy:.6f}\n  Precision: {precision:.6f}\n  Recall:    {recall:.6f}\n  F1-Score:  {f1:.6f}")
-    print("\nSVM (Poly) Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
-    print("\nSVM (Poly) Classification Report:\n", classification_report(y_test, y_pred))
+    print("\nSVM (Poly) Confusion Matrix:\n", metrics.confusion_matrix(y_test, y_pred))
+    print("\nSVM (Poly) Classification Report:\n", metrics.classification_report(y_test, y_pred))
 
-    # Save SVM metrics to model_accuracies.json
-    import json
+    # Record SVM metrics in the model bundle (exported to model_accuracies.json on publish)
+    svm_metrics = {'model': 'SVM (Poly)', 'accuracy': accuracy, 'precision': precision, 'recall': recall, 'f1': f1}
     try:
-        with open('backend/models/model_accuracies.json', 'r') as f:
-            data = json.load(f)
-        for entry in data:
-            if 'SVM' in entry['model']:
-                entry['accuracy'] = round(accuracy * 100, 2)
-                entry['precision'] = round(precision * 100, 2)
-                entry['recall'] = round(recall * 100, 2)
-                entry['f1Score'] = round(f1 * 100, 2)
-        with open('backend/models/model_accuracies.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        print('✓ SVM metrics updated in model_accuracies.json')
+        publish_or_stage(bundle, lambda b: b.add_metrics('SVM', svm_metrics))
+        print('✓ SVM metrics recorded')
     except Exception as e:
         print(f'Error updating SVM metrics: {e}')
+    return svm_metrics
 
-def save_model(model, file_path='backend/models/svm_model.pkl'):
-    """Saves the trained model to a file."""
-    joblib.dump(model, file_path)
-    print(f"✓ Model saved to {file_path}")
\ No newline at end of file
+def save_model(model, bundle=None):
+    """Adds the trained model to a model bundle (published immediately if none is given)."""
+    publish_or_stage(bundle, lambda b: b.add_joblib('svm_model.pkl', model))
+    print("✓ SVM model saved as svm_model.pkl")
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""
+Per-company training and inference over every backend/data/<company>.csv.
+
+Each company CSV (daily OHLCV) gets the same features as dataset.csv
+(``engineer_features``) and its own SVM/VQC models, trained in a process
+pool, one company per task. Models are published to the company's own
+artifact store (models/store/companies/<company>/, see artifact_store.py),
+and a summary of every company's bundle and metrics is kept in
+models/company_models.json for the API.
+
+Usage:
+    python backend/src/companies.py list
+    python backend/src/companies.py train --workers 4
+    python backend/src/companies.py train --models svm --companies Tesco HSBC_Holdings
+    python backend/src/companies.py predict Tesco --last 5
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import telemetry
+from artifact_store import COMPANY_STORES_DIR, MODELS_DIR, company_store
+from file_io import atomic_write, write_json
+from pre_processing import engineer_features, load_price_history, preprocess_for_ml
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+SUMMARY_FILE = os.path.join(MODELS_DIR, 'company_models.json')
+
+# CSVs in the data folder that are not company price histories
+NON_COMPANY_FILES = {'dataset', 'predictions'}
+
+# Fewer labelled rows than this (after the SMA-50 warm-up) is not worth a model
+MIN_TRAINING_ROWS = 100
+
+
+def discover_companies(data_dir=DATA_DIR):
+    """Returns {company: csv path} for every company price file, sorted by name."""
+    companies = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name not in NON_COMPANY_FILES and not name.startswith('.'):
+            companies[name] = path
+    return companies
+
+
+def display_name(company):
+    return company.replace('_', ' ')
+
+
+def current_bundle_id(company):
+    """The company's live model bundle, or None if it was never trained (without creating its store)."""
+    if not os.path.isdir(os.path.join(COMPANY_STORES_DIR, company)):
+        return None
+    return company_store(company).current_id()
+
+
+def load_summary(path=SUMMARY_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_summary(summary, path=SUMMARY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, write_json(summary))
+
+
+def company_features(path):
+    """Loads a company CSV and computes its feature frame (target NaN on the last row)."""
+    return engineer_features(load_price_history(path))
+
+
+def train_company(company, path, models=('svm', 'vqc')):
+    """
+    Trains and publishes one company's models.
+
+    Runs in a pool worker; the training output goes to train.log in the
+    company's store so parallel runs do not interleave on the console.
+    """
+    from classical_model import train_svm, evaluate_svm, save_model as save_svm
+    from quantum_model import prepare_data_for_vqc, train_vqc, evaluate_vqc, save_model_weights as save_vqc_weights
+    from inference_bundle import FILE_NAME as INFERENCE_BUNDLE, export_inference_bundle
+
+    store = company_store(company)
+    start = time.time()
+    with open(os.path.join(store.root, 'train.log'), 'w') as log, contextlib.redirect_stdout(log):
+        features = company_features(path)
+        labelled = features.dropna(subset=['target'])
+        if len(labelled) < MIN_TRAINING_ROWS:
+            raise ValueError(f"{company}: only {len(labelled)} labelled rows, need {MIN_TRAINING_ROWS}")
+        X_train, X_test, y_train, y_test = preprocess_for_ml(labelled.copy())
+
+        bundle = store.bundle()
+        try:
+            X_train_small, y_train_small, X_test_small, y_test_small, selected_features = prepare_data_for_vqc(
+                X_train, y_train, X_test, y_test, bundle=bundle)
+            metrics = {}
+            if 'svm' in models:
+                svm_model, _ = train_svm(X_train_small, y_train_small)
+                metrics['SVM'] = evaluate_svm(svm_model, X_test_small, y_test_small, bundle=bundle)
+                save_svm(svm_model, bundle=bundle)
+            if 'vqc' in models:
+                vqc_model, _ = train_vqc(X_train_small, y_train_small, num_features=X_train_small.shape[1])
+                metrics['VQC'] = evaluate_vqc(vqc_model, X_test_small, y_test_small, selected_features, bundle=bundle)
+                save_vqc_weights(vqc_model, bundle=bundle)
+            else:
+                # Weights fitted against the previous scaler would not match the new one
+                bundle.drop('vqc_weights.npy', 'VQC')
+            bundle.set_config(company=company, data_file=os.path.basename(path), data_rows=len(features),
+                              data_end=str(features.index[-1].date()))
+            if 'svm' not in models:
+                bundle.drop('svm_model.pkl', 'SVM', INFERENCE_BUNDLE)
+            else:
+                bundle.add_file(INFERENCE_BUNDLE, lambda p: export_inference_bundle(bundle.staging, p))
+            bundle_id = bundle.publish()
+        except BaseException:
+            bundle.discard()
+            raise
+
+    return {
+        'bundle_id': bundle_id,
+        'rows': len(features),
+        'data_end': str(features.index[-1].date()),
+        'selected_features': selected_features,
+        'metrics': {tag: {key: round(value * 100, 2) if isinstance(value, float) else value
+                          for key, value in m.items()} for tag, m in metrics.items()},
+        'trained': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'training_seconds': round(time.time() - start, 2),
+    }
+
+
+def _train_task(company, path, models):
+    try:
+        return company, train_company(company, path, models), None
+    except Exception:
+        return company, None, traceback.format_exc()
+    finally:
+        # Pool workers exit without running atexit hooks
+        telemetry.write_snapshot()
+
+
+def train_all(companies=None, models=('svm', 'vqc'), workers=None, data_dir=DATA_DIR):
+    """Trains every (or the given) company in a process pool; returns the updated summary."""
+    available = discover_companies(data_dir)
+    selected = {name: available[name] for name in (companies or available) if name in available}
+    missing = sorted(set(companies or []) - set(available))
+    if missing:
+        print(f"Warning: no data file for {', '.join(missing)}")
+    print(f"Training {', '.join(models)} for {len(selected)} companies")
+
+    summary = load_summary()
+    failures = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_train_task, name, path, tuple(models)) for name, path in selected.items()]
+        for future in as_completed(futures):
+            company, result, error = future.result()
+            if error:
+                failures[company] = error
+                print(f"  ✗ {company}: {error.strip().splitlines()[-1]}")
+                continue
+            summary[company] = result
+            # Written after every company so an interrupted run keeps what finished
+            _write_summary(summary)
+            scores = ', '.join(f"{tag} {m['accuracy']:.1f}%" for tag, m in result['metrics'].items())
+            print(f"  ✓ {company}: bundle {result['bundle_id']} ({scores}) in {result['training_seconds']:.1f}s")
+    print(f"✓ Trained {len(selected) - len(failures)}/{len(selected)} companies; summary in {SUMMARY_FILE}")
+
+    # New models mean new forecasts for the API
+    from forecasts import materialize
+    materialize([name for name in selected if name not in failures], workers=workers)
+    return summary
+
+
+def predict_company(company, prices=None, bundle_id=None, models=('svm', 'vqc'), last=None):
+    """
+    Scores a company's feature rows with its own models.
+
+    Returns a Date-indexed frame with Close and one <model>_prediction column
+    per model; the last row is the prediction for the next trading day.
+    """
+    import predict
+
+    store = company_store(company)
+    bundle_id = bundle_id or store.current_id()
+    if bundle_id is None:
+        raise FileNotFoundError(f"No models trained for {company}")
+    if prices is None:
+        path = discover_companies().get(company)
+        if path is None:
+            raise FileNotFoundError(f"Company data file not found: {company}.csv")
+        prices = load_price_history(path)
+    features = engineer_features(prices)
+    if last:
+        features = features.tail(last)
+
+    preprocessor = predict.load_preprocessor(bundle_id, store=store)
+    X = predict.preprocess_new_data(features, preprocessor=preprocessor)
+    files = store.manifest(bundle_id)['files']
+    out = pd.DataFrame({'Close': features['Close']}, index=features.index)
+    if 'svm' in models and 'svm_model.pkl' in files:
+        out['svm_prediction'] = predict.run_inference('svm', predict.load_svm_model(bundle_id=bundle_id, store=store), X)
+    if 'vqc' in models and 'vqc_weights.npy' in files:
+        vqc = predict.load_vqc_model(num_features=X.shape[1], bundle_id=bundle_id, store=store)
+        out['vqc_prediction'] = predict.run_inference('vqc', vqc, X)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-company model training and inference")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='list company data files and their trained models')
+    train = commands.add_parser('train', help='train models for every (or the given) company')
+    train.add_argument('--companies', nargs='*', default=None)
+    train.add_argument('--models', default='svm,vqc', help='comma-separated subset of svm,vqc')
+    train.add_argument('--workers', type=int, default=None)
+    score = commands.add_parser('predict', help="score a company's history with its models")
+    score.add_argument('company')
+    score.add_argument('--models', default='svm,vqc')
+    score.add_argument('--last', type=int, default=10, help='rows to score (0 for all)')
+    args = parser.parse_args()
+    telemetry.configure_logging()
+    telemetry.start_snapshots()
+
+    if args.command == 'list':
+        summary = load_summary()
+        for name, path in discover_companies().items():
+            entry = summary.get(name)
+            model = f"bundle {entry['bundle_id']} (data to {entry['data_end']})" if entry else 'not trained'
+            print(f"{name:<28}{model}")
+    elif args.command == 'train':
+        train_all(args.companies, models=[m.strip() for m in args.models.split(',') if m.strip()],
+                  workers=args.workers)
+    else:
+        models = [m.strip() for m in args.models.split(',') if m.strip()]
+        print(predict_company(args.company, models=models, last=args.last or None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Running sufficient statistics of the training features.
+
+The VQC's preprocessing is a SelectKBest(f_classif) selector and a
+MinMaxScaler. Both are determined by a few statistics that can be updated
+batch by batch instead of being refitted on the whole training split:
+
+    MinMaxScaler   per-feature count, min and max
+    f_classif      per-class count, mean and sum of squared deviations (M2)
+
+Class means and M2 are merged with Chan's parallel form of Welford's update
+(as in utils/streaming_stats.py), so the F-statistics match ``f_classif``
+on the concatenated data without the cancellation of sum-of-squares
+formulas. That matters for large-valued features such as ``obv``.
+
+The statistics are published with each bundle as feature_stats.json (see
+quantum_model.prepare_data_for_vqc) and updated by incremental.py.
+"""
+import numpy as np
+import pandas as pd
+
+from lazy_imports import lazy_import
+
+preprocessing = lazy_import('sklearn.preprocessing')
+
+FILE_NAME = 'feature_stats.json'
+
+
+def _label(value):
+    # 0, 0.0 and np.float64(0) are the same class
+    return format(float(value), 'g')
+
+
+class FeatureStats:
+    """Count/min/max per feature and count/mean/M2 per class and feature, mergeable batch by batch."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.count = 0
+        self.min = np.full(len(self.columns), np.inf)
+        self.max = np.full(len(self.columns), -np.inf)
+        # label -> [count, mean, m2]
+        self.classes = {}
+        # Index label of the last row absorbed (the training split grows at the end)
+        self.last_index = None
+
+    def _values(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.columns]
+        return np.asarray(X, dtype=float)
+
+    def update(self, X, y):
+        """Absorbs a batch of rows (``X``: frame or array over ``columns``, ``y``: class labels)."""
+        values = self._values(X)
+        labels = np.asarray(y)
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+        for label in np.unique(labels):
+            rows = values[labels == label]
+            mean = rows.mean(axis=0)
+            self._merge_class(_label(label), len(rows), mean, ((rows - mean) ** 2).sum(axis=0))
+        if isinstance(X, (pd.DataFrame, pd.Series)):
+            self.last_index = str(X.index[-1])
+        return self
+
+    def _merge_class(self, label, n_b, mean_b, m2_b):
+        n_a, mean_a, m2_a = self.classes.get(label, (0, np.zeros(len(self.columns)), np.zeros(len(self.columns))))
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        self.classes[label] = [n, mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n]
+
+    # --- what the preprocessing needs ---
+
+    def mean(self):
+        return sum(n * mean for n, mean, _ in self.classes.values()) / self.count
+
+    def variance(self):
+        """Sample variance (ddof=1) of every feature over all classes."""
+        grand = self.mean()
+        m2 = sum(m2 + n * (mean - grand) ** 2 for n, mean, m2 in self.classes.values())
+        return m2 / max(self.count - 1, 1)
+
+    def f_scores(self):
+        """ANOVA F-value of every feature, as ``sklearn.feature_selection.f_classif`` computes it."""
+        k = len(self.classes)
+        grand = self.mean()
+        between = sum(n * (mean - grand) ** 2 for n, mean, _ in self.classes.values())
+        within = sum(m2 for _, _, m2 in self.classes.values())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (between / max(k - 1, 1)) / (within / max(self.count - k, 1))
+
+    def select(self, k):
+        """Top ``k`` features by F-value, in column order (SelectKBest's tie-breaking)."""
+        scores = np.nan_to_num(self.f_scores(), nan=np.finfo(float).min)
+        mask = np.zeros(len(self.columns), dtype=bool)
+        mask[np.argsort(scores, kind='mergesort')[-k:]] = True
+        return [column for column, keep in zip(self.columns, mask) if keep]
+
+    def scaler(self, features, feature_range=(0, np.pi)):
+        """MinMaxScaler fitted to the running min/max of ``features``."""
+        idx = [self.columns.index(feature) for feature in features]
+        scaler = preprocessing.MinMaxScaler(feature_range=feature_range)
+        scaler.partial_fit(pd.DataFrame([self.min[idx], self.max[idx]], columns=features))
+        scaler.n_samples_seen_ = self.count
+        return scaler
+
+    # --- storage ---
+
+    def to_dict(self):
+        return {
+            'columns': self.columns,
+            'count': self.count,
+            'min': self.min.tolist(),
+            'max': self.max.tolist(),
+            'classes': {label: {'count': n, 'mean': mean.tolist(), 'm2': m2.tolist()}
+                        for label, (n, mean, m2) in self.classes.items()},
+            'last_index': self.last_index,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['columns'])
+        stats.count = data['count']
+        stats.min = np.array(data['min'], dtype=float)
+        stats.max = np.array(data['max'], dtype=float)
+        stats.classes = {label: [entry['count'], np.array(entry['mean']), np.array(entry['m2'])]
+                         for label, entry in data['classes'].items()}
+        stats.last_index = data.get('last_index')
+        return stats
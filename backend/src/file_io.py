@@ -0,0 +1,76 @@
+"""
+Atomic file writes and a cross-process file lock.
+
+Shared by the artifact store, the market-data store (manifests and parquet
+parts), the company summary, the forecast files and index, and the IBM
+emulation's calibration snapshots. Lives in src/ rather than utils/
+because the src scripts (train.py, market_data.py, ...) run with only src/
+on sys.path.
+"""
+import json
+import os
+import tempfile
+import time
+
+# A lock older than this is assumed to belong to a crashed holder
+STALE_LOCK_SECONDS = 120
+
+
+def atomic_write(path, write):
+    """Calls ``write(tmp_path)`` and renames the result over ``path``."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_text(text):
+    def write(path):
+        with open(path, 'w') as f:
+            f.write(text)
+    return write
+
+
+def write_json(data, indent=2):
+    def write(path):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=indent)
+    return write
+
+
+class FileLock:
+    """Cross-process lock built on O_EXCL file creation (works on every OS)."""
+
+    def __init__(self, path, timeout=60):
+        self.path = path
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(self.path).st_mtime > STALE_LOCK_SECONDS:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,295 @@
+"""
+Materialized company forecasts for /api/company-predictions.
+
+Forecasts are computed ahead of time and written to
+data/forecasts/<company>.json, so the endpoint only has to read a file.
+data/forecasts/index.json records, per company, the key each forecast was
+built from:
+
+    (company, data version, model version)
+
+The data version is a hash of the company CSV, and the model version is the
+company's current model bundle (see companies.py). ``materialize`` only
+recomputes companies whose key changed. It runs after ``companies.py train``,
+from serve.py's refresh loop when data or models change, or on a schedule
+with ``--watch``.
+
+Companies with trained models get a model-driven forecast. Each model
+predicts the next day's direction from the engineered features. The
+predicted close moves by the recent mean absolute daily return, is appended
+to the history, and the features are recomputed for the following day.
+Companies without models keep the random-walk placeholder. It is seeded
+with the data version, so a forecast only changes when its inputs do.
+
+Usage:
+    python backend/src/forecasts.py                 # refresh what changed
+    python backend/src/forecasts.py --force         # recompute everything
+    python backend/src/forecasts.py --watch 300     # refresh every 5 minutes
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import telemetry
+from file_io import FileLock, atomic_write, write_json
+from companies import DATA_DIR, current_bundle_id, discover_companies
+from pre_processing import engineer_features, load_price_history
+
+FORECAST_DIR = os.path.join(DATA_DIR, 'forecasts')
+INDEX_FILE = 'index.json'
+
+HISTORY_ROWS = 30
+HORIZON_DAYS = 10
+GBP_TO_INR = 105.0
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def data_version(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def load_index(forecast_dir=FORECAST_DIR):
+    try:
+        with open(os.path.join(forecast_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'updated': None, 'companies': {}}
+
+
+def update_index(change, forecast_dir=FORECAST_DIR):
+    """
+    Applies ``change(index)`` to a freshly read index.json and writes it back,
+    under a cross-process lock, so concurrent materialize runs (API workers,
+    companies.py, --watch) do not drop each other's entries.
+    """
+    with FileLock(os.path.join(forecast_dir, '.index.lock')):
+        index = load_index(forecast_dir)
+        change(index)
+        atomic_write(os.path.join(forecast_dir, INDEX_FILE), write_json(index, indent=None))
+    return index
+
+
+def _to_inr(value):
+    try:
+        return round(float(value) * GBP_TO_INR, 2)
+    except (TypeError, ValueError):
+        return value
+
+
+def _historical_rows(raw):
+    """The last HISTORY_ROWS rows as served by the endpoint (prices in INR)."""
+    rows = []
+    for row in raw.tail(HISTORY_ROWS).to_dict(orient='records'):
+        row = dict(row, vqc_prediction=None, svm_prediction=None, actual=row.get('Close'), date=row.get('Date'))
+        for col in PRICE_COLUMNS + ['actual']:
+            if row.get(col) is not None:
+                row[col] = _to_inr(row[col])
+        rows.append(row)
+    return rows
+
+
+def _model_paths(company, bundle_id, prices):
+    """Recursive next-day forecasts of the close (GBP) for each of the company's models."""
+    import predict
+    from artifact_store import company_store
+
+    store = company_store(company)
+    files = store.manifest(bundle_id)['files']
+    preprocessor = predict.load_preprocessor(bundle_id, store=store)
+    models = {}
+    if 'svm_model.pkl' in files:
+        models['svm'] = predict.load_svm_model(bundle_id=bundle_id, store=store)
+    if 'vqc_weights.npy' in files:
+        models['vqc'] = predict.load_vqc_model(num_features=len(preprocessor[0]), bundle_id=bundle_id, store=store)
+
+    step = prices['Close'].pct_change().abs().tail(60).mean()
+    step = 0.01 if pd.isna(step) else float(step)
+    volume = float(prices['Volume'].tail(20).mean()) if 'Volume' in prices else 0.0
+    paths = {}
+    for name, model in models.items():
+        history = prices.copy()
+        path = []
+        for _ in range(HORIZON_DAYS):
+            latest = engineer_features(history).tail(1)
+            X = predict.preprocess_new_data(latest, preprocessor=preprocessor)
+            direction = 1 if int(np.ravel(predict.run_inference(name, model, X))[0]) == 1 else -1
+            close = float(history['Close'].iloc[-1]) * (1 + direction * step)
+            # Forecast days have no intraday range; volume is the recent average
+            bar = {col: close for col in PRICE_COLUMNS if col in history}
+            if 'Volume' in history:
+                bar['Volume'] = volume
+            history.loc[history.index[-1] + pd.Timedelta(days=1)] = pd.Series(bar)
+            path.append(close)
+        paths[name] = path
+    return paths
+
+
+def build_forecast(company, path, version, bundle_id):
+    """Returns the endpoint payload (historical rows followed by forecast rows) for one company."""
+    raw = pd.read_csv(path)
+    if raw.columns[0] != 'Date':
+        # yfinance layout: the date column is headed "Price"
+        raw = raw.rename(columns={raw.columns[0]: 'Date'})
+    raw = raw.replace([np.inf, -np.inf], np.nan)
+    raw = raw.astype(object).where(pd.notnull(raw), None)
+    historical = _historical_rows(raw)
+
+    last_date = pd.to_datetime(historical[-1]['date']) if historical and historical[-1]['date'] else pd.Timestamp.today()
+    last_close = float(historical[-1]['actual']) if historical and historical[-1]['actual'] else 100.0
+
+    paths = {}
+    if bundle_id is not None:
+        paths = {name: [round(close * GBP_TO_INR, 2) for close in closes]
+                 for name, closes in _model_paths(company, bundle_id, load_price_history(path)).items()}
+    # Placeholder for companies (or models) without a trained bundle
+    rng = np.random.default_rng(int(version, 16))
+    if 'vqc' not in paths:
+        paths['vqc'] = [round(last_close * (1 + 0.01 * rng.standard_normal()), 2) for _ in range(HORIZON_DAYS)]
+    if 'svm' not in paths:
+        paths['svm'] = [round(pred * (1 + 0.005 * rng.standard_normal()), 2) for pred in paths['vqc']]
+
+    template = dict(raw.iloc[-1]) if not raw.empty else {}
+    forecast = []
+    for i in range(HORIZON_DAYS):
+        row = dict(template)
+        for col in PRICE_COLUMNS:
+            row[col] = None
+        row.update({
+            'date': (last_date + pd.Timedelta(days=i + 1)).strftime('%Y-%m-%d'),
+            'actual': None,
+            'vqc_prediction': paths['vqc'][i],
+            'svm_prediction': paths['svm'][i],
+        })
+        forecast.append(row)
+    return historical + forecast
+
+
+def _build_task(company, path, version, bundle_id):
+    try:
+        return company, build_forecast(company, path, version, bundle_id), None
+    except Exception as e:
+        return company, None, e
+
+
+def materialize(companies=None, force=False, workers=None, data_dir=DATA_DIR, forecast_dir=FORECAST_DIR):
+    """
+    Recomputes the forecasts whose (data version, model version) changed.
+
+    Returns the names of the companies whose forecast was rewritten. The
+    forecasts are built without holding the index lock; each index update
+    re-reads the index under it (see ``update_index``).
+    """
+    os.makedirs(forecast_dir, exist_ok=True)
+    index = load_index(forecast_dir)
+    entries = index['companies']
+    available = discover_companies(data_dir)
+
+    todo = {}
+    refreshed = {}
+    for company, path in available.items():
+        if companies is not None and company not in companies:
+            continue
+        stat = os.stat(path)
+        entry = entries.get(company)
+        # Only re-hash files whose size or mtime changed
+        unchanged_file = entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+        version = entry['data_version'] if unchanged_file else data_version(path)
+        bundle_id = current_bundle_id(company)
+        if (not force and entry and entry['data_version'] == version and entry['model_version'] == bundle_id
+                and os.path.exists(os.path.join(forecast_dir, f'{company}.json'))):
+            if not unchanged_file:
+                refreshed[company] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            continue
+        todo[company] = (path, version, bundle_id, stat)
+
+    removed = [company for company in entries if company not in available]
+    for company in removed:
+        try:
+            os.remove(os.path.join(forecast_dir, f'{company}.json'))
+        except FileNotFoundError:
+            pass
+
+    done = []
+
+    def store(company, rows):
+        done.append(company)
+        path, version, bundle_id, stat = todo[company]
+        atomic_write(os.path.join(forecast_dir, f'{company}.json'), write_json(rows, indent=None))
+        entry = {
+            'data_version': version,
+            'model_version': bundle_id,
+            'computed': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'data_end': next((row['date'] for row in reversed(rows) if row.get('actual') is not None), None),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+
+        def add(index):
+            index['companies'][company] = entry
+            index['updated'] = entry['computed']
+        update_index(add, forecast_dir)
+        print(f"  ✓ {company}: data {version}, model {bundle_id or '-'}")
+
+    if len(todo) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_build_task, company, path, version, bundle_id)
+                       for company, (path, version, bundle_id, _) in todo.items()]
+            results = (future.result() for future in futures)
+            for company, rows, error in results:
+                if error is None:
+                    store(company, rows)
+                else:
+                    print(f"Warning: forecast for {company} failed: {error}")
+    else:
+        for company, (path, version, bundle_id, _) in todo.items():
+            _, rows, error = _build_task(company, path, version, bundle_id)
+            if error is None:
+                store(company, rows)
+            else:
+                print(f"Warning: forecast for {company} failed: {error}")
+
+    def tidy(index):
+        for company in removed:
+            index['companies'].pop(company, None)
+        for company, stat in refreshed.items():
+            if company in index['companies']:
+                index['companies'][company].update(stat)
+
+    if removed or refreshed or not os.path.exists(os.path.join(forecast_dir, INDEX_FILE)):
+        # Persist stat refreshes and removals even when nothing was rebuilt
+        update_index(tidy, forecast_dir)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute company forecasts for the API")
+    parser.add_argument('--companies', nargs='*', default=None)
+    parser.add_argument('--force', action='store_true', help='recompute even if inputs are unchanged')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--watch', type=float, default=0, help='refresh every N seconds')
+    args = parser.parse_args()
+    telemetry.configure_logging()
+    telemetry.start_snapshots()
+
+    while True:
+        start = time.time()
+        updated = materialize(args.companies, force=args.force, workers=args.workers)
+        print(f"✓ {len(updated)} forecasts recomputed in {time.time() - start:.2f}s")
+        if not args.watch:
+            break
+        args.force = False
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
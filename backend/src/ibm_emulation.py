@@ -0,0 +1,260 @@
+"""
+Local, noisy emulation of the IBM Quantum hardware path.
+
+``train_ibm_vqc`` normally runs every objective evaluation on a real IBM
+backend and waits in its queue each time. With ``emulate=<snapshot>`` it
+runs the same data preparation, transpilation, training and metrics on Aer
+instead, with a noise model built from a stored calibration snapshot of
+that backend.
+
+A snapshot records a backend's coupling map, basis gates and its
+BackendProperties (per-qubit T1/T2 and readout errors, per-gate errors and
+durations), as the device reported them when it was captured:
+
+    models/calibrations/<backend>-<calibration date>.json
+
+Snapshots are written whenever ``train_ibm_vqc`` runs on hardware, by
+``capture`` below, and for qiskit's offline fake backends (``fake_manila``,
+``fake_nairobi``, ...) on first use. The noise model is Aer's standard
+device model (``NoiseModel.from_backend_properties``): depolarizing and
+thermal-relaxation errors on every gate and readout errors on every
+measurement, qubit by qubit.
+
+Circuits are transpiled to the snapshot's coupling map and basis gates as
+they are for the device, so they use the same physical qubits and gates.
+The VQC's sampler sends all samples of an objective evaluation to Aer as one
+job with parameter binds, and Aer runs the batch's circuits (or the shots of
+one circuit) in parallel on AQVH_SIM_THREADS threads (0: every core).
+
+AQVH_EMULATION_METHOD picks Aer's method (default ``automatic``). For the
+few active qubits used here it chooses density_matrix, which applies the
+noise exactly and then samples the shots. ``statevector`` samples one noisy
+trajectory per shot. That is slower at this width, but it is the option
+for circuits too wide for a density matrix.
+
+Emulated results are written in the format of the IBM row of
+model_accuracies.json to models/emulated_accuracies.json, one row per
+backend. They are not published to the model store, so the row for the
+real hardware keeps its own numbers.
+
+    python backend/src/ibm_emulation.py capture ibm_brisbane    # needs a saved IBM account
+    python backend/src/ibm_emulation.py list
+    python backend/src/ibm_emulation.py run fake_manila --samples 40 --maxiter 20
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+
+from lazy_imports import lazy_import
+from artifact_store import MODELS_DIR
+from file_io import atomic_write, write_json
+import simulation
+
+noise = lazy_import('qiskit_aer.noise')
+models = lazy_import('qiskit.providers.models')
+
+CALIBRATION_DIR = os.path.join(MODELS_DIR, 'calibrations')
+REPORT_PATH = os.path.join(MODELS_DIR, 'emulated_accuracies.json')
+
+METHODS = ('automatic', 'density_matrix', 'statevector', 'matrix_product_state')
+METHOD = os.environ.get('AQVH_EMULATION_METHOD', 'automatic')
+SHOTS = int(os.environ.get('AQVH_EMULATION_SHOTS', 4096))
+
+# Backend operations that are not gates the noise model or the transpiler's basis should see
+_NON_GATES = {'measure', 'delay', 'barrier', 'if_else', 'while_loop', 'for_loop', 'switch_case'}
+
+
+def backend_name(backend):
+    """``name`` is a method on BackendV1 and a property on BackendV2."""
+    return backend.name() if callable(backend.name) else backend.name
+
+
+def snapshot_backend(backend):
+    """Calibration snapshot (a JSON-ready dict) of a BackendV1 or BackendV2 backend."""
+    properties = backend.properties() if callable(getattr(backend, 'properties', None)) else None
+    if properties is None:
+        # Fake V2 backends only carry a Target
+        from qiskit.transpiler.target import target_to_backend_properties
+        properties = target_to_backend_properties(backend.target)
+    if callable(getattr(backend, 'configuration', None)):
+        config = backend.configuration()
+        num_qubits, basis_gates = config.n_qubits, list(config.basis_gates)
+        coupling_map = [list(edge) for edge in config.coupling_map or []]
+        dt = getattr(config, 'dt', None)
+    else:
+        num_qubits = backend.num_qubits
+        basis_gates = [name for name in backend.operation_names if name not in _NON_GATES]
+        coupling_map = [list(edge) for edge in backend.coupling_map.get_edges()]
+        dt = backend.dt
+    captured = datetime.datetime.now(datetime.timezone.utc)
+    calibrated = properties.last_update_date or captured
+    return {
+        'backend': backend_name(backend),
+        'captured': captured.isoformat(timespec='seconds'),
+        'calibrated': calibrated.isoformat(timespec='seconds'),
+        'num_qubits': num_qubits,
+        'basis_gates': [gate for gate in basis_gates if gate not in _NON_GATES],
+        'coupling_map': coupling_map,
+        'dt': dt,
+        'properties': json.loads(json.dumps(properties.to_dict(), default=str)),
+    }
+
+
+def save_snapshot(snapshot, directory=CALIBRATION_DIR):
+    """Stores a snapshot as <backend>-<calibration date>.json; returns its path."""
+    stamp = datetime.datetime.fromisoformat(snapshot['calibrated']).strftime('%Y%m%dT%H%M%S')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{snapshot['backend']}-{stamp}.json")
+    atomic_write(path, write_json(snapshot))
+    return path
+
+
+def fetch_backend(name, ibm_instance=None):
+    """A qiskit fake backend (``fake_*``, offline) or the IBM Quantum backend called ``name``."""
+    if name.startswith('fake_'):
+        from qiskit.providers.fake_provider import FakeProvider
+        return FakeProvider().get_backend(name)
+    from qiskit_ibm_runtime import QiskitRuntimeService
+    from telemetry import upstream_call
+    with upstream_call('ibm_quantum', 'connect'):
+        service = QiskitRuntimeService(channel="ibm_quantum_platform", instance=ibm_instance) if ibm_instance else QiskitRuntimeService(channel="ibm_quantum_platform")
+    with upstream_call('ibm_quantum', 'backend'):
+        return service.backend(name)
+
+
+def capture(name, ibm_instance=None, directory=CALIBRATION_DIR):
+    """Fetches ``name``'s current calibration and stores it; returns the snapshot path."""
+    return save_snapshot(snapshot_backend(fetch_backend(name, ibm_instance)), directory)
+
+
+def list_snapshots(directory=CALIBRATION_DIR):
+    """Stored snapshot paths, oldest calibration first per backend."""
+    return sorted(glob.glob(os.path.join(directory, '*.json')))
+
+
+def load_snapshot(name_or_path, directory=CALIBRATION_DIR):
+    """
+    A snapshot from a file path, or the latest stored one for a backend name.
+    Fake backends are captured on first use; IBM backends must have been
+    captured (or used by ``train_ibm_vqc``) before.
+    """
+    if os.path.isfile(name_or_path):
+        path = name_or_path
+    else:
+        paths = sorted(glob.glob(os.path.join(directory, f'{glob.escape(name_or_path)}-*.json')))
+        if paths:
+            path = paths[-1]
+        elif name_or_path.startswith('fake_'):
+            path = capture(name_or_path, directory=directory)
+        else:
+            raise FileNotFoundError(f"No calibration snapshot for {name_or_path!r} in {directory}; "
+                                    f"run `python src/ibm_emulation.py capture {name_or_path}` first")
+    with open(path) as f:
+        snapshot = json.load(f)
+    snapshot['path'] = path
+    return snapshot
+
+
+def noise_model(snapshot):
+    """Aer device noise model (gate, thermal relaxation and readout errors) for a snapshot."""
+    properties = models.BackendProperties.from_dict(snapshot['properties'])
+    return noise.NoiseModel.from_backend_properties(properties, dt=snapshot['dt'])
+
+
+def emulator(snapshot):
+    """
+    Aer simulator with the snapshot's coupling map, basis gates and noise.
+    circuit_factory.transpiled() maps circuits onto it exactly as onto the device.
+    """
+    from qiskit_aer import AerSimulator
+    configuration = models.QasmBackendConfiguration(
+        backend_name=f"aer_simulator({snapshot['backend']})",
+        backend_version=snapshot['calibrated'],
+        n_qubits=snapshot['num_qubits'],
+        basis_gates=snapshot['basis_gates'],
+        gates=[],
+        local=True,
+        simulator=True,
+        conditional=True,
+        open_pulse=False,
+        memory=False,
+        max_shots=int(1e6),
+        coupling_map=snapshot['coupling_map'] or None,
+        dt=snapshot['dt'],
+    )
+    properties = models.BackendProperties.from_dict(snapshot['properties'])
+    return AerSimulator(configuration=configuration, properties=properties, noise_model=noise_model(snapshot))
+
+
+def make_sampler(snapshot, shots=None, seed=None, method=None, threads=None):
+    """
+    Aer Sampler that runs already-transpiled circuits under the snapshot's
+    noise. Each ``run`` is one Aer job for the whole batch.
+    """
+    from qiskit_aer.primitives import Sampler
+    method = method or METHOD
+    if method not in METHODS:
+        raise ValueError(f"Unknown emulation method {method!r} (expected one of {', '.join(METHODS)})")
+    backend_options = {
+        'method': method,
+        'noise_model': noise_model(snapshot),
+        'max_parallel_threads': simulation.THREADS if threads is None else threads,
+        # Aer splits the threads between the batch's circuits, or between shots when there are few circuits
+        'max_parallel_experiments': 0,
+        'max_parallel_shots': 0,
+    }
+    # Readout errors only apply to sampled measurements, so there is no exact (shots=None) mode
+    run_options = {'shots': shots or SHOTS}
+    if seed is not None:
+        run_options['seed'] = seed
+    return Sampler(backend_options=backend_options, run_options=run_options, skip_transpilation=True)
+
+
+def record_result(row, path=REPORT_PATH):
+    """Adds ``row`` to the emulated results, replacing an earlier row for the same backend."""
+    try:
+        with open(path) as f:
+            rows = json.load(f)
+    except (FileNotFoundError, ValueError):
+        rows = []
+    rows = [entry for entry in rows if entry.get('backend') != row['backend']] + [row]
+    atomic_write(path, write_json(rows))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Noisy local emulation of IBM Quantum backends")
+    commands = parser.add_subparsers(dest='command', required=True)
+    cap = commands.add_parser('capture', help="store a backend's current calibration")
+    cap.add_argument('backend', help='IBM backend name, or a qiskit fake backend such as fake_manila')
+    cap.add_argument('--instance', help='IBM Quantum instance')
+    commands.add_parser('list', help='stored calibration snapshots')
+    run = commands.add_parser('run', help='train and evaluate the IBM VQC on the emulator')
+    run.add_argument('backend', help='backend name (latest snapshot) or snapshot path')
+    run.add_argument('--features', type=int, default=3)
+    run.add_argument('--samples', type=int, default=20)
+    run.add_argument('--maxiter', type=int, default=10)
+    run.add_argument('--shots', type=int, default=SHOTS)
+    run.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'capture':
+        print(f"✓ Stored {capture(args.backend, args.instance)}")
+    elif args.command == 'list':
+        for path in list_snapshots():
+            with open(path) as f:
+                snapshot = json.load(f)
+            print(f"{snapshot['backend']:<20} {snapshot['num_qubits']:>4} qubits  calibrated {snapshot['calibrated']}  "
+                  f"{os.path.relpath(path)}")
+    else:
+        from pre_processing import load_data, preprocess_for_ml
+        from quantum_ibm_vqc import train_ibm_vqc
+        X_train, _, y_train, _ = preprocess_for_ml(load_data(ticker=os.environ.get('AQVH_TRAIN_TICKER')))
+        train_ibm_vqc(X_train, y_train, n_features=args.features, n_samples=args.samples, maxiter=args.maxiter,
+                      emulate=args.backend, shots=args.shots, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Incremental retraining from the published model bundle.
+
+A full ``train.py`` run refits the selector and scaler on the whole training
+split and starts the VQC optimizer from random weights. When only a few new
+bars have arrived, ``incremental_retrain`` instead:
+
+  1. takes the training rows added since the published bundle was trained
+     (feature_stats.json records how many rows it has absorbed)
+  2. runs a drift check on them against the published statistics, and stops
+     there unless the check (or ``force``) says to retrain
+  3. merges the new rows into the running statistics and derives the
+     selected features and MinMax scaler from them (see feature_stats.py);
+     a feature only replaces a selected one if its F-value is clearly higher
+  4. fine-tunes the VQC on the most recent WINDOW training rows, starting
+     COBYLA from the published vqc_weights.npy with a small initial step, and
+     refits the SVM on the same window
+  5. publishes everything as a new bundle
+
+The drift check flags a retrain when, for the selected features:
+
+  - more than DRIFT_RANGE_FRACTION of the new rows fall outside the
+    published min/max (the feature map would see angles outside [0, pi])
+  - the new rows' mean is more than DRIFT_Z standard errors from the
+    published mean
+
+It also reports the features the updated F-statistics would select. With
+F-values as close as they are on this data, a few rows can reorder them, so
+a different selection alone does not trigger a retrain.
+
+If the selected features change, the published weights belong to another
+encoding, so the VQC is trained from random weights for the full COLD_MAXITER
+iterations instead.
+
+``compare=True`` also runs the full cold pipeline on the same data (without
+publishing it) and reports training time and test metrics side by side. The
+cold run refits the selector and scaler on the whole training split, and
+trains on the same latest WINDOW rows as the incremental run.
+
+    python backend/src/train.py --incremental
+    python backend/src/train.py --incremental --force --compare
+"""
+import os
+import time
+
+import numpy as np
+
+from lazy_imports import lazy_import, prewarm
+from artifact_store import default_store
+from classical_model import train_svm, evaluate_svm, save_model as save_svm
+from feature_stats import FILE_NAME as STATS_FILE, FeatureStats
+from inference_bundle import FILE_NAME as INFERENCE_BUNDLE, export_inference_bundle
+from pre_processing import preprocess_for_ml
+from quantum_model import (prepare_data_for_vqc, save_preprocessing, train_vqc, evaluate_vqc,
+                           save_model_weights as save_vqc_weights)
+
+optimizers = lazy_import('qiskit_algorithms.optimizers')
+
+DRIFT_Z = float(os.environ.get('AQVH_DRIFT_Z', 3.0))
+DRIFT_RANGE_FRACTION = float(os.environ.get('AQVH_DRIFT_RANGE_FRACTION', 0.05))
+
+# Most recent training rows the models are fitted on (prepare_data_for_vqc's subset size)
+WINDOW = 300
+TEST_ROWS = 50
+WARM_MAXITER = 30
+# COBYLA's first step; the default 1.0 would move the weights far from the published optimum
+WARM_RHOBEG = 0.2
+COLD_MAXITER = 100
+# A feature replaces a selected one only if its F-value is this much higher, so that
+# features with similar scores do not flip the selection (and discard the weights) every run
+SELECTION_MARGIN = 1.25
+
+
+def stable_selection(stats, selected_features):
+    """``selected_features``, with a feature swapped in only where its F-value beats a selected one by SELECTION_MARGIN."""
+    scores = dict(zip(stats.columns, np.nan_to_num(stats.f_scores(), nan=0.0)))
+    selected = list(selected_features)
+    while True:
+        worst = min(selected, key=scores.get)
+        best = max((f for f in stats.columns if f not in selected), key=scores.get, default=None)
+        if best is None or scores[best] <= SELECTION_MARGIN * scores[worst]:
+            break
+        selected[selected.index(worst)] = best
+    return [f for f in stats.columns if f in selected]
+
+
+def drift_report(stats, X_new, y_new, selected_features):
+    """
+    Compares new rows (a frame over ``stats.columns``) with the published
+    statistics; ``retrain`` is True if any check fails.
+    """
+    idx = [stats.columns.index(feature) for feature in selected_features]
+    values = X_new[selected_features].to_numpy(dtype=float)
+    outside = ((values < stats.min[idx]) | (values > stats.max[idx])).any(axis=1)
+
+    std = np.sqrt(stats.variance()[idx])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.abs(values.mean(axis=0) - stats.mean()[idx]) / (std / np.sqrt(len(values)))
+    z = np.where(std > 0, z, 0.0)
+    merged = FeatureStats.from_dict(stats.to_dict()).update(X_new, y_new)
+
+    report = {
+        'new_rows': len(values),
+        'out_of_range_fraction': round(float(outside.mean()), 4),
+        'mean_shift_z': {feature: round(float(value), 3) for feature, value in zip(selected_features, z)},
+        'selected_features': stable_selection(merged, selected_features),
+        'reasons': [],
+    }
+    if report['out_of_range_fraction'] > DRIFT_RANGE_FRACTION:
+        report['reasons'].append(f"{report['out_of_range_fraction']:.0%} of new rows outside the scaler range")
+    shifted = [feature for feature, value in report['mean_shift_z'].items() if value > DRIFT_Z]
+    if shifted:
+        report['reasons'].append(f"mean shift above {DRIFT_Z} standard errors: {', '.join(shifted)}")
+    report['retrain'] = bool(report['reasons'])
+    return report
+
+
+def _print_report(report):
+    print(f"  New training rows: {report['new_rows']}")
+    print(f"  Outside scaler range: {report['out_of_range_fraction']:.1%}")
+    print("  Mean shift (standard errors): " + ", ".join(f"{f} {z:.2f}" for f, z in report['mean_shift_z'].items()))
+    print(f"  Selected features after the update: {report['selected_features']}")
+    for reason in report['reasons']:
+        print(f"  ⚠ {reason}")
+
+
+def _published(store):
+    bundle_id = store.current_id()
+    stats = FeatureStats.from_dict(store.load_json(STATS_FILE, bundle_id))
+    selected = store.load_json('selected_features.json', bundle_id)
+    weights = np.array(store.load_npy('vqc_weights.npy', bundle_id))
+    return bundle_id, stats, selected, weights
+
+
+def cold_retrain(X_train, X_test, y_train, y_test, bundle):
+    """
+    The train.py pipeline into ``bundle``, fitted on the same latest WINDOW rows
+    as the incremental path; returns (seconds, {model: metrics}).
+    """
+    start = time.perf_counter()
+    X_train_small, y_train_small, X_test_small, y_test_small, selected = prepare_data_for_vqc(
+        X_train, y_train, X_test, y_test, bundle=bundle, latest=True)
+    svm_model, _ = train_svm(X_train_small, y_train_small)
+    results = {'SVM': evaluate_svm(svm_model, X_test_small, y_test_small, bundle=bundle)}
+    save_svm(svm_model, bundle=bundle)
+    vqc_model, _ = train_vqc(X_train_small, y_train_small, num_features=X_train_small.shape[1])
+    results['VQC'] = evaluate_vqc(vqc_model, X_test_small, y_test_small, selected, bundle=bundle)
+    save_vqc_weights(vqc_model, bundle=bundle)
+    return time.perf_counter() - start, results
+
+
+def incremental_retrain(data, store=None, force=False, compare=False):
+    """
+    Retrains from the bundle published in ``store`` (default: the main store)
+    if the new rows in ``data`` call for it. Returns a summary dict, with
+    ``bundle_id`` set when a new bundle was published.
+    """
+    store = store or default_store()
+    X_train, X_test, y_train, y_test = preprocess_for_ml(data)
+
+    print("\nINCREMENTAL RETRAIN")
+    print("-" * 50)
+    try:
+        base_id, stats, selected, weights = _published(store)
+    except FileNotFoundError as e:
+        raise RuntimeError(f"Incremental retraining needs a bundle trained with feature statistics ({e}); "
+                           "run a full train.py first") from e
+    if not stats.count:
+        raise RuntimeError(f"Bundle {base_id} recorded no training rows; run a full train.py")
+    if stats.count > len(X_train) or str(X_train.index[stats.count - 1]) != stats.last_index:
+        raise RuntimeError(f"The training rows no longer start with the {stats.count} rows bundle {base_id} "
+                           f"was trained on (last: {stats.last_index}); run a full train.py")
+    X_new, y_new = X_train.iloc[stats.count:], y_train.iloc[stats.count:]
+    summary = {'base_bundle': base_id, 'new_rows': len(X_new), 'bundle_id': None}
+    if not len(X_new):
+        print(f"  No new training rows since bundle {base_id}")
+        return summary
+
+    report = drift_report(stats, X_new, y_new, selected)
+    _print_report(report)
+    summary['drift'] = report
+    if not report['retrain'] and not force:
+        print("  ✓ No drift: keeping the published models (the new rows are checked again next run)")
+        return summary
+
+    if compare:
+        # Both runs are timed without the one-off qiskit/sklearn imports
+        prewarm('quantum', 'sklearn', background=False)
+    start = time.perf_counter()
+    stats.update(X_new, y_new)
+    new_selected = stable_selection(stats, selected)
+    scaler = stats.scaler(new_selected)
+    print(f"  ✓ Updated statistics over {stats.count} rows; selected features: {new_selected}")
+
+    X_window = scaler.transform(X_train[new_selected].iloc[-WINDOW:])
+    y_window = y_train.iloc[-WINDOW:].values
+    X_test_small = scaler.transform(X_test[new_selected].iloc[:TEST_ROWS])
+    y_test_small = y_test.iloc[:TEST_ROWS].values
+
+    bundle = store.bundle()
+    try:
+        save_preprocessing(new_selected, scaler, stats, bundle=bundle)
+        svm_model, _ = train_svm(X_window, y_window)
+        results = {'SVM': evaluate_svm(svm_model, X_test_small, y_test_small, bundle=bundle)}
+        save_svm(svm_model, bundle=bundle)
+
+        warm = new_selected == selected
+        if warm:
+            print(f"  Warm-starting the VQC from bundle {base_id} ({WARM_MAXITER} iterations)")
+            vqc_model, _ = train_vqc(X_window, y_window, num_features=len(new_selected), initial_point=weights,
+                                     optimizer=optimizers.COBYLA(maxiter=WARM_MAXITER, rhobeg=WARM_RHOBEG))
+        else:
+            print("  Selected features changed: training the VQC from random weights")
+            vqc_model, _ = train_vqc(X_window, y_window, num_features=len(new_selected),
+                                     optimizer=optimizers.COBYLA(maxiter=COLD_MAXITER))
+        results['VQC'] = evaluate_vqc(vqc_model, X_test_small, y_test_small, new_selected, bundle=bundle)
+        save_vqc_weights(vqc_model, bundle=bundle)
+        seconds = time.perf_counter() - start
+
+        bundle.set_config(incremental={'base_bundle': base_id, 'warm_start': warm, 'new_rows': len(X_new),
+                                       'reasons': report['reasons'], 'seconds': round(seconds, 2)})
+        bundle.add_file(INFERENCE_BUNDLE, lambda path: export_inference_bundle(bundle.staging, path))
+        summary.update(warm_start=warm, seconds=round(seconds, 2), metrics=results)
+
+        if compare:
+            # Same data through the full pipeline, staged in a scratch bundle that is never published
+            print("\nCOLD RETRAIN (comparison, not published)")
+            scratch = store.bundle()
+            try:
+                cold_seconds, cold_results = cold_retrain(X_train, X_test, y_train, y_test, scratch)
+            finally:
+                scratch.discard()
+            summary['cold'] = {'seconds': round(cold_seconds, 2), 'metrics': cold_results}
+        summary['bundle_id'] = bundle.publish()
+    except BaseException:
+        bundle.discard()
+        raise
+
+    if compare:
+        print(f"\n{'':<12}{'seconds':>10}{'SVM acc':>10}{'VQC acc':>10}")
+        for name, row in (('incremental', summary), ('cold', summary['cold'])):
+            print(f"{name:<12}{row['seconds']:>10.2f}{row['metrics']['SVM']['accuracy']:>10.3f}"
+                  f"{row['metrics']['VQC']['accuracy']:>10.3f}")
+        print(f"  Time saved: {summary['cold']['seconds'] - summary['seconds']:.2f}s "
+              f"({1 - summary['seconds'] / summary['cold']['seconds']:.0%})")
+    return summary
@@ -0,0 +1,184 @@
+"""
+Compact binary inference bundle for the SVM + scaler + feature selector (+ VQC weights).
+
+``export_inference_bundle`` packs everything prediction needs into one flat
+file: a JSON header followed by 64-byte aligned raw arrays
+
+    b"AQVHINF1" | uint64 header length | JSON header | padding | arrays...
+
+``InferenceBundle.load`` memory-maps that file and exposes the arrays as
+zero-copy NumPy views, so loading takes milliseconds. Prediction is pure
+NumPy: selected columns are scaled with the MinMaxScaler min/scale arrays
+and the polynomial-kernel decision function
+
+    f(x) = sum_i dual_coef_i * (gamma * <sv_i, x> + coef0) ** degree + intercept
+
+is evaluated directly, giving the same labels as ``SVC.predict``. This
+module does not import scikit-learn unless exporting.
+
+Usage:
+    python backend/src/inference_bundle.py            # export for the current model bundle
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'AQVHINF1'
+ALIGNMENT = 64
+FILE_NAME = 'inference.bin'
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_inference_bundle(path, svm, scaler, selected_features, feature_order, vqc_weights=None):
+    """Writes the flat bundle for a fitted binary poly/linear/rbf SVC and MinMaxScaler."""
+    if len(svm.classes_) != 2:
+        raise ValueError(f"Only binary classifiers are supported, got {len(svm.classes_)} classes")
+    arrays = {
+        'feature_indices': np.array([feature_order.index(name) for name in selected_features], dtype=np.int64),
+        'scaler_min': np.asarray(scaler.min_, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+        'support_vectors': np.ascontiguousarray(svm.support_vectors_, dtype=np.float64),
+        'dual_coef': np.ascontiguousarray(svm.dual_coef_[0], dtype=np.float64),
+        'intercept': np.asarray(svm.intercept_, dtype=np.float64),
+        'classes': np.asarray(svm.classes_),
+    }
+    if vqc_weights is not None:
+        arrays['vqc_weights'] = np.asarray(vqc_weights, dtype=np.float64)
+
+    header = {
+        'kernel': svm.kernel,
+        'degree': int(svm.degree),
+        'gamma': float(svm._gamma),
+        'coef0': float(svm.coef0),
+        'feature_order': list(feature_order),
+        'selected_features': list(selected_features),
+        'arrays': {},
+    }
+    # Offsets are relative to the start of the data section, which follows the header
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+
+def export_inference_bundle(artifact_dir, path):
+    """Builds the flat bundle from a directory holding svm_model.pkl, feature_scaler.pkl, etc."""
+    import joblib
+    from pre_processing import REQUIRED_FEATURES
+
+    with open(os.path.join(artifact_dir, 'selected_features.json')) as f:
+        selected_features = json.load(f)
+    weights_path = os.path.join(artifact_dir, 'vqc_weights.npy')
+    write_inference_bundle(
+        path,
+        svm=joblib.load(os.path.join(artifact_dir, 'svm_model.pkl')),
+        scaler=joblib.load(os.path.join(artifact_dir, 'feature_scaler.pkl')),
+        selected_features=selected_features,
+        feature_order=REQUIRED_FEATURES,
+        vqc_weights=np.load(weights_path) if os.path.exists(weights_path) else None,
+    )
+
+
+class InferenceBundle:
+    """Memory-mapped inference bundle with a pure-NumPy SVM predictor."""
+
+    def __init__(self, buffer, header, data_start):
+        self.header = header
+        self.kernel = header['kernel']
+        self.degree = header['degree']
+        self.gamma = header['gamma']
+        self.coef0 = header['coef0']
+        self.feature_order = header['feature_order']
+        self.selected_features = header['selected_features']
+        self.arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            view = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + spec['offset'])
+            self.arrays[name] = view.reshape(spec['shape'])
+        self.feature_indices = self.arrays['feature_indices']
+        self.scaler_min = self.arrays['scaler_min']
+        self.scaler_scale = self.arrays['scaler_scale']
+        self.support_vectors = self.arrays['support_vectors']
+        self.dual_coef = self.arrays['dual_coef']
+        self.intercept = float(self.arrays['intercept'][0])
+        self.classes = self.arrays['classes']
+        self.vqc_weights = self.arrays.get('vqc_weights')
+
+    @classmethod
+    def load(cls, path):
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an inference bundle")
+        (header_len,) = struct.unpack('<Q', bytes(mm[len(MAGIC):len(MAGIC) + 8]))
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(mm[header_start:header_start + header_len]))
+        return cls(mm, header, _align(header_start + header_len))
+
+    def select(self, X):
+        """Picks the selected feature columns from a DataFrame or an array in feature_order."""
+        if hasattr(X, 'columns'):
+            return np.asarray(X[self.selected_features], dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        return X[:, self.feature_indices]
+
+    def scale(self, X_selected):
+        """MinMaxScaler.transform on already-selected features."""
+        return X_selected * self.scaler_scale + self.scaler_min
+
+    def preprocess(self, X):
+        return self.scale(self.select(X))
+
+    def _kernel(self, X_scaled):
+        dot = X_scaled @ self.support_vectors.T
+        if self.kernel == 'poly':
+            return (self.gamma * dot + self.coef0) ** self.degree
+        if self.kernel == 'linear':
+            return dot
+        if self.kernel == 'rbf':
+            sq = (X_scaled ** 2).sum(axis=1)[:, None] - 2 * dot + (self.support_vectors ** 2).sum(axis=1)[None, :]
+            return np.exp(-self.gamma * sq)
+        raise ValueError(f"Unsupported kernel: {self.kernel}")
+
+    def svm_decision_function(self, X_scaled):
+        return self._kernel(X_scaled) @ self.dual_coef + self.intercept
+
+    def svm_predict_scaled(self, X_scaled):
+        return self.classes[(self.svm_decision_function(X_scaled) > 0).astype(np.intp)]
+
+    def svm_predict(self, X):
+        """Raw feature rows (DataFrame or array in feature_order) -> class labels."""
+        return self.svm_predict_scaled(self.preprocess(X))
+
+
+def load_current(store=None):
+    """Loads the inference bundle of the current model bundle."""
+    from artifact_store import default_store
+    store = store or default_store()
+    return InferenceBundle.load(store.path(FILE_NAME))
+
+
+if __name__ == "__main__":
+    from artifact_store import default_store
+
+    store = default_store()
+    source = store.bundle_path()
+    bundle = store.bundle()
+    bundle.add_file(FILE_NAME, lambda path: export_inference_bundle(source, path))
+    bundle.publish()
@@ -0,0 +1,85 @@
+"""
+Lazy import layer for the heavy stacks (qiskit, scikit-learn, yfinance).
+
+``lazy_import("qiskit_machine_learning.algorithms.classifiers")`` returns a
+placeholder module that performs the real import on first attribute access,
+so modules can keep their dependencies at the top while importing them only
+when they are actually used. ``prewarm`` imports modules on a background
+thread so the first real use does not pay the import cost either.
+"""
+import importlib
+import sys
+import threading
+import types
+
+# Stacks a caller can ask to prewarm by name
+STACKS = {
+    'quantum': [
+        'qiskit',
+        'qiskit.primitives',
+        'qiskit_algorithms.optimizers',
+        'qiskit_machine_learning.algorithms.classifiers',
+    ],
+    'sklearn': ['sklearn.svm', 'sklearn.preprocessing', 'sklearn.feature_selection', 'sklearn.metrics'],
+    'yfinance': ['yfinance'],
+}
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            # importlib's per-module lock makes concurrent first accesses safe
+            module = importlib.import_module(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    """Returns the module if already imported, otherwise a LazyModule for it."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_loaded(name):
+    return name in sys.modules
+
+
+def prewarm(*stacks_or_modules, background=True):
+    """
+    Imports the given stacks (keys of STACKS) or module names, on a daemon
+    thread by default. Returns the thread (or None when run inline).
+    """
+    names = []
+    for item in stacks_or_modules:
+        names.extend(STACKS.get(item, [item]))
+
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"Warning: could not prewarm {name}: {e}")
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name='prewarm', daemon=True)
+    thread.start()
+    return thread
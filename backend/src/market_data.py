@@ -0,0 +1,367 @@
+"""
+Local market-data store with incremental backfill.
+
+OHLCV bars are kept per ticker and interval as append-only Parquet parts:
+
+    data/market/<ticker>/<interval>/manifest.json
+    data/market/<ticker>/<interval>/part-000001.parquet
+    ...
+
+``sync`` asks the fetcher only for the bars from the last stored timestamp
+on. The last stored bar is requested again because it may have been
+incomplete when it was fetched. Rows that are new or changed are written as
+a new part; rows identical to what is stored are dropped. Readers merge the
+parts in manifest order and keep the latest copy of each timestamp, so
+overlapping fetches never show up as duplicates. Once there are more than
+COMPACT_PARTS small parts at the end, they are merged into one.
+
+The first sync (or one after a gap longer than Yahoo keeps for the
+interval) backfills with BACKFILL_PERIODS instead. A manifest lock makes
+concurrent syncs from several API workers share one upstream request, and
+``max_age`` skips the request entirely while the last sync is recent.
+
+The fetcher is pluggable: YahooFetcher by default, or HTTPFetcher when
+AQVH_MARKET_DATA_URL points at a server that returns the bars as CSV (e.g.
+the fixture server in benchmarks/market_data_check.py).
+
+Usage:
+    python backend/src/market_data.py sync ^FTSE --intervals 1d 1m
+    python backend/src/market_data.py show ^FTSE --interval 1m --tail 5
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+from file_io import FileLock, atomic_write, write_json
+from lazy_imports import lazy_import
+from telemetry import log_event, upstream_call
+
+yf = lazy_import('yfinance')
+pq = lazy_import('pyarrow.parquet')
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+MARKET_DIR = os.path.join(DATA_DIR, 'market')
+URL_ENV = 'AQVH_MARKET_DATA_URL'
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Initial backfill per interval (Yahoo's limits: 1m bars for the last 7 days, other intraday 60 days)
+BACKFILL_PERIODS = {'1m': '7d', '2m': '60d', '5m': '60d', '15m': '60d', '30m': '60d', '60m': '730d',
+                    '1h': '730d', '1d': 'max', '1wk': 'max', '1mo': 'max'}
+# Gaps longer than this cannot be filled with a start= request; they fall back to the backfill period
+MAX_GAP = {'1m': pd.Timedelta(days=7), '2m': pd.Timedelta(days=59), '5m': pd.Timedelta(days=59),
+           '15m': pd.Timedelta(days=59), '30m': pd.Timedelta(days=59), '60m': pd.Timedelta(days=729),
+           '1h': pd.Timedelta(days=729)}
+
+# Trailing parts smaller than COMPACT_ROWS are merged once there are more than COMPACT_PARTS of them
+COMPACT_PARTS = 32
+COMPACT_ROWS = 50_000
+
+
+def empty_frame():
+    return pd.DataFrame(columns=COLUMNS, dtype=float, index=pd.DatetimeIndex([], tz='UTC', name='Date'))
+
+
+def normalize(frame):
+    """UTC Date-indexed float OHLCV frame, sorted, one row per timestamp."""
+    if frame is None or frame.empty:
+        return empty_frame()
+    frame = frame[[col for col in COLUMNS if col in frame.columns]].astype(float)
+    index = pd.DatetimeIndex(frame.index)
+    index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    frame.index = index.rename('Date')
+    frame = frame[~frame.index.duplicated(keep='last')]
+    return frame.sort_index()
+
+
+class YahooFetcher:
+    """Fetches bars with yfinance (``start`` for incremental requests, ``period`` for backfills)."""
+    service = 'yfinance'
+
+    def fetch(self, ticker, interval, start=None, period=None):
+        with upstream_call(self.service, f'history_{interval}'):
+            if start is not None:
+                return yf.Ticker(ticker).history(interval=interval, start=start)
+            return yf.Ticker(ticker).history(interval=interval, period=period)
+
+
+class HTTPFetcher:
+    """
+    Fetches bars from ``<base_url>/history?ticker=&interval=&start=|period=``,
+    which answers with a Date,Open,High,Low,Close,Volume CSV (ISO timestamps).
+    """
+    service = 'market-data'
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def fetch(self, ticker, interval, start=None, period=None):
+        query = {'ticker': ticker, 'interval': interval}
+        if start is not None:
+            query['start'] = pd.Timestamp(start).isoformat()
+        else:
+            query['period'] = period
+        url = f"{self.base_url}/history?{urllib.parse.urlencode(query)}"
+        with upstream_call(self.service, f'history_{interval}'):
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                body = response.read()
+        frame = pd.read_csv(io.BytesIO(body), float_precision='round_trip')
+        if frame.empty:
+            return empty_frame()
+        frame.index = pd.to_datetime(frame.pop('Date'), utc=True, format='ISO8601')
+        return frame
+
+
+def default_fetcher():
+    url = os.environ.get(URL_ENV)
+    return HTTPFetcher(url) if url else YahooFetcher()
+
+
+class MarketDataStore:
+    """
+    Append-only OHLCV store rooted at ``root`` (data/market by default).
+
+        store = MarketDataStore()
+        store.sync('^FTSE', '1m', max_age=30)      # at most one small upstream request
+        bars = store.read('^FTSE', '1m', start=pd.Timestamp('2024-05-01', tz='UTC'))
+    """
+
+    def __init__(self, root=MARKET_DIR, fetcher=None):
+        self.root = root
+        self.fetcher = fetcher or default_fetcher()
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    # --- layout ---
+
+    def series_dir(self, ticker, interval):
+        return os.path.join(self.root, urllib.parse.quote(ticker, safe=''), interval)
+
+    def _manifest_path(self, ticker, interval):
+        return os.path.join(self.series_dir(ticker, interval), 'manifest.json')
+
+    def manifest(self, ticker, interval):
+        """{'parts': [{'file', 'first', 'last', 'rows'}], 'tz', 'synced', 'next_part'}; empty if never synced."""
+        try:
+            with open(self._manifest_path(ticker, interval)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'parts': [], 'tz': None, 'synced': None, 'next_part': 1}
+
+    def _write_manifest(self, ticker, interval, manifest):
+        atomic_write(self._manifest_path(ticker, interval), write_json(manifest))
+
+    def _lock(self, ticker, interval):
+        # Threads of one process queue on a threading lock; processes on the manifest lock file
+        with self._locks_lock:
+            lock = self._locks.setdefault((ticker, interval), threading.Lock())
+        return lock
+
+    def last_timestamp(self, ticker, interval):
+        parts = self.manifest(ticker, interval)['parts']
+        return pd.Timestamp(max(part['last'] for part in parts)) if parts else None
+
+    # --- reading ---
+
+    def _read_parts(self, ticker, interval, parts, start=None, end=None):
+        directory = self.series_dir(ticker, interval)
+        frames = []
+        for part in parts:
+            # Parts outside the requested range are skipped without opening them
+            if (start is not None and pd.Timestamp(part['last']) < start) or \
+                    (end is not None and pd.Timestamp(part['first']) > end):
+                continue
+            frames.append(pq.read_table(os.path.join(directory, part['file'])).to_pandas())
+        if not frames:
+            return empty_frame()
+        frame = pd.concat(frames)
+        # Later parts hold the newer copy of a re-fetched bar
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        if start is not None:
+            frame = frame[frame.index >= start]
+        if end is not None:
+            frame = frame[frame.index <= end]
+        return frame
+
+    def read(self, ticker, interval, start=None, end=None, tz=True):
+        """
+        Stored bars between ``start`` and ``end`` (inclusive), deduplicated.
+
+        The index is in the exchange's timezone, as yfinance returns it
+        (``tz=False`` keeps UTC).
+        """
+        start = _utc(start)
+        end = _utc(end)
+        for attempt in range(2):
+            manifest = self.manifest(ticker, interval)
+            try:
+                frame = self._read_parts(ticker, interval, manifest['parts'], start, end)
+                break
+            except FileNotFoundError:
+                # A compaction replaced the parts after the manifest was read
+                if attempt:
+                    raise
+        if tz and manifest.get('tz'):
+            frame.index = frame.index.tz_convert(manifest['tz'])
+        return frame
+
+    def latest_session(self, ticker, interval):
+        """Bars of the most recent trading day (by the exchange's calendar date)."""
+        last = self.last_timestamp(ticker, interval)
+        if last is None:
+            return empty_frame()
+        tz = self.manifest(ticker, interval).get('tz') or 'UTC'
+        session_start = last.tz_convert(tz).normalize()
+        return self.read(ticker, interval, start=session_start)
+
+    # --- writing ---
+
+    def _append(self, ticker, interval, manifest, frame):
+        directory = self.series_dir(ticker, interval)
+        name = f"part-{manifest['next_part']:06d}.parquet"
+        atomic_write(os.path.join(directory, name), frame.to_parquet)
+        manifest['parts'].append({'file': name, 'first': frame.index[0].isoformat(),
+                                  'last': frame.index[-1].isoformat(), 'rows': len(frame)})
+        manifest['next_part'] += 1
+
+    def _compact(self, ticker, interval, manifest):
+        """Merges the trailing run of small parts into one part."""
+        parts = manifest['parts']
+        tail = len(parts)
+        while tail and parts[tail - 1]['rows'] < COMPACT_ROWS:
+            tail -= 1
+        small = parts[tail:]
+        if len(small) <= COMPACT_PARTS:
+            return
+        merged = self._read_parts(ticker, interval, small)
+        del parts[tail:]
+        self._append(ticker, interval, manifest, merged)
+        # Written before the old parts go, so a reader never sees a manifest naming missing files
+        self._write_manifest(ticker, interval, manifest)
+        for part in small:
+            os.remove(os.path.join(self.series_dir(ticker, interval), part['file']))
+        log_event('market_data_compacted', ticker=ticker, interval=interval, parts=len(small), rows=len(merged))
+
+    def _changed_rows(self, ticker, interval, manifest, fetched):
+        """The fetched rows that are not already stored with the same values."""
+        stored = self._read_parts(ticker, interval, manifest['parts'], start=fetched.index[0])
+        stored = stored.reindex(index=fetched.index, columns=fetched.columns)
+        same = ((stored == fetched) | (stored.isna() & fetched.isna())).all(axis=1)
+        return fetched[~same]
+
+    def sync(self, ticker, interval='1d', max_age=None):
+        """
+        Fetches the bars after the last stored one and appends them.
+
+        Skips the upstream request if another sync (from any process) ran less
+        than ``max_age`` seconds ago. Returns the number of rows written.
+        """
+        with self._lock(ticker, interval):
+            if max_age is not None and _fresh(self.manifest(ticker, interval), max_age):
+                return 0
+            os.makedirs(self.series_dir(ticker, interval), exist_ok=True)
+            with FileLock(os.path.join(self.series_dir(ticker, interval), '.lock')):
+                manifest = self.manifest(ticker, interval)
+                if max_age is not None and _fresh(manifest, max_age):
+                    return 0
+                last = self.last_timestamp(ticker, interval)
+                now = pd.Timestamp.now(tz='UTC')
+                gap = MAX_GAP.get(interval)
+                if last is None or (gap is not None and now - last > gap):
+                    raw = self.fetcher.fetch(ticker, interval, period=BACKFILL_PERIODS.get(interval, 'max'))
+                else:
+                    raw = self.fetcher.fetch(ticker, interval, start=last)
+                if manifest.get('tz') is None and getattr(getattr(raw, 'index', None), 'tz', None) is not None:
+                    manifest['tz'] = str(raw.index.tz)
+                fetched = normalize(raw)
+                new = self._changed_rows(ticker, interval, manifest, fetched) if len(fetched) else fetched
+                if len(new):
+                    self._append(ticker, interval, manifest, new)
+                manifest['synced'] = time.time()
+                self._write_manifest(ticker, interval, manifest)
+                self._compact(ticker, interval, manifest)
+        log_event('market_data_sync', ticker=ticker, interval=interval, fetched=len(fetched), written=len(new),
+                  mode='backfill' if last is None else 'incremental')
+        return len(new)
+
+    def refresh(self, ticker, interval, max_age=None):
+        """
+        ``sync`` that keeps serving the stored bars when the upstream call
+        fails; raises only if nothing is stored yet.
+        """
+        try:
+            return self.sync(ticker, interval, max_age=max_age)
+        except Exception as e:
+            if self.last_timestamp(ticker, interval) is None:
+                raise
+            log_event('market_data_stale', ticker=ticker, interval=interval, error=str(e))
+            return 0
+
+
+def _utc(value):
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tz is None else value.tz_convert('UTC')
+
+
+def _fresh(manifest, max_age):
+    return manifest.get('synced') is not None and time.time() - manifest['synced'] < max_age
+
+
+_default_store = None
+
+
+def default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = MarketDataStore()
+    return _default_store
+
+
+def load_bars(ticker, interval='1d', sync=True, store=None):
+    """All stored bars for a ticker (synced first), in the Date-indexed layout of load_price_history."""
+    store = store or default_store()
+    if sync:
+        store.refresh(ticker, interval)
+    frame = store.read(ticker, interval)
+    # Naive exchange-local timestamps; daily bars are dated by the exchange's calendar day
+    frame.index = frame.index.tz_localize(None)
+    if interval in ('1d', '1wk', '1mo'):
+        frame.index = frame.index.normalize()
+    return frame.dropna(subset=['Close'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local market-data store")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sync = commands.add_parser('sync', help='fetch new bars for a ticker')
+    sync.add_argument('ticker')
+    sync.add_argument('--intervals', nargs='+', default=['1d'])
+    show = commands.add_parser('show', help='print stored bars')
+    show.add_argument('ticker')
+    show.add_argument('--interval', default='1d')
+    show.add_argument('--tail', type=int, default=10)
+    args = parser.parse_args()
+
+    store = default_store()
+    if args.command == 'sync':
+        for interval in args.intervals:
+            written = store.sync(args.ticker, interval)
+            manifest = store.manifest(args.ticker, interval)
+            print(f"✓ {args.ticker} {interval}: {written} rows written, {len(manifest['parts'])} parts, "
+                  f"last bar {store.last_timestamp(args.ticker, interval)}")
+    else:
+        print(store.read(args.ticker, args.interval).tail(args.tail))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,21 @@ import pandas as pd
 import numpy as np
 import os
 
-def load_data(file_path='backend/data/dataset.csv'):
-    """Loads the enriched dataset from the specified file path."""
+# Engineered features the models are trained on, in column order
+REQUIRED_FEATURES = ['sma_crossover', 'price_sma_ratio', 'rsi', 'macd', 'macd_hist', 'adx', 'obv']
+
+def load_data(file_path='backend/data/dataset.csv', ticker=None, interval='1d'):
+    """
+    Loads the enriched dataset from the specified file path, or, with
+    ``ticker``, builds it from the local market-data store (synced first).
+    """
+    if ticker is not None:
+        from market_data import load_bars
+        print(f"Loading {interval} bars for {ticker} from the market-data store...")
+        # The last bar has no next close to label it with
+        data = engineer_features(load_bars(ticker, interval)).dropna(subset=['target'])
+        print(f"✓ Built dataset with features and target: {data.shape}")
+        return data
     if os.path.exists(file_path):
         print(f"Loading enriched dataset from {file_path}...")
         data = pd.read_csv(file_path, index_col=0, parse_dates=True)
@@ -17,7 +30,7 @@ def preprocess_for_ml(data):
     print("\nPREPROCESSING DATA FOR MACHINE LEARNING")
     print("-" * 50)
 
-    required_features = ['sma_crossover', 'price_sma_ratio', 'rsi', 'macd', 'macd_hist', 'adx', 'obv']
+    required_features = REQUIRED_FEATURES
     for feature in required_features:
         if feature not in data.columns:
             data[feature] = 0
@@ -48,4 +61,69 @@ def preprocess_for_ml(data):
     print(f"  Training samples: {len(X_train)}")
     print(f"  Test samples: {len(X_test)}")
 
-    return X_train, X_test, y_train, y_test
\ No newline at end of file
+    return X_train, X_test, y_train, y_test
+
+
+def load_price_history(file_path):
+    """
+    Loads a daily OHLCV CSV (plain, or yfinance's three-row header layout)
+    into a Date-indexed frame with numeric Open/High/Low/Close/Volume columns.
+    """
+    df = pd.read_csv(file_path)
+    first = df.columns[0]
+    if first != 'Date':
+        # yfinance layout: "Price" header, then "Ticker" and "Date" metadata rows
+        df = df.rename(columns={first: 'Date'})
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce', utc=True, format='ISO8601').dt.tz_localize(None)
+    df = df.dropna(subset=['Date']).set_index('Date').sort_index()
+    columns = [col for col in ['Open', 'High', 'Low', 'Close', 'Volume'] if col in df.columns]
+    df = df[columns].apply(pd.to_numeric, errors='coerce')
+    return df.dropna(subset=['Close'])
+
+def engineer_features(prices, rsi_period=14, adx_period=14):
+    """
+    Computes REQUIRED_FEATURES and the next-day direction target from OHLCV prices.
+
+    The first 50 rows (SMA-50 warm-up) are dropped. The last row keeps a NaN
+    target since its next close is not known yet; it is the row to predict.
+    """
+    close = prices['Close']
+    high = prices['High'] if 'High' in prices else close
+    low = prices['Low'] if 'Low' in prices else close
+    volume = prices['Volume'] if 'Volume' in prices else pd.Series(0.0, index=prices.index)
+
+    features = pd.DataFrame(index=prices.index)
+    sma_20 = close.rolling(20).mean()
+    sma_50 = close.rolling(50).mean()
+    features['sma_crossover'] = (sma_20 > sma_50).astype(float)
+    features['price_sma_ratio'] = close / sma_20 * 100
+
+    # Wilder's RSI
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    features['rsi'] = 100 - 100 / (1 + avg_gain / avg_loss.replace(0, np.nan))
+    features['rsi'] = features['rsi'].fillna(100.0)
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    features['macd'] = macd
+    features['macd_hist'] = macd - macd.ewm(span=9, adjust=False).mean()
+
+    # Wilder's ADX
+    true_range = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    up_move = high.diff()
+    down_move = -low.diff()
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0)
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0)
+    atr = true_range.ewm(alpha=1 / adx_period, adjust=False).mean()
+    plus_di = 100 * plus_dm.ewm(alpha=1 / adx_period, adjust=False).mean() / atr.replace(0, np.nan)
+    minus_di = 100 * minus_dm.ewm(alpha=1 / adx_period, adjust=False).mean() / atr.replace(0, np.nan)
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0, np.nan)
+    features['adx'] = dx.ewm(alpha=1 / adx_period, adjust=False).mean()
+
+    features['obv'] = (np.sign(close.diff()).fillna(0) * volume.fillna(0)).cumsum()
+
+    features['Close'] = close
+    next_close = close.shift(-1)
+    features['target'] = (next_close > close).astype(float).where(next_close.notna())
+    return features.iloc[50:]
@@ -1,46 +1,84 @@
 import joblib
 import numpy as np
 import pandas as pd
-import json
 import pickle
-from sklearn.preprocessing import MinMaxScaler
-
-# --- Qiskit imports ---
-from qiskit.circuit.library import ZZFeatureMap, RealAmplitudes
-from qiskit_algorithms.optimizers import COBYLA
-from qiskit_machine_learning.algorithms.classifiers import VQC
-try:
-    from qiskit.primitives import StatevectorSampler as Sampler
-except ImportError:
-    from qiskit.primitives import Sampler
-
-def load_svm_model(file_path='backend/models/svm_model.pkl'):
-    """Loads a trained SVM model from a file."""
-    return joblib.load(file_path)
-
-def load_vqc_model(weights_path='backend/models/ibm_vqc_weights.npy', num_features=3):
-    """Recreates the VQC model and loads its trained weights."""
-    weights = np.load(weights_path)
-    vqc = VQC(
-        sampler=Sampler(),
-        feature_map=ZZFeatureMap(feature_dimension=num_features, reps=2, entanglement='linear'),
-        ansatz=RealAmplitudes(num_qubits=num_features, reps=3, entanglement='linear'),
-        optimizer=COBYLA(maxiter=0),
-        initial_point=weights
-    )
-    vqc.fit(np.zeros((2, num_features)), np.array([0, 1]))
+from lazy_imports import lazy_import
+from artifact_store import default_store
+import circuit_factory
+import simulation
+import telemetry
+import vqc_inference
+
+# --- Qiskit imports (loaded on first use, see lazy_imports.py) ---
+optimizers = lazy_import('qiskit_algorithms.optimizers')
+classifiers = lazy_import('qiskit_machine_learning.algorithms.classifiers')
+
+def load_svm_model(file_path=None, bundle_id=None, store=None):
+    """Loads the trained SVM model from a model bundle (default: current) or an explicit file."""
+    with telemetry.model_load_seconds.time('svm'):
+        if file_path:
+            return joblib.load(file_path)
+        return (store or default_store()).load_joblib('svm_model.pkl', bundle_id)
+
+def load_vqc_model(weights_path=None, num_features=None, bundle_id=None, store=None, backend=None):
+    """
+    Recreates the VQC model and loads its trained weights (memory-mapped from the bundle).
+    ``num_features`` defaults to the width the weights were trained for; ``backend`` picks
+    the simulation backend (default AQVH_SIM_BACKEND or auto, see simulation.py).
+    """
+    with telemetry.model_load_seconds.time('vqc'):
+        weights = np.load(weights_path) if weights_path else (store or default_store()).load_npy('vqc_weights.npy', bundle_id)
+        # RealAmplitudes has one rotation per qubit per layer (reps + the final layer)
+        num_features = num_features or len(weights) // (circuit_factory.ANSATZ_REPS + 1)
+        backend = simulation.backend_name(num_features, backend=backend)
+        vqc = classifiers.VQC(
+            sampler=simulation.make_sampler(num_features, backend=backend),
+            feature_map=circuit_factory.feature_map(num_features, reps=2),
+            ansatz=circuit_factory.ansatz(num_features, reps=3),
+            optimizer=optimizers.COBYLA(maxiter=0),
+            initial_point=weights
+        )
+        vqc.fit(np.zeros((2, num_features)), np.array([0, 1]))
+        vqc.simulation_backend = backend
     return vqc
 
-def preprocess_new_data(new_data_df):
-    """Loads preprocessing tools and transforms new data."""
-    # Load the list of feature names that the model was trained on
-    with open('backend/models/selected_features.json', 'r') as f:
-        selected_features = json.load(f)
+def load_preprocessor(bundle_id=None, store=None):
+    """Loads the selected feature names and fitted scaler from a model bundle (default: current)."""
+    store = store or default_store()
+    with telemetry.model_load_seconds.time('preprocessor'):
+        # Load the list of feature names that the model was trained on
+        selected_features = store.load_json('selected_features.json', bundle_id)
+        # Load the scaler written by prepare_data_for_vqc
+        scaler = store.load_joblib('feature_scaler.pkl', bundle_id)
     print(f"✓ Loaded required features: {selected_features}")
-
-    # Load the scaler
-    scaler = joblib.load('backend/models/data_scaler.pkl')
     print("✓ Loaded fitted scaler")
+    return selected_features, scaler
+
+def run_inference(name, model, X):
+    """``model.predict(X)``, recorded in the inference time and row metrics under ``name``."""
+    with telemetry.inference_seconds.time(name):
+        predictions = model.predict(X)
+    telemetry.inference_rows.labels(name).inc(len(X))
+    return predictions
+
+def run_vqc_inference(model, X, mode='exact', **options):
+    """
+    Scores ``X`` with a VQC in an explicit mode (exact, shots or adaptive; see vqc_inference.py).
+    Returns a frame with the prediction, class probabilities, margin and shots of every row.
+    """
+    name = f'vqc-{mode}'
+    with telemetry.inference_seconds.time(name):
+        predictions = vqc_inference.predict_vqc(model, X, mode=mode, **options)
+    telemetry.inference_rows.labels(name).inc(len(X))
+    telemetry.vqc_shots.labels(mode).inc(int(predictions['shots'].sum()))
+    return predictions
+
+def preprocess_new_data(new_data_df, bundle_id=None, preprocessor=None):
+    """
+    Transforms new data with the bundle's feature selection and scaler.
+    Pass ``preprocessor`` (from load_preprocessor) to avoid reloading it on every call.
+    """
+    selected_features, scaler = preprocessor or load_preprocessor(bundle_id)
 
     # Select the required features from the new data
     data_selected = new_data_df[selected_features]
@@ -65,16 +103,25 @@ if __name__ == "__main__":
     print("New data to predict:")
     print(new_data_df)
 
+    # Pin one bundle so the scaler, features and models always match
+    bundle_id = default_store().current_id()
+    print(f"Using model bundle {bundle_id}")
+
     # Preprocess the new data
-    preprocessed_data = preprocess_new_data(new_data_df)
+    preprocessed_data = preprocess_new_data(new_data_df, bundle_id)
 
     # Load the trained models
-    svm_model = load_svm_model()
-    vqc_model = load_vqc_model()
+    svm_model = load_svm_model(bundle_id=bundle_id)
+    vqc_model = load_vqc_model(bundle_id=bundle_id)
 
     # Make predictions
-    svm_prediction = svm_model.predict(preprocessed_data)
-    vqc_prediction = vqc_model.predict(preprocessed_data)
+    svm_prediction = run_inference('svm', svm_model, preprocessed_data)
+    vqc_prediction = run_inference('vqc', vqc_model, preprocessed_data)
 
     print(f"\nSVM Prediction: {svm_prediction}")
-    print(f"VQC Prediction: {vqc_prediction}")
\ No newline at end of file
+    print(f"VQC Prediction: {vqc_prediction}")
+
+    # Probabilities, margin and shots used: exact statevector vs adaptive shots
+    for mode in ('exact', 'adaptive'):
+        print(f"\nVQC ({mode}):")
+        print(run_vqc_inference(vqc_model, preprocessed_data, mode=mode).to_string(index=False))
\ No newline at end of file
@@ -1,6 +1,7 @@
 """
 IBM Quantum VQC Model Integration Module
-This module provides a function to train and evaluate a Variational Quantum Classifier (VQC) using IBM Quantum hardware via Qiskit Runtime.
+This module provides a function to train and evaluate a Variational Quantum Classifier (VQC) using IBM Quantum hardware via Qiskit Runtime,
+or offline on a noisy Aer emulation of an IBM backend (see ibm_emulation.py).
 
 Requirements:
 - qiskit
@@ -11,13 +12,19 @@ Requirements:
 Usage:
 from quantum_ibm_vqc import train_ibm_vqc
 accuracy, precision, recall, f1, backend_name = train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10)
+accuracy, precision, recall, f1, backend_name = train_ibm_vqc(X_train, y_train, emulate='fake_manila')
 """
+import contextlib
+
 import numpy as np
 from typing import Tuple
 
-def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_token=None, ibm_instance=None):
+from artifact_store import accuracy_fields, publish_or_stage
+
+def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_token=None, ibm_instance=None,
+                  emulate=None, shots=None, seed=None, report_path=None):
     """
-    Train and evaluate a VQC model on IBM Quantum hardware.
+    Train and evaluate a VQC model on IBM Quantum hardware, or on its local emulation.
     Args:
         X_train: Training features (numpy array or pandas DataFrame)
         y_train: Training labels (numpy array or pandas Series)
@@ -26,6 +33,10 @@ def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_
         maxiter: Maximum optimizer iterations
         ibm_token: IBM Quantum API token (optional, if not already saved)
         ibm_instance: IBM Quantum instance string (optional)
+        emulate: Backend name or calibration snapshot path; runs on a noisy Aer emulation of it instead
+        shots: Shots per circuit when emulating (default AQVH_EMULATION_SHOTS)
+        seed: Seeds the initial weights and, when emulating, the simulator
+        report_path: Where emulated results are recorded (default models/emulated_accuracies.json)
     Returns:
         accuracy, precision, recall, f1, backend_name
     """
@@ -33,20 +44,36 @@ def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_
     from sklearn.preprocessing import MinMaxScaler
     from sklearn.feature_selection import SelectKBest, f_classif
     from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-    from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-    from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-    from qiskit.circuit.library import ZZFeatureMap, RealAmplitudes
+    import circuit_factory
+    import ibm_emulation
     from qiskit_algorithms.optimizers import COBYLA
     from qiskit_machine_learning.algorithms.classifiers import VQC
-    import time
+    from telemetry import optimizer_callback, training_stage, upstream_call
 
-    # Save IBM token if provided
-    if ibm_token:
-        QiskitRuntimeService.save_account(channel="ibm_quantum_platform", token=ibm_token, overwrite=True)
-    # Connect to IBM Quantum
-    service = QiskitRuntimeService(channel="ibm_quantum_platform", instance=ibm_instance) if ibm_instance else QiskitRuntimeService(channel="ibm_quantum_platform")
-    backend = service.least_busy(simulator=False, operational=True, min_num_qubits=n_features)
-    sampler = Sampler(backend)
+    if emulate:
+        # Same device layout and calibrated noise, simulated locally: no queue, no IBM account
+        snapshot = ibm_emulation.load_snapshot(emulate)
+        shots = shots or ibm_emulation.SHOTS
+        backend = ibm_emulation.emulator(snapshot)
+        sampler = ibm_emulation.make_sampler(snapshot, shots=shots, seed=seed)
+        upstream = lambda *labels: contextlib.nullcontext()
+    else:
+        from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+        # Save IBM token if provided
+        if ibm_token:
+            QiskitRuntimeService.save_account(channel="ibm_quantum_platform", token=ibm_token, overwrite=True)
+        # Connect to IBM Quantum
+        with upstream_call('ibm_quantum', 'connect'):
+            service = QiskitRuntimeService(channel="ibm_quantum_platform", instance=ibm_instance) if ibm_instance else QiskitRuntimeService(channel="ibm_quantum_platform")
+        with upstream_call('ibm_quantum', 'least_busy'):
+            backend = service.least_busy(simulator=False, operational=True, min_num_qubits=n_features)
+        sampler = Sampler(backend)
+        upstream = upstream_call
+        # Keep this calibration so the run can be reproduced with emulate=<backend>
+        try:
+            print(f"✓ Calibration snapshot saved to {ibm_emulation.save_snapshot(ibm_emulation.snapshot_backend(backend))}")
+        except Exception as e:
+            print(f"Warning: Could not save a calibration snapshot: {e}")
 
     # Data selection and scaling
     selector = SelectKBest(score_func=f_classif, k=n_features)
@@ -57,14 +84,11 @@ def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_
     scaler = MinMaxScaler(feature_range=(0, np.pi))
     X_quantum = scaler.fit_transform(X_selected)
 
-    # Quantum circuit setup
-    feature_map = ZZFeatureMap(feature_dimension=n_features, reps=1, entanglement='linear')
-    ansatz = RealAmplitudes(num_qubits=n_features, reps=1, entanglement='linear')
+    # Quantum circuit setup (transpiled circuits are cached per backend)
     optimizer = COBYLA(maxiter=maxiter)
-    pm = generate_preset_pass_manager(backend=backend, optimization_level=0)
-    feature_map_hw = pm.run(feature_map)
-    ansatz_hw = pm.run(ansatz)
-    initial_params = np.random.uniform(0, 2*np.pi, ansatz_hw.num_parameters)
+    feature_map_hw = circuit_factory.transpiled('feature_map', n_features, 1, backend, optimization_level=0)
+    ansatz_hw = circuit_factory.transpiled('ansatz', n_features, 1, backend, optimization_level=0)
+    initial_params = np.random.default_rng(seed).uniform(0, 2*np.pi, ansatz_hw.num_parameters)
 
     # VQC training
     vqc = VQC(
@@ -72,22 +96,25 @@ def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_
         feature_map=feature_map_hw,
         ansatz=ansatz_hw,
         optimizer=optimizer,
-        initial_point=initial_params
+        initial_point=initial_params,
+        callback=optimizer_callback('IBM VQC', log_every=1)
     )
-    train_start = time.time()
-    vqc.fit(X_quantum, y_selected)
-    train_time = time.time() - train_start
+    # Every objective evaluation is a round trip to the IBM backend (one batched Aer job when emulating)
+    with training_stage('IBM VQC', 'fit') as stage, upstream('ibm_quantum', 'vqc_fit'):
+        vqc.fit(X_quantum, y_selected)
+    train_time = stage.elapsed
 
     # Evaluation (use same data for demo)
-    y_pred = vqc.predict(X_quantum[:min(10, len(X_quantum))])
+    with upstream('ibm_quantum', 'vqc_predict'):
+        y_pred = vqc.predict(X_quantum[:min(10, len(X_quantum))])
     y_true = y_selected[:min(10, len(y_selected))]
     accuracy = accuracy_score(y_true, y_pred)
     precision = precision_score(y_true, y_pred, average='weighted', zero_division=0)
     recall = recall_score(y_true, y_pred, average='weighted', zero_division=0)
     f1 = f1_score(y_true, y_pred, average='weighted', zero_division=0)
-    backend_name = backend.name
+    backend_name = ibm_emulation.backend_name(backend)
 
-    print(f"IBM Quantum VQC Results:")
+    print(f"IBM Quantum VQC Results{' (emulated)' if emulate else ''}:")
     print(f"  Backend: {backend_name}")
     print(f"  Accuracy: {accuracy:.3f}")
     print(f"  Precision: {precision:.3f}")
@@ -95,19 +122,23 @@ def train_ibm_vqc(X_train, y_train, n_features=3, n_samples=20, maxiter=10, ibm_
     print(f"  F1 Score: {f1:.3f}")
     print(f"  Training time: {train_time:.1f}s")
 
-    # Save IBM Quantum metrics to model_accuracies.json
-    import json
+    if emulate:
+        # Same row as the IBM entry of model_accuracies.json, kept apart from the hardware results
+        row = dict(model='IBM Quantum VQC (emulated)', backend=backend_name, calibrated=snapshot['calibrated'],
+                   shots=shots,
+                   **accuracy_fields({'accuracy': accuracy, 'precision': precision, 'recall': recall, 'f1': f1}))
+        ibm_emulation.record_result(row, report_path or ibm_emulation.REPORT_PATH)
+        print(f"✓ Emulated IBM Quantum metrics recorded in {report_path or ibm_emulation.REPORT_PATH}")
+        return accuracy, precision, recall, f1, backend_name
+
+    # Publish IBM Quantum metrics and weights as a model bundle (exported to model_accuracies.json)
+    def add_ibm_results(bundle):
+        bundle.add_metrics('IBM', {'model': 'IBM Quantum VQC', 'accuracy': accuracy, 'precision': precision,
+                                   'recall': recall, 'f1': f1, 'backend': backend_name})
+        bundle.add_npy('ibm_vqc_weights.npy', vqc.weights)
+        bundle.set_config(ibm_backend=backend_name, ibm_feature_map_reps=1, ibm_ansatz_reps=1, ibm_num_features=n_features)
     try:
-        with open('backend/models/model_accuracies.json', 'r') as f:
-            data = json.load(f)
-        for entry in data:
-            if 'IBM' in entry['model']:
-                entry['accuracy'] = round(accuracy * 100, 2)
-                entry['precision'] = round(precision * 100, 2)
-                entry['recall'] = round(recall * 100, 2)
-                entry['f1Score'] = round(f1 * 100, 2)
-        with open('backend/models/model_accuracies.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        publish_or_stage(None, add_ibm_results)
         print('✓ IBM Quantum metrics updated in model_accuracies.json')
     except Exception as e:
         print(f'Error updating IBM Quantum metrics: {e}')
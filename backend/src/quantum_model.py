@@ -1,107 +1,141 @@
+import os
 import numpy as np
-import time
-import json
-import joblib
-from sklearn.feature_selection import SelectKBest, f_classif
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
-from qiskit.circuit.library import ZZFeatureMap, RealAmplitudes
-from qiskit_algorithms.optimizers import COBYLA
-try:
-    from qiskit.primitives import StatevectorSampler as Sampler
-except ImportError:
-    from qiskit.primitives import Sampler
-from qiskit_machine_learning.algorithms.classifiers import VQC
+from lazy_imports import lazy_import
+from artifact_store import publish_or_stage
+from telemetry import optimizer_callback, training_stage
+from vqc_profiler import VQCProfiler
+import circuit_factory
+import simulation
+from feature_stats import FILE_NAME as STATS_FILE, FeatureStats
 
-def prepare_data_for_vqc(X_train, y_train, X_test, y_test):
-    """Selects top features, scales data, and saves the selector/scaler."""
+# sklearn and the qiskit stack are imported on first use (see lazy_imports.py)
+feature_selection = lazy_import('sklearn.feature_selection')
+preprocessing = lazy_import('sklearn.preprocessing')
+metrics = lazy_import('sklearn.metrics')
+optimizers = lazy_import('qiskit_algorithms.optimizers')
+classifiers = lazy_import('qiskit_machine_learning.algorithms.classifiers')
+
+# Features (= qubits) the VQC is trained on; up to all seven engineered features, see simulation.py for widths
+NUM_FEATURES = int(os.environ.get('AQVH_VQC_FEATURES', 3))
+
+def prepare_data_for_vqc(X_train, y_train, X_test, y_test, bundle=None, num_features=None, latest=False):
+    """
+    Selects top features (default NUM_FEATURES), scales data, and saves the selector/scaler.
+    The VQC subset is the first 300 training rows, or the last 300 with ``latest`` (as incremental.py trains on).
+    """
     print("\nPreparing data for Quantum Classifier...")
     print("-" * 50)
-    
+    k = min(num_features or NUM_FEATURES, X_train.shape[1])
+
     # Fit the feature selector
-    selector = SelectKBest(score_func=f_classif, k=3)
+    selector = feature_selection.SelectKBest(score_func=feature_selection.f_classif, k=k)
     selector.fit(X_train, y_train)
     
-    # Get the names of the top 3 features
+    # Get the names of the top k features
     selected_features = list(X_train.columns[selector.get_support()])
-    print(f"  ✓ Selected top 3 features: {selected_features}")
-
-    # --- SAVE THE SELECTED FEATURE NAMES ---
-    with open('backend/models/selected_features.json', 'w') as f:
-        json.dump(selected_features, f)
-    print("  ✓ Selected feature names saved to models/selected_features.json")
+    print(f"  ✓ Selected top {k} features: {selected_features}")
 
     # Transform the data to have only the selected features
     X_train_selected = X_train[selected_features]
     X_test_selected = X_test[selected_features]
     
     # Fit the scaler ONLY on the training data
-    scaler = MinMaxScaler(feature_range=(0, np.pi))
+    scaler = preprocessing.MinMaxScaler(feature_range=(0, np.pi))
     scaler.fit(X_train_selected)
 
-    # --- SAVE THE FITTED SCALER ---
-    joblib.dump(scaler, 'backend/models/feature_scaler.pkl')
-    print("  ✓ Fitted scaler saved to models/feature_scaler.pkl")
+    # --- SAVE THE SELECTED FEATURE NAMES AND FITTED SCALER ---
+    # Running statistics of every feature, so incremental.py can update the selector and scaler later
+    stats = FeatureStats(X_train.columns).update(X_train, y_train)
+    save_preprocessing(selected_features, scaler, stats, bundle=bundle)
+    print("  ✓ Selected feature names and fitted scaler saved (selected_features.json, feature_scaler.pkl)")
 
     # Scale both training and test data
     X_train_scaled = scaler.transform(X_train_selected)
     X_test_scaled = scaler.transform(X_test_selected)
     
     # Take subsets for training/testing
-    X_train_small = X_train_scaled[:300]
-    y_train_small = y_train.iloc[:300].values
+    rows = slice(-300, None) if latest else slice(None, 300)
+    X_train_small = X_train_scaled[rows]
+    y_train_small = y_train.iloc[rows].values
     X_test_small = X_test_scaled[:50]
     y_test_small = y_test.iloc[:50].values
     
     print(f"  Using deterministic subset: {len(X_train_small)} train, {len(X_test_small)} test samples")
     return X_train_small, y_train_small, X_test_small, y_test_small, selected_features
 
+def save_preprocessing(selected_features, scaler, stats=None, bundle=None):
+    """Adds the selected feature names, fitted scaler and (optionally) the feature statistics to a model bundle."""
+    def add_preprocessing(b):
+        b.add_json('selected_features.json', selected_features)
+        b.add_joblib('feature_scaler.pkl', scaler)
+        b.set_config(selected_features=selected_features, scaler_feature_range=[0, float(np.pi)])
+        if stats is not None:
+            b.add_json(STATS_FILE, stats.to_dict())
+    publish_or_stage(bundle, add_preprocessing)
+
 # The rest of the functions (train_vqc, evaluate_vqc, save_model_weights) remain the same.
-def train_vqc(X_train, y_train, num_features):
+def train_vqc(X_train, y_train, num_features, profile=None, backend=None, initial_point=None, optimizer=None):
+    """
+    Trains the VQC on a simulation backend (``backend``, default AQVH_SIM_BACKEND or auto;
+    see simulation.py). ``profile`` (default: AQVH_PROFILE_VQC) attaches a VQCProfiler as ``training_profile``.
+    ``initial_point`` (default: random) and ``optimizer`` (default: COBYLA, 100 iterations) let
+    incremental.py warm-start from published weights.
+    """
     print("\nTraining Variational Quantum Classifier...")
-    # (Implementation is the same as before)
-    ansatz = RealAmplitudes(num_qubits=num_features, reps=3, entanglement='linear')
-    vqc = VQC(
-        sampler=Sampler(),
-        feature_map=ZZFeatureMap(feature_dimension=num_features, reps=2, entanglement='linear'),
-        ansatz=ansatz,
-        optimizer=COBYLA(maxiter=100),
-        initial_point=np.random.uniform(0, 2*np.pi, ansatz.num_parameters)
-    )
-    start_time = time.time()
-    vqc.fit(X_train, y_train)
-    training_time = time.time() - start_time
+    profiler = VQCProfiler('VQC', enabled=profile)
+    ansatz = circuit_factory.ansatz(num_features, reps=3)
+    backend = simulation.backend_name(num_features, backend=backend)
+    print(f"  Simulating {num_features} qubits on the {backend} backend")
+    with profiler.phase('circuit_build'):
+        vqc = classifiers.VQC(
+            sampler=simulation.make_sampler(num_features, backend=backend, num_classes=len(np.unique(y_train))),
+            feature_map=circuit_factory.feature_map(num_features, reps=2),
+            ansatz=ansatz,
+            optimizer=optimizer or optimizers.COBYLA(maxiter=100),
+            initial_point=np.random.uniform(0, 2*np.pi, ansatz.num_parameters) if initial_point is None else initial_point,
+            callback=profiler.callback(optimizer_callback('VQC'))
+        )
+    vqc.simulation_backend = backend
+    with training_stage('VQC', 'fit') as stage, profiler.profile(vqc):
+        vqc.fit(X_train, y_train)
+    training_time = stage.elapsed
     print(f"✓ VQC training completed in {training_time:.2f} seconds!")
+    if profiler.enabled:
+        vqc.training_profile = profiler
+        summary = profiler.summary()
+        print(f"  ✓ Profiled {summary['iterations']} evaluations (loss settled at {summary.get('converged_iteration')})")
+        print("    " + ", ".join(f"{phase} {share:.0f}%" for phase, share in summary['phase_share'].items()))
     return vqc, training_time
 
-def evaluate_vqc(model, X_test, y_test, selected_features):
+def evaluate_vqc(model, X_test, y_test, selected_features, bundle=None):
     print("\nEvaluating VQC...")
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
+    with training_stage('VQC', 'evaluate'):
+        y_pred = model.predict(X_test)
+    accuracy = metrics.accuracy_score(y_test, y_pred)
+    precision = metrics.precision_score(y_test, y_pred, average='weighted', zero_division=0)
+    recall = metrics.recall_score(y_test, y_pred, average='weighted', zero_division=0)
+    f1 = metrics.f1_score(y_test, y_pred, average='weighted', zero_division=0)
     print(f"  Accuracy:  {accuracy:.6f}")
-    print(classification_report(y_test, y_pred))
+    print(metrics.classification_report(y_test, y_pred))
 
-    # Save VQC metrics to model_accuracies.json
-    import json
+    # Record VQC metrics in the model bundle (exported to model_accuracies.json on publish)
+    vqc_metrics = {'model': 'VQC', 'accuracy': accuracy, 'precision': precision, 'recall': recall, 'f1': f1}
     try:
-        with open('backend/models/model_accuracies.json', 'r') as f:
-            data = json.load(f)
-        for entry in data:
-            if 'VQC' in entry['model']:
-                entry['accuracy'] = round(accuracy * 100, 2)
-                entry['precision'] = round(precision * 100, 2)
-                entry['recall'] = round(recall * 100, 2)
-                entry['f1Score'] = round(f1 * 100, 2)
-        with open('backend/models/model_accuracies.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        print('✓ VQC metrics updated in model_accuracies.json')
+        publish_or_stage(bundle, lambda b: b.add_metrics('VQC', vqc_metrics))
+        print('✓ VQC metrics recorded')
     except Exception as e:
         print(f'Error updating VQC metrics: {e}')
+    return vqc_metrics
 
-def save_model_weights(model, file_path='backend/models/vqc_weights.npy'):
-    """Saves the trained model's weights to a file."""
-    np.save(file_path, model.weights)
-    print(f"✓ VQC weights saved to {file_path}")
\ No newline at end of file
+def save_model_weights(model, bundle=None):
+    """Adds the trained model's weights to a model bundle (published immediately if none is given)."""
+    def add_weights(b):
+        b.add_npy('vqc_weights.npy', model.weights)
+        b.set_config(vqc_feature_map_reps=circuit_factory.FEATURE_MAP_REPS, vqc_ansatz_reps=circuit_factory.ANSATZ_REPS,
+                     vqc_entanglement=circuit_factory.ENTANGLEMENT, vqc_num_qubits=model.num_qubits,
+                     vqc_simulation_backend=getattr(model, 'simulation_backend', None))
+        profiler = getattr(model, 'training_profile', None)
+        if profiler is not None:
+            profiler.add_to_bundle(b)
+    publish_or_stage(bundle, add_weights)
+    print("✓ VQC weights saved as vqc_weights.npy")
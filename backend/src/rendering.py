@@ -0,0 +1,323 @@
+"""
+Headless rendering of VQC circuit diagrams and metric charts.
+
+Figures are drawn on matplotlib's Agg backend (no display needed) and saved
+as SVG or PNG under ``data/renders/``. Each file name ends in a key that
+hashes what the figure was drawn from:
+
+    circuit   component, width, reps, entanglement, fold, decompose and the
+              qiskit/matplotlib/pylatexenc versions
+    chart     chart name and the version (mtime + size) of its source JSON
+
+A render is reused until its configuration or its data changes; older
+versions of the same figure are deleted when a new one is written.
+
+``Renderer`` runs renders on one background thread, because matplotlib's
+drawing code is not thread-safe. Concurrent requests for the same figure
+share a render, and request threads never draw anything themselves.
+Circuits are drawn with qiskit's ``mpl`` drawer when ``pylatexenc`` is
+installed, and as monospace text otherwise.
+
+    python src/rendering.py                    # default circuit + charts
+    python src/rendering.py circuit --qubits 7 --format png
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from importlib import metadata
+
+import circuit_factory
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RENDER_DIR = os.path.join(BACKEND_DIR, 'data', 'renders')
+MODELS_DIR = os.path.join(BACKEND_DIR, 'models')
+
+FORMATS = {'svg': 'image/svg+xml', 'png': 'image/png'}
+COMPONENTS = ('complete', 'feature_map', 'ansatz')
+MAX_QUBITS = 20
+DEFAULT_QUBITS = int(os.environ.get('AQVH_VQC_FEATURES', 3))
+# Gate columns per row before the drawing wraps
+FOLD = 25
+PNG_DPI = 150
+
+# Chart name -> source file in the models directory
+CHARTS = {
+    'convergence': 'vqc_convergence.json',
+    'accuracies': 'model_accuracies.json',
+}
+
+_matplotlib_lock = threading.Lock()
+_matplotlib_ready = False
+
+
+def _pyplot():
+    """pyplot on the Agg backend; qiskit's mpl drawer creates its figures through pyplot."""
+    global _matplotlib_ready
+    with _matplotlib_lock:
+        if not _matplotlib_ready:
+            import matplotlib
+            matplotlib.use('Agg', force=True)
+            _matplotlib_ready = True
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def save_figure(fig, path, fmt=None):
+    """Writes ``fig`` to ``path`` atomically and closes it."""
+    plt = _pyplot()
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.') or 'png'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    try:
+        fig.savefig(tmp_path, format=fmt, dpi=PNG_DPI, bbox_inches='tight')
+        os.replace(tmp_path, path)
+    finally:
+        plt.close(fig)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+# --- figures ---
+
+def circuit_figure(circuit, title=None, fold=FOLD):
+    """Matplotlib figure of ``circuit``; a monospace text drawing if the mpl drawer is unavailable."""
+    plt = _pyplot()
+    try:
+        fig = circuit.draw(output='mpl', fold=fold)
+    except Exception:
+        # The mpl drawer needs pylatexenc; the text drawing has the same layout
+        text = str(circuit.draw(output='text', fold=fold * 4))
+        lines = text.splitlines() or ['']
+        fig = plt.figure(figsize=(max(4, 0.075 * max(len(line) for line in lines)), max(1.5, 0.16 * len(lines))))
+        fig.text(0, 1, text, family='monospace', fontsize=8, va='top', ha='left')
+    if title:
+        fig.suptitle(title, fontsize=12, fontweight='bold')
+    return fig
+
+
+def convergence_figure(summary):
+    """Loss per optimizer evaluation from vqc_convergence.json, with the iteration it settled at."""
+    plt = _pyplot()
+    losses = summary.get('loss_history') or []
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.plot(range(1, len(losses) + 1), losses, color='#6d28d9', linewidth=1.5, label='loss')
+    if summary.get('converged_iteration'):
+        ax.axvline(summary['converged_iteration'], color='#9ca3af', linestyle='--',
+                   label=f"settled (iteration {summary['converged_iteration']})")
+    ax.set_xlabel('Evaluation')
+    ax.set_ylabel('Loss')
+    ax.set_title(f"{summary.get('model', 'VQC')} training loss")
+    if losses:
+        ax.legend(loc='upper right')
+    ax.grid(alpha=0.3)
+    return fig
+
+
+def accuracies_figure(rows):
+    """Grouped bars of accuracy, precision, recall and F1 per model from model_accuracies.json."""
+    plt = _pyplot()
+    metrics = [('accuracy', 'Accuracy'), ('precision', 'Precision'), ('recall', 'Recall'), ('f1Score', 'F1')]
+    fig, ax = plt.subplots(figsize=(8, 4))
+    width = 0.8 / max(len(rows), 1)
+    for i, row in enumerate(rows):
+        offsets = [j + (i - (len(rows) - 1) / 2) * width for j in range(len(metrics))]
+        ax.bar(offsets, [row.get(key) or 0 for key, _ in metrics], width, label=row.get('model', f'model {i + 1}'))
+    ax.set_xticks(range(len(metrics)))
+    ax.set_xticklabels([label for _, label in metrics])
+    ax.set_ylabel('%')
+    ax.set_ylim(0, 100)
+    ax.set_title('Model metrics')
+    if rows:
+        ax.legend(loc='lower right', fontsize=8)
+    ax.grid(axis='y', alpha=0.3)
+    return fig
+
+
+CHART_FIGURES = {
+    'convergence': convergence_figure,
+    'accuracies': accuracies_figure,
+}
+
+
+# --- render specs ---
+
+def circuit_spec(component='complete', num_qubits=DEFAULT_QUBITS, feature_map_reps=circuit_factory.FEATURE_MAP_REPS,
+                 ansatz_reps=circuit_factory.ANSATZ_REPS, entanglement=circuit_factory.ENTANGLEMENT,
+                 decompose=True, fold=FOLD, fmt='svg'):
+    """Validated description of a circuit diagram."""
+    if component not in COMPONENTS:
+        raise ValueError(f"Unknown circuit component {component!r} (expected one of {', '.join(COMPONENTS)})")
+    if not 1 <= num_qubits <= MAX_QUBITS:
+        raise ValueError(f'num_qubits must be between 1 and {MAX_QUBITS}')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    return {'kind': 'circuit', 'name': component, 'num_qubits': int(num_qubits),
+            'feature_map_reps': int(feature_map_reps), 'ansatz_reps': int(ansatz_reps),
+            'entanglement': entanglement, 'decompose': bool(decompose), 'fold': int(fold), 'format': fmt}
+
+
+def chart_spec(name, fmt='svg'):
+    """Validated description of a metric chart."""
+    if name not in CHARTS:
+        raise ValueError(f"Unknown chart {name!r} (expected one of {', '.join(CHARTS)})")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    return {'kind': 'chart', 'name': name, 'format': fmt}
+
+
+def _circuit(spec):
+    n, fm_reps, ansatz_reps, entanglement = (spec['num_qubits'], spec['feature_map_reps'],
+                                             spec['ansatz_reps'], spec['entanglement'])
+    if spec['name'] == 'feature_map':
+        circuit = circuit_factory.feature_map(n, fm_reps, entanglement)
+    elif spec['name'] == 'ansatz':
+        circuit = circuit_factory.ansatz(n, ansatz_reps, entanglement)
+    else:
+        circuit = circuit_factory.complete_circuit(n, fm_reps, ansatz_reps, entanglement)
+    return circuit.decompose() if spec['decompose'] else circuit
+
+
+@lru_cache(maxsize=None)
+def _drawer_versions():
+    # From package metadata, so computing a cache key does not import qiskit
+    versions = []
+    for package in ('qiskit-terra', 'matplotlib', 'pylatexenc'):
+        try:
+            versions.append(f'{package}={metadata.version(package)}')
+        except metadata.PackageNotFoundError:
+            versions.append(f'{package}=none')
+    return ';'.join(versions)
+
+
+class Renderer:
+    """Disk cache of rendered figures, filled by one background thread."""
+
+    def __init__(self, render_dir=RENDER_DIR, models_dir=MODELS_DIR, observe=None):
+        """
+        ``observe(spec, event, seconds)``, if given, is called with "hit"
+        (already on disk), "joined" (waits for a render in progress) or
+        "miss" (renders), and once more with "rendered" and the render time.
+        """
+        self.render_dir = render_dir
+        self.models_dir = models_dir
+        self._observe = observe
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='aqvh-render')
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _source_path(self, spec):
+        return os.path.join(self.models_dir, CHARTS[spec['name']])
+
+    def _version(self, spec):
+        """What the figure is drawn from besides its spec; raises FileNotFoundError for a missing chart source."""
+        if spec['kind'] == 'circuit':
+            return _drawer_versions()
+        st = os.stat(self._source_path(spec))
+        return f'{st.st_mtime_ns}:{st.st_size}'
+
+    def path(self, spec):
+        """Cache path of ``spec`` at the current version of its inputs."""
+        config = json.dumps({k: v for k, v in spec.items() if k != 'format'}, sort_keys=True)
+        config_hash = hashlib.sha1(config.encode()).hexdigest()[:12]
+        version_hash = hashlib.sha1(f'{config};{self._version(spec)}'.encode()).hexdigest()[:12]
+        return os.path.join(self.render_dir, f"{spec['kind']}-{spec['name']}-{config_hash}-{version_hash}.{spec['format']}")
+
+    def cached(self, spec):
+        """Path of an up-to-date render of ``spec``, or None."""
+        path = self.path(spec)
+        return path if os.path.exists(path) else None
+
+    def _record(self, spec, event, seconds=None):
+        if self._observe:
+            self._observe(spec, event, seconds)
+
+    def submit(self, spec):
+        """Future for the path of ``spec``'s render; renders in the background if it is not on disk."""
+        path = self.path(spec)
+        if os.path.exists(path):
+            self._record(spec, 'hit')
+            future = Future()
+            future.set_result(path)
+            return future
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None:
+                self._record(spec, 'joined')
+                return future
+            self._record(spec, 'miss')
+            future = self._pending[path] = self._pool.submit(self._render, spec, path)
+        future.add_done_callback(lambda _: self._forget(path))
+        return future
+
+    def render(self, spec):
+        """Renders ``spec`` (if needed) and returns its path, blocking until it is done."""
+        return self.submit(spec).result()
+
+    def _forget(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _render(self, spec, path):
+        if os.path.exists(path):
+            return path
+        start = time.perf_counter()
+        if spec['kind'] == 'circuit':
+            circuit = _circuit(spec)
+            fig = circuit_figure(circuit, fold=spec['fold'])
+        else:
+            with open(self._source_path(spec)) as f:
+                fig = CHART_FIGURES[spec['name']](json.load(f))
+        save_figure(fig, path, spec['format'])
+        self._prune(path)
+        self._record(spec, 'rendered', time.perf_counter() - start)
+        return path
+
+    def _prune(self, path):
+        # Older versions of the same figure: same kind, name and config hash
+        name = os.path.basename(path)
+        prefix, ext = name.rsplit('-', 1)[0] + '-', os.path.splitext(name)[1]
+        for other in os.listdir(self.render_dir):
+            if other != name and other.startswith(prefix) and other.endswith(ext):
+                try:
+                    os.remove(os.path.join(self.render_dir, other))
+                except FileNotFoundError:
+                    pass
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Render VQC circuit diagrams and metric charts')
+    parser.add_argument('what', nargs='?', choices=['defaults', 'circuit', 'chart'], default='defaults')
+    parser.add_argument('--component', choices=COMPONENTS, default='complete')
+    parser.add_argument('--qubits', type=int, default=DEFAULT_QUBITS)
+    parser.add_argument('--chart', choices=list(CHARTS), default='convergence')
+    parser.add_argument('--format', choices=list(FORMATS), default='svg')
+    parser.add_argument('--render-dir', default=RENDER_DIR)
+    args = parser.parse_args()
+
+    renderer = Renderer(args.render_dir)
+    if args.what == 'circuit':
+        specs = [circuit_spec(args.component, args.qubits, fmt=args.format)]
+    elif args.what == 'chart':
+        specs = [chart_spec(args.chart, args.format)]
+    else:
+        specs = [circuit_spec(num_qubits=args.qubits, fmt=args.format)]
+        specs += [chart_spec(name, args.format) for name, source in CHARTS.items()
+                  if os.path.exists(os.path.join(MODELS_DIR, source))]
+    for spec in specs:
+        start = time.perf_counter()
+        path = renderer.render(spec)
+        print(f"✓ {spec['kind']} {spec['name']}: {path} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    renderer.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Simulation backends for the VQC (training and inference).
+
+    reference    qiskit's reference Sampler: binds and simulates every circuit
+                 in Python. Fine for a few qubits; always available
+    statevector  Aer statevector. All circuits of a batch go to Aer as one job
+                 (parameter binds, no Python-side binding) and run on
+                 AQVH_SIM_THREADS threads (0: every core). Memory grows as 2^n,
+                 so it is practical up to about 20 qubits
+    mps          Aer matrix product state. The ZZFeatureMap and RealAmplitudes
+                 circuits here use linear entanglement, so the bond dimension
+                 stays bounded by the number of entangling layers rather than
+                 the width
+    auto         statevector or mps, from the circuit's width and depth
+                 (``select_backend``); reference when Aer is not installed
+
+Samplers from ``make_sampler`` only measure the qubits the VQC's class
+labels depend on. The VQC maps a measured integer to class ``x % classes``,
+so for two (or any power of two) classes only the lowest log2(classes) bits
+matter. Measuring just those gives the same class probabilities, but the
+simulator returns 2 outcomes per sample instead of 2^n. At 20 qubits,
+converting the full distribution took most of the runtime.
+
+AQVH_SIM_BACKEND selects the backend (default ``auto``).
+"""
+import math
+import os
+import threading
+from functools import lru_cache
+
+from lazy_imports import lazy_import
+import circuit_factory
+
+qiskit = lazy_import('qiskit')
+
+BACKENDS = ('auto', 'reference', 'statevector', 'mps')
+BACKEND_ENV = 'AQVH_SIM_BACKEND'
+THREADS = int(os.environ.get('AQVH_SIM_THREADS', 0))
+# Statevector memory budget (per state, times the states simulated in parallel)
+MEMORY_BUDGET_MB = float(os.environ.get('AQVH_SIM_MEMORY_MB', 4096))
+
+STATEVECTOR_MAX_QUBITS = 20
+
+
+def aer_available():
+    try:
+        import qiskit_aer  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def readout_qubits(num_qubits, num_classes=2):
+    """Lowest qubits that determine ``x % num_classes`` (all of them unless it is a power of two)."""
+    bits = int(math.log2(num_classes)) if num_classes > 1 else 1
+    return bits if 2 ** bits == num_classes and bits <= num_qubits else num_qubits
+
+
+def statevector_mb(num_qubits):
+    """Memory of one complex128 statevector."""
+    return 16 * 2 ** num_qubits / 2 ** 20
+
+
+def _two_qubit_pairs(circuit):
+    # Decompose until the feature map / ansatz blocks are single- and two-qubit gates
+    flat = circuit
+    for _ in range(4):
+        if all(len(item.qubits) <= 2 for item in flat.data):
+            break
+        flat = flat.decompose()
+    pairs = []
+    for item in flat.data:
+        if item.operation.name in ('measure', 'barrier'):
+            continue
+        if len(item.qubits) > 2:
+            return None
+        if len(item.qubits) == 2:
+            pairs.append(tuple(sorted(flat.find_bit(q).index for q in item.qubits)))
+    return flat, pairs
+
+
+def circuit_profile(circuit):
+    """
+    Width, depth and what they mean for each backend: statevector memory,
+    whether all two-qubit gates act on neighbouring qubits (linear), and an
+    upper bound on the MPS bond dimension across the widest cut.
+    """
+    n = circuit.num_qubits
+    profile = {'qubits': n, 'statevector_mb': round(statevector_mb(n), 3)}
+    decomposed = _two_qubit_pairs(circuit)
+    if decomposed is None:
+        profile.update(depth=circuit.depth(), gates=len(circuit.data), linear=False, max_bond=None)
+        return profile
+    flat, pairs = decomposed
+    linear = all(b - a == 1 for a, b in pairs)
+    # Each two-qubit gate across a cut can at most double (CX, RZZ) the Schmidt rank there;
+    # the rank is also capped by the smaller side of the cut
+    max_bond = 1
+    for cut in range(1, n):
+        crossing = sum(1 for a, b in pairs if a < cut <= b)
+        max_bond = max(max_bond, 2 ** min(crossing, cut, n - cut))
+    profile.update(depth=flat.depth(), gates=len(flat.data), linear=linear, max_bond=max_bond)
+    return profile
+
+
+def select_backend(circuit, threads=None):
+    """
+    Chooses a backend for ``circuit``; returns (name, reason).
+
+    Statevector costs about gates x 2^n and needs 2^n memory per state in
+    flight; MPS costs about gates x bond^3 and is only exact here for linear
+    circuits. The cheaper feasible one wins. Even at 3 qubits, Aer's batched
+    statevector was about 4x faster than the reference Sampler for a
+    300-sample batch, so the reference Sampler is only the fallback.
+    """
+    profile = circuit_profile(circuit)
+    n = profile['qubits']
+    if not aer_available():
+        return 'reference', dict(profile, reason='qiskit-aer not installed')
+    parallel = threads or THREADS or os.cpu_count() or 1
+    fits = n <= STATEVECTOR_MAX_QUBITS and profile['statevector_mb'] * parallel <= MEMORY_BUDGET_MB
+    if profile['linear'] and profile['max_bond'] is not None:
+        gates = profile['gates']
+        sv_cost = gates * 2 ** n
+        mps_cost = gates * profile['max_bond'] ** 3
+        profile.update(statevector_cost=sv_cost, mps_cost=mps_cost)
+        if not fits or mps_cost < sv_cost:
+            return 'mps', dict(profile, reason=f"linear entanglement, bond dimension <= {profile['max_bond']}")
+    if fits:
+        return 'statevector', dict(profile, reason=f"{profile['statevector_mb']} MB per state")
+    raise ValueError(f"No simulation backend for a {n}-qubit circuit: the statevector does not fit in "
+                     f"{MEMORY_BUDGET_MB:.0f} MB and the entanglement is not linear")
+
+
+def _marginal(circuit, readout):
+    """``circuit`` with its final measurements replaced by measurements of the lowest ``readout`` qubits."""
+    if readout >= circuit.num_qubits:
+        return circuit
+    out = circuit.remove_final_measurements(inplace=False)
+    creg = qiskit.ClassicalRegister(readout, 'c')
+    out.add_register(creg)
+    out.measure(list(range(readout)), creg)
+    return out
+
+
+def _readout_sampler(base):
+    """Subclass of a V1 Sampler that measures only the readout qubits of each circuit."""
+
+    class ReadoutSampler(base):
+        def __init__(self, readout, **options):
+            super().__init__(**options)
+            self.readout = readout
+            self._marginals = {}
+            self._marginals_lock = threading.Lock()
+
+        def _marginal(self, circuit):
+            entry = self._marginals.get(id(circuit))
+            if entry is None or entry[0] is not circuit:
+                # Keeps the original alive so its id() cannot be reused by another circuit
+                entry = (circuit, _marginal(circuit, self.readout))
+                with self._marginals_lock:
+                    self._marginals[id(circuit)] = entry
+            return entry[1]
+
+        def _run(self, circuits, parameter_values, **run_options):
+            return super()._run([self._marginal(c) for c in circuits], parameter_values, **run_options)
+
+    ReadoutSampler.__name__ = ReadoutSampler.__qualname__ = f'Readout{base.__name__}'
+    return ReadoutSampler
+
+
+_sampler_classes = {}
+
+
+def _sampler_class(kind):
+    cls = _sampler_classes.get(kind)
+    if cls is None:
+        if kind == 'reference':
+            base = circuit_factory.sampler_class()
+        else:
+            from qiskit_aer.primitives import Sampler as base
+        cls = _sampler_classes[kind] = _readout_sampler(base)
+    return cls
+
+
+@lru_cache(maxsize=None)
+def _auto_backend(num_qubits):
+    return select_backend(circuit_factory.complete_circuit(num_qubits, measure=False))[0]
+
+
+def backend_name(num_qubits=None, circuit=None, backend=None):
+    """Resolves ``backend`` (default: AQVH_SIM_BACKEND, then auto) to a concrete backend name."""
+    backend = backend or os.environ.get(BACKEND_ENV, 'auto')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown simulation backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    if backend == 'auto':
+        # The default VQC circuits are profiled once per width
+        backend = _auto_backend(num_qubits) if circuit is None else select_backend(circuit)[0]
+    return backend
+
+
+def make_sampler(num_qubits=None, circuit=None, backend=None, num_classes=2, shots=None, seed=None,
+                 threads=None):
+    """
+    Sampler for a VQC over ``num_qubits`` (or ``circuit``) on the given backend.
+
+    ``shots=None`` returns exact probabilities on every backend.
+    """
+    num_qubits = circuit.num_qubits if circuit is not None else num_qubits
+    kind = backend_name(num_qubits, circuit, backend)
+    readout = readout_qubits(num_qubits, num_classes)
+    cls = _sampler_class(kind)
+    if kind == 'reference':
+        options = {'shots': shots, 'seed': seed} if shots else {}
+        return cls(readout, options=options)
+    threads = THREADS if threads is None else threads
+    backend_options = {
+        'method': 'statevector' if kind == 'statevector' else 'matrix_product_state',
+        'max_parallel_threads': threads,
+        # Parallelize over the batch's circuits; Aer switches to parallel gates for wide states
+        'max_parallel_experiments': 0,
+    }
+    run_options = {'shots': shots}
+    if seed is not None:
+        run_options['seed'] = seed
+    return cls(readout, backend_options=backend_options, run_options=run_options)
@@ -0,0 +1,422 @@
+"""
+Lightweight metrics and structured logging for the API and the training scripts.
+
+Metrics follow the Prometheus data model (counters, gauges, histograms with
+labels) and render in the text exposition format for ``/metrics``, with no
+client library dependency. Recording is a dict lookup plus a short locked
+update, so instrumentation can sit on the request hot path.
+
+Processes share metrics through a directory: when ``AQVH_METRICS_DIR`` is
+set, every process (API workers, train.py, batch jobs) periodically writes
+its samples to ``<dir>/<pid>.json`` and ``render()`` merges them. Counters
+and histograms are summed across processes; gauges keep a ``pid`` label.
+
+Structured logs are JSON lines on the ``aqvh`` logger (``log_event``).
+``AQVH_LOG_LEVEL`` sets the level (default INFO), and
+``AQVH_LOG_FORMAT=text`` switches to plain text.
+"""
+import atexit
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+METRICS_DIR_ENV = 'AQVH_METRICS_DIR'
+SNAPSHOT_INTERVAL = float(os.environ.get('AQVH_METRICS_INTERVAL', 5))
+
+# Latency buckets (seconds) from sub-millisecond cache hits to multi-minute training
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class _Child:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager observing the elapsed seconds; ``elapsed`` is set on exit."""
+    __slots__ = ('_target', '_start', 'elapsed')
+
+    def __init__(self, target):
+        self._target = target
+        self.elapsed = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self._target.observe(self.elapsed)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return _Child()
+
+    def labels(self, *values):
+        """The child for one label combination (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+                self._children[values] = child
+        return child
+
+    def _items(self):
+        # Children are also keyed by the caller's raw values; report each once
+        seen = set()
+        for values, child in list(self._children.items()):
+            if id(child) not in seen:
+                seen.add(id(child))
+                yield tuple(str(v) for v in values), child
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in self._items():
+            yield self.name + '_total', dict(zip(self.labelnames, values)), child.value
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def samples(self):
+        for values, child in self._items():
+            yield self.name, dict(zip(self.labelnames, values)), child.value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self, *labels):
+        return _Timer(self.labels(*labels))
+
+    def samples(self):
+        for values, child in self._items():
+            labels = dict(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                yield self.name + '_bucket', {**labels, 'le': _format_value(bound)}, cumulative
+            yield self.name + '_sum', labels, child.sum
+            yield self.name + '_count', labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules may be imported more than once (e.g. as scripts); reuse the first
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def register_collector(self, collect):
+        """``collect()`` returns [(name, kind, help, [(sample_name, labels, value), ...])] at render time."""
+        self._collectors.append(collect)
+
+    def families(self):
+        """Current samples of this process as {name: {kind, help, samples: [[sample, labels, value]]}}."""
+        families = {}
+        for metric in list(self._metrics.values()):
+            families[metric.name] = {'kind': metric.kind, 'help': metric.documentation,
+                                     'samples': [[s, labels, value] for s, labels, value in metric.samples()]}
+        for collect in self._collectors:
+            try:
+                for name, kind, documentation, samples in collect():
+                    families[name] = {'kind': kind, 'help': documentation,
+                                      'samples': [[s, labels, value] for s, labels, value in samples]}
+            except Exception as e:
+                log_event('metrics_collector_failed', level=logging.WARNING, error=str(e))
+        return families
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY._register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY._register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY._register(Histogram(name, documentation, labelnames, buckets))
+
+
+# --- Rendering and cross-process merging ---
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _merge(target, families, pid):
+    for name, family in families.items():
+        merged = target.setdefault(name, {'kind': family['kind'], 'help': family['help'], 'samples': {}})
+        for sample, labels, value in family['samples']:
+            if family['kind'] == 'gauge' and pid is not None:
+                labels = {**labels, 'pid': str(pid)}
+            key = (sample, tuple(sorted(labels.items())))
+            if family['kind'] == 'gauge':
+                merged['samples'][key] = value
+            else:
+                merged['samples'][key] = merged['samples'].get(key, 0) + value
+
+
+def render(metrics_dir=None):
+    """Prometheus text exposition of this process, merged with other processes' snapshots if configured."""
+    metrics_dir = metrics_dir or os.environ.get(METRICS_DIR_ENV)
+    merged = {}
+    if metrics_dir:
+        write_snapshot(metrics_dir)
+        for file_name in sorted(os.listdir(metrics_dir)):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(metrics_dir, file_name)) as f:
+                    _merge(merged, json.load(f), file_name[:-5])
+            except (OSError, ValueError):
+                continue
+    else:
+        _merge(merged, REGISTRY.families(), None)
+
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for (sample, labels), value in family['samples'].items():
+            label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+            lines.append(f"{sample}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{sample} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_snapshot(metrics_dir=None):
+    """Writes this process's samples to ``<metrics_dir>/<pid>.json`` (atomically)."""
+    metrics_dir = metrics_dir or os.environ.get(METRICS_DIR_ENV)
+    if not metrics_dir:
+        return
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, f'{os.getpid()}.json')
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(REGISTRY.families(), f)
+    os.replace(tmp, path)
+
+
+_snapshot_thread = None
+
+
+def start_snapshots(interval=SNAPSHOT_INTERVAL):
+    """Writes snapshots every ``interval`` seconds and at exit, if AQVH_METRICS_DIR is set."""
+    global _snapshot_thread
+    if not os.environ.get(METRICS_DIR_ENV) or _snapshot_thread is not None:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot()
+            except OSError as e:
+                log_event('metrics_snapshot_failed', level=logging.WARNING, error=str(e))
+
+    _snapshot_thread = threading.Thread(target=loop, name='aqvh-metrics', daemon=True)
+    _snapshot_thread.start()
+    atexit.register(write_snapshot)
+
+
+# --- Structured logs ---
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {'ts': round(record.created, 3), 'level': record.levelname.lower(), 'event': record.getMessage()}
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+logger = logging.getLogger('aqvh')
+
+
+def configure_logging():
+    """Attaches the JSON (or text) handler to the ``aqvh`` logger once."""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    if os.environ.get('AQVH_LOG_FORMAT', 'json') == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s %(fields)s'))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get('AQVH_LOG_LEVEL', 'INFO').upper())
+    logger.propagate = False
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """Logs ``event`` with key/value fields; free when the level is disabled."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+
+# --- Shared metrics ---
+
+http_request_seconds = histogram('aqvh_http_request_duration_seconds', 'API request latency', ('route', 'method', 'status'))
+http_in_flight = gauge('aqvh_http_requests_in_flight', 'API requests currently being handled')
+cache_requests = counter('aqvh_cache_requests', 'Response cache lookups by result', ('cache', 'result'))
+payload_stage_seconds = histogram('aqvh_payload_stage_seconds', 'Time to load/parse, serialize and compress endpoint payloads',
+                                  ('endpoint', 'stage'))
+model_load_seconds = histogram('aqvh_model_load_seconds', 'Model and preprocessor load time', ('model',))
+inference_seconds = histogram('aqvh_inference_seconds', 'Model inference time per call', ('model',))
+inference_rows = counter('aqvh_inference_rows', 'Rows scored', ('model',))
+vqc_shots = counter('aqvh_vqc_shots', 'Circuit shots spent on VQC inference', ('mode',))
+training_stage_seconds = histogram('aqvh_training_stage_seconds', 'Training time per model and stage', ('model', 'stage'))
+optimizer_iteration_seconds = histogram('aqvh_optimizer_iteration_seconds', 'Time between optimizer callbacks', ('model',))
+optimizer_iterations = counter('aqvh_optimizer_iterations', 'Optimizer objective evaluations', ('model',))
+optimizer_loss = gauge('aqvh_optimizer_loss', 'Latest optimizer objective value', ('model',))
+upstream_seconds = histogram('aqvh_upstream_request_duration_seconds', 'Latency of calls to external services',
+                             ('service', 'operation', 'outcome'))
+
+
+class upstream_call:
+    """Times a call to an external service: ``with upstream_call('yfinance', 'history'): ...``."""
+    __slots__ = ('service', 'operation', '_start')
+
+    def __init__(self, service, operation):
+        self.service = service
+        self.operation = operation
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        outcome = 'error' if exc_type else 'ok'
+        upstream_seconds.labels(self.service, self.operation, outcome).observe(elapsed)
+        log_event('upstream_call', level=logging.DEBUG if outcome == 'ok' else logging.WARNING,
+                  service=self.service, operation=self.operation, outcome=outcome, seconds=round(elapsed, 4))
+
+
+def optimizer_callback(model, log_every=10):
+    """VQC/COBYLA callback recording iteration time and loss (and logging every ``log_every`` iterations)."""
+    state = {'last': time.perf_counter(), 'iteration': 0}
+    iterations = optimizer_iterations.labels(model)
+    iteration_seconds = optimizer_iteration_seconds.labels(model)
+    loss = optimizer_loss.labels(model)
+
+    def callback(weights, objective_value):
+        now = time.perf_counter()
+        iteration_seconds.observe(now - state['last'])
+        state['last'] = now
+        state['iteration'] += 1
+        iterations.inc()
+        loss.set(objective_value)
+        if state['iteration'] % log_every == 0:
+            log_event('optimizer_progress', model=model, iteration=state['iteration'], loss=float(objective_value))
+
+    return callback
+
+
+class training_stage:
+    """Times one training stage, records it and logs it: ``with training_stage('SVM', 'fit') as t: ...``."""
+    __slots__ = ('model', 'stage', '_timer', 'elapsed')
+
+    def __init__(self, model, stage):
+        self.model = model
+        self.stage = stage
+        self.elapsed = None
+
+    def __enter__(self):
+        self._timer = training_stage_seconds.time(self.model, self.stage).__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._timer.__exit__(*exc)
+        self.elapsed = self._timer.elapsed
+        log_event('training_stage', model=self.model, stage=self.stage, seconds=round(self.elapsed, 4),
+                  failed=exc[0] is not None)
@@ -1,18 +1,47 @@
+import argparse
+import os
+
 from pre_processing import load_data, preprocess_for_ml
 from classical_model import train_svm, evaluate_svm, save_model as save_svm
 from quantum_model import prepare_data_for_vqc, train_vqc, evaluate_vqc, save_model_weights as save_vqc_weights
+from artifact_store import default_store
+from inference_bundle import FILE_NAME as INFERENCE_BUNDLE, export_inference_bundle
+import telemetry
 
 if __name__ == "__main__":
-    data = load_data()
-    X_train, X_test, y_train, y_test = preprocess_for_ml(data)
+    parser = argparse.ArgumentParser(description="Train and publish the SVM and VQC models")
+    parser.add_argument("--incremental", action="store_true",
+                        help="warm-start from the published bundle if the new rows drift (see incremental.py)")
+    parser.add_argument("--force", action="store_true", help="with --incremental, retrain even without drift")
+    parser.add_argument("--compare", action="store_true",
+                        help="with --incremental, also time a cold retrain (not published) and compare metrics")
+    args = parser.parse_args()
+
+    # JSON stage/optimizer logs; metrics reach /metrics when AQVH_METRICS_DIR is shared with the API
+    telemetry.configure_logging()
+    telemetry.start_snapshots()
+    # AQVH_TRAIN_TICKER (e.g. ^FTSE) builds the dataset from the local market-data store instead of dataset.csv
+    data = load_data(ticker=os.environ.get('AQVH_TRAIN_TICKER'))
+    if args.incremental:
+        from incremental import incremental_retrain
+        incremental_retrain(data, force=args.force, compare=args.compare)
+    else:
+        X_train, X_test, y_train, y_test = preprocess_for_ml(data)
 
-    X_train_small, y_train_small, X_test_small, y_test_small, selected_features = prepare_data_for_vqc(X_train, y_train, X_test, y_test)
+        # Everything trained below is published together as one model bundle
+        bundle = default_store().bundle()
+
+        X_train_small, y_train_small, X_test_small, y_test_small, selected_features = prepare_data_for_vqc(X_train, y_train, X_test, y_test, bundle=bundle)
     
-    svm_model, _ = train_svm(X_train_small, y_train_small)
-    evaluate_svm(svm_model, X_test_small, y_test_small)
-    save_svm(svm_model)
+        svm_model, _ = train_svm(X_train_small, y_train_small)
+        evaluate_svm(svm_model, X_test_small, y_test_small, bundle=bundle)
+        save_svm(svm_model, bundle=bundle)
+
+        vqc_model, _ = train_vqc(X_train_small, y_train_small, num_features=X_train_small.shape[1])
+        evaluate_vqc(vqc_model, X_test_small, y_test_small, selected_features, bundle=bundle)
+        # Save the VQC model's weights
+        save_vqc_weights(vqc_model, bundle=bundle)
 
-    vqc_model, _ = train_vqc(X_train_small, y_train_small, num_features=X_train_small.shape[1])
-    evaluate_vqc(vqc_model, X_test_small, y_test_small, selected_features)
-    # Save the VQC model's weights
-    save_vqc_weights(vqc_model)
\ No newline at end of file
+        # Flat, memory-mappable bundle for the sklearn-free predictor
+        bundle.add_file(INFERENCE_BUNDLE, lambda path: export_inference_bundle(bundle.staging, path))
+        bundle.publish()
\ No newline at end of file
@@ -3,17 +3,19 @@ Optimized Quantum Circuit Design & Visualization for VQC using Qiskit
 Production-ready version of the notebook's circuit designer class.
 """
 
+import os
 import numpy as np
-import matplotlib.pyplot as plt
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
-from qiskit.circuit.library import ZZFeatureMap, RealAmplitudes
-from qiskit.visualization import plot_histogram
 from qiskit.quantum_info import SparsePauliOp
 from qiskit.primitives import Sampler, Estimator
 from qiskit.circuit import Parameter, ParameterVector
 import warnings
 warnings.filterwarnings('ignore')
 
+import circuit_factory
+import rendering
+import simulation
+
 try:
     from qiskit_machine_learning.neural_networks import EstimatorQNN
     from qiskit_machine_learning.algorithms.classifiers import VQC
@@ -35,6 +37,8 @@ class OptimizedVQCDesigner:
         self.feature_map = None
         self.ansatz = None
         self.complete_circuit = None
+        # Metrics per component, computed once after the component is built
+        self._metrics = {}
         
         print("🔬 OPTIMIZED VQC DESIGNER INITIALIZED")
         print("=" * 50)
@@ -44,29 +48,29 @@ class OptimizedVQCDesigner:
         print(f"   • Ansatz: RealAmplitudes (reps: {ansatz_reps})")
         print(f"   • QML Available: {QML_AVAILABLE}")
     
+    def metrics(self, component):
+        """Memoized depth/gate/parameter counts of 'feature_map', 'ansatz' or 'complete_circuit'."""
+        cached = self._metrics.get(component)
+        if cached is None:
+            cached = self._metrics[component] = circuit_factory.summarize(getattr(self, component))
+        return cached
+
     def create_zz_feature_map(self):
         """Create ZZFeatureMap for data encoding (version-compatible)"""
         print(f"\n🎯 CREATING ZZ FEATURE MAP")
         print("-" * 30)
         
         try:
-            # Version-compatible ZZFeatureMap creation
-            self.feature_map = ZZFeatureMap(
-                feature_dimension=self.num_qubits,
-                reps=self.feature_map_reps,
-                entanglement='linear'
-                # Removed data_map_func to avoid compatibility issues
-            )
-            
-            # Force build to check for errors early
-            _ = self.feature_map.num_parameters
+            # Built once per configuration and shared with training/inference
+            self.feature_map = circuit_factory.feature_map(self.num_qubits, self.feature_map_reps, 'linear')
+            self._metrics.pop('feature_map', None)
             
             print(f"✅ ZZFeatureMap created successfully")
             print(f"   • Feature dimension: {self.num_qubits}")
             print(f"   • Repetitions: {self.feature_map_reps}")
             print(f"   • Entanglement: linear")
-            print(f"   • Parameters: {self.feature_map.num_parameters}")
-            print(f"   • Depth: {self.feature_map.depth()}")
+            print(f"   • Parameters: {self.metrics('feature_map')['parameters']}")
+            print(f"   • Depth: {self.metrics('feature_map')['depth']}")
             
         except Exception as e:
             print(f"❌ Error creating ZZFeatureMap: {e}")
@@ -82,6 +86,7 @@ class OptimizedVQCDesigner:
         # Create manual feature map circuit
         qr = QuantumRegister(self.num_qubits, 'q')
         self.feature_map = QuantumCircuit(qr)
+        self._metrics.pop('feature_map', None)
         
         # Create feature parameters
         features = ParameterVector('x', self.num_qubits)
@@ -105,22 +110,16 @@ class OptimizedVQCDesigner:
         print("-" * 35)
         
         try:
-            self.ansatz = RealAmplitudes(
-                num_qubits=self.num_qubits,
-                reps=self.ansatz_reps,
-                entanglement='linear',
-                skip_final_rotation_layer=False
-            )
-            
-            # Force build to check for errors early
-            _ = self.ansatz.num_parameters
+            # Built once per configuration and shared with training/inference
+            self.ansatz = circuit_factory.ansatz(self.num_qubits, self.ansatz_reps, 'linear')
+            self._metrics.pop('ansatz', None)
             
             print(f"✅ RealAmplitudes ansatz created successfully")
             print(f"   • Qubits: {self.num_qubits}")
             print(f"   • Repetitions: {self.ansatz_reps}")
             print(f"   • Entanglement: linear")
-            print(f"   • Parameters: {self.ansatz.num_parameters}")
-            print(f"   • Depth: {self.ansatz.depth()}")
+            print(f"   • Parameters: {self.metrics('ansatz')['parameters']}")
+            print(f"   • Depth: {self.metrics('ansatz')['depth']}")
             
         except Exception as e:
             print(f"❌ Error creating RealAmplitudes: {e}")
@@ -135,6 +134,7 @@ class OptimizedVQCDesigner:
         
         qr = QuantumRegister(self.num_qubits, 'q')
         self.ansatz = QuantumCircuit(qr)
+        self._metrics.pop('ansatz', None)
         
         # Calculate number of parameters needed
         # RealAmplitudes: (reps + 1) * num_qubits parameters
@@ -171,28 +171,36 @@ class OptimizedVQCDesigner:
             return self
         
         try:
-            # Create quantum and classical registers
-            qreg = QuantumRegister(self.num_qubits, 'q')
-            creg = ClassicalRegister(self.num_qubits, 'c')
-            self.complete_circuit = QuantumCircuit(qreg, creg)
-            
-            # Compose feature map and ansatz
-            self.complete_circuit.compose(self.feature_map, qreg, inplace=True)
-            self.complete_circuit.compose(self.ansatz, qreg, inplace=True)
-            
-            # Add measurements
-            self.complete_circuit.measure(qreg, creg)
+            if (self.feature_map is circuit_factory.feature_map(self.num_qubits, self.feature_map_reps, 'linear')
+                    and self.ansatz is circuit_factory.ansatz(self.num_qubits, self.ansatz_reps, 'linear')):
+                # Standard components: reuse the cached composed circuit
+                self.complete_circuit = circuit_factory.complete_circuit(
+                    self.num_qubits, self.feature_map_reps, self.ansatz_reps, 'linear')
+            else:
+                # Create quantum and classical registers
+                qreg = QuantumRegister(self.num_qubits, 'q')
+                creg = ClassicalRegister(self.num_qubits, 'c')
+                self.complete_circuit = QuantumCircuit(qreg, creg)
+
+                # Compose feature map and ansatz
+                self.complete_circuit.compose(self.feature_map, qreg, inplace=True)
+                self.complete_circuit.compose(self.ansatz, qreg, inplace=True)
+
+                # Add measurements
+                self.complete_circuit.measure(qreg, creg)
+            self._metrics.pop('complete_circuit', None)
+            complete = self.metrics('complete_circuit')
             
             print(f"✅ Complete VQC circuit built successfully")
-            print(f"   • Total qubits: {self.complete_circuit.num_qubits}")
-            print(f"   • Circuit depth: {self.complete_circuit.depth()}")
-            print(f"   • Total gates: {len(self.complete_circuit.data)}")
-            print(f"   • Total parameters: {self.complete_circuit.num_parameters}")
+            print(f"   • Total qubits: {complete['qubits']}")
+            print(f"   • Circuit depth: {complete['depth']}")
+            print(f"   • Total gates: {complete['gates']}")
+            print(f"   • Total parameters: {complete['parameters']}")
             
             # Get parameter counts
             try:
-                fm_params = self.feature_map.num_parameters
-                ansatz_params = self.ansatz.num_parameters
+                fm_params = self.metrics('feature_map')['parameters']
+                ansatz_params = self.metrics('ansatz')['parameters']
                 print(f"   • Feature parameters: {fm_params}")
                 print(f"   • Variational parameters: {ansatz_params}")
             except:
@@ -211,6 +219,7 @@ class OptimizedVQCDesigner:
         qreg = QuantumRegister(self.num_qubits, 'q')
         creg = ClassicalRegister(self.num_qubits, 'c')
         self.complete_circuit = QuantumCircuit(qreg, creg)
+        self._metrics.pop('complete_circuit', None)
         
         # Feature encoding
         x = ParameterVector('x', self.num_qubits)
@@ -241,66 +250,31 @@ class OptimizedVQCDesigner:
         
         print("✅ Simple VQC circuit created")
     
-    def visualize_circuits(self):
-        """Visualize the circuits using matplotlib"""
+    def visualize_circuits(self, output_dir=None, fmt='png'):
+        """Render the circuits to image files (headless, Agg backend); returns their paths"""
         print(f"\n🎨 VISUALIZING VQC CIRCUITS")
         print("-" * 30)
         
+        output_dir = output_dir or rendering.RENDER_DIR
+        paths = {}
         try:
-            fig = plt.figure(figsize=(16, 12))
-            
-            # Visualize individual components
-            '''if self.feature_map:
-                print("📊 Drawing ZZFeatureMap...")
-                ax1 = plt.subplot(3, 1, 1)
-                try:
-                    self.feature_map.draw(output='mpl', ax=ax1, fold=15)
-                    ax1.set_title("ZZ Feature Map - Data Encoding Layer", fontsize=14, fontweight='bold')
-                except Exception as e:
-                    print(f"   Drawing fallback for feature map: {e}")
-                    ax1.text(0.5, 0.5, f"ZZFeatureMap\n{self.num_qubits} qubits, {self.feature_map_reps} reps", 
-                            ha='center', va='center', transform=ax1.transAxes, fontsize=12)
-                    ax1.set_title("ZZ Feature Map (Text View)", fontsize=14)
-            
-            if self.ansatz:
-                print("🔧 Drawing RealAmplitudes ansatz...")
-                ax2 = plt.subplot(3, 1, 2)
-                try:
-                    self.ansatz.draw(output='mpl', ax=ax2, fold=15)
-                    ax2.set_title("Real Amplitudes Ansatz - Variational Layer", fontsize=14, fontweight='bold')
-                except Exception as e:
-                    print(f"   Drawing fallback for ansatz: {e}")
-                    ax2.text(0.5, 0.5, f"RealAmplitudes\n{self.num_qubits} qubits, {self.ansatz_reps} reps", 
-                            ha='center', va='center', transform=ax2.transAxes, fontsize=12)
-                    ax2.set_title("Real Amplitudes Ansatz (Text View)", fontsize=14)'''
-            
-            if self.complete_circuit:
-                print("🏗️ Drawing complete VQC circuit...")
-                ax3 = plt.subplot(3, 1, 3)
-                try:
-                    # For large circuits, show only a portion
-                    if self.complete_circuit.depth() > 20:
-                        # Create a simplified view
-                        ax3.text(0.5, 0.5, f"Complete VQC Circuit\nDepth: {self.complete_circuit.depth()}\nParameters: {self.complete_circuit.num_parameters}\nToo complex for full visualization", 
-                                ha='center', va='center', transform=ax3.transAxes, fontsize=12)
-                        ax3.set_title("Complete VQC Circuit (Stats View)", fontsize=14)
-                    else:
-                        self.complete_circuit.draw(output='mpl', ax=ax3, fold=20)
-                        ax3.set_title("Complete VQC Circuit", fontsize=14, fontweight='bold')
-                except Exception as e:
-                    print(f"   Drawing fallback for complete circuit: {e}")
-                    circuit_info = f"Complete VQC Circuit\nDepth: {self.complete_circuit.depth()}\nGates: {len(self.complete_circuit.data)}\nParameters: {self.complete_circuit.num_parameters}"
-                    ax3.text(0.5, 0.5, circuit_info, ha='center', va='center', transform=ax3.transAxes, fontsize=12)
-                    ax3.set_title("Complete VQC Circuit (Info View)", fontsize=14)
-            
-            plt.tight_layout()
-            plt.show()
+            components = [('feature_map', self.feature_map, "ZZ Feature Map - Data Encoding Layer"),
+                          ('ansatz', self.ansatz, "Real Amplitudes Ansatz - Variational Layer"),
+                          ('complete_circuit', self.complete_circuit, "Complete VQC Circuit")]
+            for name, circuit, title in components:
+                if circuit is None:
+                    continue
+                print(f"🏗️ Drawing {title}...")
+                path = os.path.join(output_dir, f"vqc_{name}_{self.num_qubits}q.{fmt}")
+                paths[name] = rendering.save_figure(rendering.circuit_figure(circuit.decompose(), title=title), path, fmt)
+                print(f"   • Saved to {path}")
             
             print("✅ Circuit visualization completed!")
             
         except Exception as e:
             print(f"⚠️ Visualization error: {e}")
             self._text_visualization()
+        return paths
     
     def _text_visualization(self):
         """Text-based circuit visualization"""
@@ -312,9 +286,9 @@ class OptimizedVQCDesigner:
             print(f"   • Type: ZZFeatureMap")
             print(f"   • Qubits: {self.num_qubits}")
             print(f"   • Repetitions: {self.feature_map_reps}")
-            print(f"   • Depth: {self.feature_map.depth()}")
+            print(f"   • Depth: {self.metrics('feature_map')['depth']}")
             try:
-                print(f"   • Parameters: {self.feature_map.num_parameters}")
+                print(f"   • Parameters: {self.metrics('feature_map')['parameters']}")
             except:
                 print(f"   • Parameters: Available")
         
@@ -323,17 +297,17 @@ class OptimizedVQCDesigner:
             print(f"   • Type: RealAmplitudes")
             print(f"   • Qubits: {self.num_qubits}")
             print(f"   • Repetitions: {self.ansatz_reps}")
-            print(f"   • Depth: {self.ansatz.depth()}")
+            print(f"   • Depth: {self.metrics('ansatz')['depth']}")
             try:
-                print(f"   • Parameters: {self.ansatz.num_parameters}")
+                print(f"   • Parameters: {self.metrics('ansatz')['parameters']}")
             except:
                 print(f"   • Parameters: Available")
         
         if self.complete_circuit:
             print(f"\n🏗️ Complete Circuit:")
-            print(f"   • Total depth: {self.complete_circuit.depth()}")
-            print(f"   • Total parameters: {self.complete_circuit.num_parameters}")
-            print(f"   • Gate count: {len(self.complete_circuit.data)}")
+            print(f"   • Total depth: {self.metrics('complete_circuit')['depth']}")
+            print(f"   • Total parameters: {self.metrics('complete_circuit')['parameters']}")
+            print(f"   • Gate count: {self.metrics('complete_circuit')['gates']}")
     
     def analyze_circuit_properties(self):
         """Analyze circuit properties with error handling"""
@@ -344,11 +318,11 @@ class OptimizedVQCDesigner:
         if self.feature_map:
             print(f"\n📊 ZZFeatureMap Analysis:")
             try:
-                print(f"   • Depth: {self.feature_map.depth()}")
-                print(f"   • Width: {self.feature_map.num_qubits} qubits")
-                print(f"   • Parameters: {self.feature_map.num_parameters}")
+                print(f"   • Depth: {self.metrics('feature_map')['depth']}")
+                print(f"   • Width: {self.metrics('feature_map')['qubits']} qubits")
+                print(f"   • Parameters: {self.metrics('feature_map')['parameters']}")
                 print(f"   • Repetitions: {self.feature_map_reps}")
-                print(f"   • Gate count: {len(self.feature_map.data)}")
+                print(f"   • Gate count: {self.metrics('feature_map')['gates']}")
             except Exception as e:
                 print(f"   • Analysis error: {e}")
                 print(f"   • Basic info: Available")
@@ -356,11 +330,11 @@ class OptimizedVQCDesigner:
         if self.ansatz:
             print(f"\n🔧 RealAmplitudes Analysis:")
             try:
-                print(f"   • Depth: {self.ansatz.depth()}")
-                print(f"   • Width: {self.ansatz.num_qubits} qubits")
-                print(f"   • Parameters: {self.ansatz.num_parameters}")
+                print(f"   • Depth: {self.metrics('ansatz')['depth']}")
+                print(f"   • Width: {self.metrics('ansatz')['qubits']} qubits")
+                print(f"   • Parameters: {self.metrics('ansatz')['parameters']}")
                 print(f"   • Repetitions: {self.ansatz_reps}")
-                print(f"   • Gate count: {len(self.ansatz.data)}")
+                print(f"   • Gate count: {self.metrics('ansatz')['gates']}")
             except Exception as e:
                 print(f"   • Analysis error: {e}")
                 print(f"   • Basic info: Available")
@@ -368,16 +342,20 @@ class OptimizedVQCDesigner:
         if self.complete_circuit:
             print(f"\n🏗️ Complete VQC Analysis:")
             try:
-                print(f"   • Total depth: {self.complete_circuit.depth()}")
-                print(f"   • Total width: {self.complete_circuit.num_qubits} qubits")
-                print(f"   • Total parameters: {self.complete_circuit.num_parameters}")
-                print(f"   • Total gates: {len(self.complete_circuit.data)}")
-                print(f"   • Classical bits: {self.complete_circuit.num_clbits}")
+                print(f"   • Total depth: {self.metrics('complete_circuit')['depth']}")
+                print(f"   • Total width: {self.metrics('complete_circuit')['qubits']} qubits")
+                print(f"   • Total parameters: {self.metrics('complete_circuit')['parameters']}")
+                print(f"   • Total gates: {self.metrics('complete_circuit')['gates']}")
+                print(f"   • Classical bits: {self.metrics('complete_circuit')['classical_bits']}")
                 
                 # Performance estimates
                 state_space = 2**self.num_qubits
                 print(f"   • State space: 2^{self.num_qubits} = {state_space:,}")
-                print(f"   • Simulation complexity: {'Feasible' if self.num_qubits <= 12 else 'High'}")
+                try:
+                    backend, reason = simulation.select_backend(self.complete_circuit)
+                    print(f"   • Simulation backend: {backend} ({reason['reason']})")
+                except ValueError as e:
+                    print(f"   • Simulation backend: none ({e})")
                 
             except Exception as e:
                 print(f"   • Analysis error: {e}")
@@ -452,11 +430,11 @@ class OptimizedVQCDesigner:
         if self.complete_circuit:
             try:
                 summary['circuit_properties'] = {
-                    'depth': self.complete_circuit.depth(),
-                    'parameters': self.complete_circuit.num_parameters,
-                    'gates': len(self.complete_circuit.data),
-                    'qubits': self.complete_circuit.num_qubits,
-                    'classical_bits': self.complete_circuit.num_clbits
+                    'depth': self.metrics('complete_circuit')['depth'],
+                    'parameters': self.metrics('complete_circuit')['parameters'],
+                    'gates': self.metrics('complete_circuit')['gates'],
+                    'qubits': self.metrics('complete_circuit')['qubits'],
+                    'classical_bits': self.metrics('complete_circuit')['classical_bits']
                 }
                 summary['ready_for_training'] = True
             except:
@@ -486,7 +464,7 @@ def main():
     try:
         # Initialize designer
         designer = OptimizedVQCDesigner(
-            num_qubits=3,
+            num_qubits=int(os.environ.get('AQVH_VQC_FEATURES', 3)),
             feature_map_reps=2,
             ansatz_reps=3
         )
@@ -500,12 +478,8 @@ def main():
         print("\n🔄 Building complete VQC...")
         designer.build_complete_vqc_circuit()
 
-        if designer.complete_circuit:
-            decomposed_circuit = designer.complete_circuit.decompose()
-            display(decomposed_circuit.draw(output='mpl', fold=50))
-        else:
+        if not designer.complete_circuit:
             print("No complete circuit available for visualization.")
-
         
         # Visualize circuits
         print("\n🔄 Visualizing circuits...")
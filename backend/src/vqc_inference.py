@@ -0,0 +1,192 @@
+"""
+VQC inference with an explicit accuracy/latency (or cost) trade-off.
+
+``VQC.predict`` returns whatever its sampler produces, and that depends on
+the sampler's shot settings. ``predict_vqc`` takes the mode instead:
+
+    exact     class probabilities from the simulator (no shot noise); local only
+    shots     every sample measured ``shots`` times
+    adaptive  every sample measured ``initial_shots`` times, then the shots are
+              doubled only for samples whose class margin (top probability minus
+              runner-up) is still within its ``confidence`` interval of zero,
+              i.e. whose predicted class could still flip, up to ``max_shots``
+
+Without ``sampler``, the shot modes run on a shot-based sampler for the
+VQC's simulation backend (``simulation.make_sampler``), so every reported
+shot was actually run. Pass ``sampler`` (e.g. a Qiskit Runtime SamplerV2 on
+IBM hardware, or ibm_emulation.make_sampler) to run them there instead; the
+adaptive mode then spends shots only on the samples that need them.
+
+Every prediction comes back with its class probabilities, margin and the
+number of shots used (0 in exact mode).
+"""
+import inspect
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import simulation
+
+MODES = ('exact', 'shots', 'adaptive')
+DEFAULT_SHOTS = 1024
+DEFAULT_INITIAL_SHOTS = 64
+DEFAULT_MAX_SHOTS = 4096
+DEFAULT_CONFIDENCE = 0.95
+
+
+def _classes(vqc):
+    """Class labels in output order (the VQC one-hot encodes its training labels)."""
+    encoder = getattr(vqc, '_encoder', None)
+    if encoder is not None:
+        return encoder.categories_[0]
+    return np.arange(vqc.neural_network.output_shape[0])
+
+
+def _bindings(vqc, X):
+    """One {parameter: value} dict per sample (inputs followed by the trained weights)."""
+    qnn = vqc.neural_network
+    parameters = list(qnn.input_params) + list(qnn.weight_params)
+    weights = np.asarray(vqc.weights, dtype=float)
+    return [dict(zip(parameters, np.concatenate([row, weights]))) for row in np.asarray(X, dtype=float)]
+
+
+def _fold(distribution, num_classes):
+    """Folds a distribution over measured integers into classes the way VQC does (x mod classes)."""
+    folded = np.zeros(num_classes)
+    for outcome, value in distribution:
+        folded[outcome % num_classes] += value
+    return folded
+
+
+def _measured(circuit):
+    return circuit if circuit.num_clbits else circuit.measure_all(inplace=False)
+
+
+def exact_probabilities(vqc, X, backend=None):
+    """(samples, classes) probabilities, exact (no shots), on the simulation backend (see simulation.py)."""
+    qnn = vqc.neural_network
+    circuit = _measured(qnn.circuit)
+    num_classes = qnn.output_shape[0]
+    backend = backend or getattr(vqc, 'simulation_backend', None)
+    sampler = simulation.make_sampler(circuit.num_qubits, backend=backend, num_classes=num_classes)
+    values = np.array([[binding[p] for p in circuit.parameters] for binding in _bindings(vqc, X)])
+    if not len(values):
+        return np.empty((0, num_classes))
+    quasi_dists = sampler.run([circuit] * len(values), values).result().quasi_dists
+    return np.array([_fold(quasi.items(), num_classes) for quasi in quasi_dists])
+
+
+def local_sampler(vqc, backend=None):
+    """Shot-based sampler on the VQC's simulation backend (see simulation.py)."""
+    qnn = vqc.neural_network
+    backend = backend or getattr(vqc, 'simulation_backend', None)
+    return simulation.make_sampler(qnn.circuit.num_qubits, backend=backend, num_classes=qnn.output_shape[0],
+                                   shots=DEFAULT_SHOTS)
+
+
+def sampler_counts(vqc, X, sampler, seed=None):
+    """
+    Counts function running the samples on ``sampler`` (V1 or V2 primitive).
+    ``seed`` seeds each run of a local V1 sampler differently, so repeated
+    adaptive rounds draw new shots.
+    """
+    qnn = vqc.neural_network
+    circuit = _measured(qnn.circuit)
+    num_classes = qnn.output_shape[0]
+    # Parameter values in the circuit's own parameter order
+    values = np.array([[binding[p] for p in circuit.parameters] for binding in _bindings(vqc, X)])
+    seeds = np.random.default_rng(seed) if seed is not None else None
+
+    def counts(indices, shots):
+        if 'pubs' not in inspect.signature(sampler.run).parameters:
+            # V1 primitive: one circuit per sample, quasi-distributions back
+            options = {'shots': shots}
+            if seeds is not None:
+                options['seed'] = int(seeds.integers(2 ** 31))
+            result = sampler.run([circuit] * len(indices), values[indices], **options).result()
+            return np.array([_fold(((k, p * shots) for k, p in quasi.items()), num_classes)
+                             for quasi in result.quasi_dists]).round()
+        # SamplerV2: one pub with a row of parameter values per sample
+        data = sampler.run([(circuit, values[indices])], shots=shots).result()[0].data
+        bits = getattr(data, circuit.cregs[-1].name)
+        return np.array([_fold(bits[i].get_int_counts().items(), num_classes) for i in range(len(indices))])
+    return counts
+
+
+def adaptive_counts(counts, samples, initial_shots=DEFAULT_INITIAL_SHOTS, max_shots=DEFAULT_MAX_SHOTS,
+                    confidence=DEFAULT_CONFIDENCE):
+    """
+    Runs ``initial_shots`` for every sample, then keeps doubling the shots of
+    the samples whose margin is not yet significant until ``max_shots``.
+
+    Returns (counts per class, shots per sample).
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    totals = None
+    shots = np.zeros(samples, dtype=int)
+    todo = np.arange(samples)
+    batch = min(initial_shots, max_shots)
+    while len(todo) and batch > 0:
+        new = counts(todo, batch)
+        if totals is None:
+            totals = np.zeros((samples, new.shape[1]))
+        totals[todo] += new
+        shots[todo] += batch
+        probabilities = totals[todo] / shots[todo, None]
+        ordered = np.sort(probabilities, axis=1)
+        top, runner_up = ordered[:, -1], ordered[:, -2]
+        # Standard error of (top - runner_up) for a multinomial estimate
+        error = np.sqrt(np.maximum(top + runner_up - (top - runner_up) ** 2, 0) / shots[todo])
+        todo = todo[(top - runner_up <= z * error) & (shots[todo] < max_shots)]
+        # Unresolved samples all have the same total; doubling it is spent only where needed
+        batch = int(min(shots[todo].max(), max_shots - shots[todo].max())) if len(todo) else 0
+    return totals, shots
+
+
+def _label_name(label):
+    return format(label, 'g') if isinstance(label, (int, float, np.number)) else str(label)
+
+
+def _margins(probabilities):
+    ordered = np.sort(probabilities, axis=1)
+    return ordered[:, -1] - ordered[:, -2]
+
+
+def predict_vqc(vqc, X, mode='exact', shots=DEFAULT_SHOTS, initial_shots=DEFAULT_INITIAL_SHOTS,
+                max_shots=DEFAULT_MAX_SHOTS, confidence=DEFAULT_CONFIDENCE, sampler=None, seed=None):
+    """
+    Scores ``X`` (already scaled) in the given mode.
+
+    Returns a frame with one row per sample: prediction, probability of each
+    class, margin and shots used.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown VQC inference mode {mode!r} (expected one of {', '.join(MODES)})")
+    X = np.asarray(X, dtype=float)
+    if mode == 'exact':
+        if sampler is not None:
+            raise ValueError("Exact mode needs the statevector; it cannot run on a sampler")
+        probabilities = exact_probabilities(vqc, X)
+        used = np.zeros(len(X), dtype=int)
+    elif not len(X):
+        probabilities = np.empty((0, vqc.neural_network.output_shape[0]))
+        used = np.zeros(0, dtype=int)
+    else:
+        if sampler is None:
+            counts = sampler_counts(vqc, X, local_sampler(vqc), seed)
+        else:
+            counts = sampler_counts(vqc, X, sampler)
+        if mode == 'shots':
+            totals, used = counts(np.arange(len(X)), shots), np.full(len(X), shots)
+        else:
+            totals, used = adaptive_counts(counts, len(X), initial_shots, max_shots, confidence)
+        probabilities = totals / used[:, None]
+
+    classes = _classes(vqc)
+    out = pd.DataFrame({'prediction': classes[np.argmax(probabilities, axis=1)]})
+    for i, label in enumerate(classes):
+        out[f'probability_{_label_name(label)}'] = probabilities[:, i]
+    out['margin'] = _margins(probabilities)
+    out['shots'] = used
+    return out
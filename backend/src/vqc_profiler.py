@@ -0,0 +1,267 @@
+"""
+Opt-in profiler for VQC training.
+
+Enabled with AQVH_PROFILE_VQC=1 (or ``train_vqc(..., profile=True)``). For
+the duration of ``fit`` it wraps the classifier's QNN and sampler, and
+through the VQC callback records every objective evaluation (one COBYLA
+iteration) split into phases:
+
+    setup        fit() input validation before the first evaluation
+    optimizer    COBYLA's own work between two evaluations
+    preprocess   building the (samples x parameters) value matrix
+    binding      binding those values into the circuits (reference Sampler)
+    simulation   statevector simulation and sampling
+    postprocess  turning quasi-distributions into class probabilities
+    loss         cross-entropy over the batch
+
+Building the classifier is recorded as ``circuit_build``. save_model_weights
+adds two files to the model bundle: vqc_trace.json, a Chrome trace-event
+file (open it in chrome://tracing or https://ui.perfetto.dev), and
+vqc_convergence.json, with the loss curve, the iteration the loss settled
+at and the time per phase. /api/quantum-metrics serves the summary under
+``convergence``.
+"""
+import contextlib
+import json
+import os
+import time
+
+import numpy as np
+
+TRACE_FILE = 'vqc_trace.json'
+SUMMARY_FILE = 'vqc_convergence.json'
+
+PHASES = ('circuit_build', 'setup', 'optimizer', 'preprocess', 'binding', 'simulation', 'postprocess', 'loss')
+
+# The loss has settled once the running best is within this fraction of the final best
+CONVERGENCE_TOLERANCE = 0.01
+
+
+def profiling_enabled():
+    return os.environ.get('AQVH_PROFILE_VQC', '').lower() in ('1', 'true', 'yes')
+
+
+class VQCProfiler:
+    """
+    Collects phase timings and losses for one VQC fit.
+
+    A disabled profiler is a no-op, so training code can use it unconditionally:
+
+        profiler = VQCProfiler('VQC', enabled=profile)
+        with profiler.phase('circuit_build'):
+            vqc = VQC(..., callback=profiler.callback(other_callback))
+        with profiler.profile(vqc):
+            vqc.fit(X, y)
+    """
+
+    def __init__(self, model='VQC', enabled=None):
+        self.model = model
+        self.enabled = profiling_enabled() if enabled is None else bool(enabled)
+        self.events = []
+        self.calls = []
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.maxiter = None
+        self.samples = None
+        self.fit_seconds = None
+        self._origin = time.perf_counter()
+        self._patched = []
+        self._active = False
+        self._call_start = None
+        self._call_phases = {}
+        self._last_callback = None
+        self._sampling_start = None
+        self._postprocess_end = None
+        self._binding = 0.0
+
+    # --- recording ---
+
+    def _event(self, name, start, end, **args):
+        self.events.append({'name': name, 'cat': 'vqc', 'ph': 'X', 'pid': os.getpid(), 'tid': self.model,
+                            'ts': round((start - self._origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1),
+                            'args': args})
+
+    def _add(self, phase, start, end, **args):
+        self.phase_seconds[phase] += end - start
+        self._call_phases[phase] = self._call_phases.get(phase, 0.0) + end - start
+        self._event(phase, start, end, **args)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Records a block as one phase (e.g. building the classifier)."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phase_seconds[name] += end - start
+            self._event(name, start, end)
+
+    # --- hooks ---
+
+    def _patch(self, obj, name, wrapper):
+        # Instance attributes shadow the class methods until profile() deletes them
+        setattr(obj, name, wrapper(getattr(obj, name)))
+        self._patched.append((obj, name))
+
+    def _wrap_preprocess(self, original):
+        def preprocess(*args, **kwargs):
+            if not self._active:
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            if self._call_start is None:
+                # First QNN work since the last callback starts a new objective evaluation
+                self._call_start = start
+                self._add('setup' if not self.calls else 'optimizer', self._last_callback, start)
+            result = original(*args, **kwargs)
+            end = time.perf_counter()
+            self.samples = int(result[1])
+            self._add('preprocess', start, end)
+            self._sampling_start = end
+            self._binding = 0.0
+            return result
+        return preprocess
+
+    def _wrap_postprocess(self, original):
+        def postprocess(*args, **kwargs):
+            if not self._active:
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            if self._sampling_start is not None:
+                # Sampler job from submit to result. Binding is interleaved with the
+                # simulation per circuit; the trace shows its total as one span at the end
+                binding = min(self._binding, start - self._sampling_start)
+                self.phase_seconds['binding'] += binding
+                self._call_phases['binding'] = self._call_phases.get('binding', 0.0) + binding
+                self._add('simulation', self._sampling_start, start - binding if binding else start,
+                          binding_ms=round(binding * 1000, 3))
+                if binding:
+                    self._event('binding', start - binding, start, circuits=self.samples)
+                self._sampling_start = None
+            self._hook_circuits()
+            result = original(*args, **kwargs)
+            end = time.perf_counter()
+            self._add('postprocess', start, end)
+            self._postprocess_end = end
+            return result
+        return postprocess
+
+    def _wrap_bind(self, original):
+        def bind(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._binding += time.perf_counter() - start
+        return bind
+
+    def _hook_circuits(self):
+        # The reference Sampler keeps its own copies of the circuits (registered on the first run)
+        for circuit in getattr(self._sampler, '_circuits', ()):
+            if 'bind_parameters' not in vars(circuit):
+                self._patch(circuit, 'bind_parameters', self._wrap_bind)
+
+    def callback(self, inner=None):
+        """VQC callback recording each evaluation's loss, then calling ``inner``."""
+        if not self.enabled:
+            return inner
+
+        def callback(weights, objective_value):
+            now = time.perf_counter()
+            if self._active and self._call_start is not None:
+                if self._postprocess_end is not None:
+                    self._add('loss', self._postprocess_end, now)
+                loss = float(objective_value)
+                self.calls.append({'loss': loss, 'seconds': now - self._call_start, 'phases': self._call_phases})
+                self._event('objective', self._call_start, now, iteration=len(self.calls), loss=loss)
+                self.events.append({'name': 'loss', 'ph': 'C', 'pid': os.getpid(), 'tid': self.model,
+                                    'ts': round((now - self._origin) * 1e6, 1), 'args': {'loss': loss}})
+            self._call_start = None
+            self._call_phases = {}
+            self._postprocess_end = None
+            if inner is not None:
+                inner(weights, objective_value)
+            self._last_callback = time.perf_counter()
+        return callback
+
+    @contextlib.contextmanager
+    def profile(self, vqc):
+        """Instruments ``vqc`` for the duration of the block (wrap ``fit`` only)."""
+        if not self.enabled:
+            yield self
+            return
+        qnn = vqc.neural_network
+        self._sampler = qnn.sampler
+        self.maxiter = getattr(vqc.optimizer, '_options', {}).get('maxiter')
+        self._patch(qnn, '_preprocess_forward', self._wrap_preprocess)
+        self._patch(qnn, '_postprocess', self._wrap_postprocess)
+        self._hook_circuits()
+        start = self._last_callback = time.perf_counter()
+        self._active = True
+        try:
+            yield self
+        finally:
+            self._active = False
+            end = time.perf_counter()
+            self.fit_seconds = end - start
+            self._event('fit', start, end, iterations=len(self.calls))
+            for obj, name in reversed(self._patched):
+                delattr(obj, name)
+            self._patched = []
+
+    # --- output ---
+
+    def summary(self):
+        """Convergence summary: loss curve, when it settled and where the time went."""
+        losses = np.array([call['loss'] for call in self.calls])
+        seconds = np.array([call['seconds'] for call in self.calls])
+        total = sum(self.phase_seconds.values())
+        summary = {
+            'model': self.model,
+            'iterations': len(self.calls),
+            'maxiter': self.maxiter,
+            'samples_per_evaluation': self.samples,
+            'fit_seconds': round(self.fit_seconds or 0.0, 4),
+            'phase_seconds': {phase: round(value, 4) for phase, value in self.phase_seconds.items()},
+            'phase_share': {phase: round(100 * value / total, 2) if total else 0.0
+                            for phase, value in self.phase_seconds.items()},
+        }
+        if not len(losses):
+            return summary
+        running_best = np.minimum.accumulate(losses)
+        best = float(running_best[-1])
+        settled = int(np.argmax(running_best - best <= CONVERGENCE_TOLERANCE * abs(best))) + 1
+        summary.update({
+            'initial_loss': round(float(losses[0]), 6),
+            'final_loss': round(float(losses[-1]), 6),
+            'best_loss': round(best, 6),
+            'best_iteration': int(np.argmin(losses)) + 1,
+            'converged_iteration': settled,
+            'convergence_tolerance': CONVERGENCE_TOLERANCE,
+            # Evaluations after the loss settled; a large share suggests maxiter can be lowered
+            'iterations_after_convergence': len(losses) - settled,
+            'evaluation_seconds': {
+                'mean': round(float(seconds.mean()), 5),
+                'p50': round(float(np.percentile(seconds, 50)), 5),
+                'p95': round(float(np.percentile(seconds, 95)), 5),
+                'max': round(float(seconds.max()), 5),
+            },
+            'loss_history': [round(float(loss), 6) for loss in losses],
+        })
+        return summary
+
+    def trace(self):
+        """Chrome trace-event JSON (one thread per model, phases nested under each evaluation)."""
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms',
+                'otherData': {'model': self.model, 'maxiter': self.maxiter}}
+
+    def add_to_bundle(self, bundle):
+        bundle.add_file(TRACE_FILE, lambda path: _write_compact_json(path, self.trace()))
+        bundle.add_json(SUMMARY_FILE, self.summary())
+
+
+def _write_compact_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
@@ -0,0 +1,82 @@
+"""
+Execution model for the API.
+
+Route handlers are ``async`` and never block the event loop themselves.
+Blocking work is sent to one of two bounded pools so slow upstream calls
+cannot starve local work:
+
+- ``io_pool``:  network calls (yfinance, IBM) that mostly wait
+- ``cpu_pool``: pandas parsing / serialization and model inference
+
+Each endpoint additionally gets an ``EndpointLimit`` that caps how many of
+its requests run at once and how long a request may wait + run before the
+client gets a 504. A request that times out keeps its slot until its worker
+thread actually finishes, so one endpoint can never occupy more than its
+cap of pool threads.
+
+Pool sizes can be tuned with the AQVH_IO_WORKERS / AQVH_CPU_WORKERS
+environment variables.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.responses import JSONResponse
+
+IO_WORKERS = int(os.environ.get("AQVH_IO_WORKERS", 16))
+CPU_WORKERS = int(os.environ.get("AQVH_CPU_WORKERS", min(8, os.cpu_count() or 2)))
+
+io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="aqvh-io")
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="aqvh-cpu")
+
+
+class EndpointLimit:
+    """Per-endpoint concurrency cap and timeout around a blocking handler."""
+
+    def __init__(self, name, pool, max_concurrency, timeout):
+        self.name = name
+        self.pool = pool
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _release(self, loop):
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            # The event loop has closed (shutdown); nobody is waiting for the slot
+            pass
+
+    def _timed_out(self):
+        return JSONResponse(
+            status_code=504,
+            content={"error": f"{self.name} timed out after {self.timeout:.0f}s"},
+        )
+
+    async def __call__(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return self._timed_out()
+        try:
+            future = self.pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # The worker thread cannot be interrupted, so the slot is held until it finishes,
+        # not until the client stops waiting: a hung call keeps its slot and retries queue
+        # here instead of piling more threads into the shared pool
+        future.add_done_callback(lambda _: self._release(loop))
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                          timeout=max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            return self._timed_out()
+
+
+def shutdown_pools():
+    io_pool.shutdown(wait=False, cancel_futures=True)
+    cpu_pool.shutdown(wait=False, cancel_futures=True)
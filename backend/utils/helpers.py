@@ -1,13 +1,27 @@
+import os
+import re
+
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-def safe_plot(plot_func, title="Plot", figsize=(10, 6)):
+def safe_plot(plot_func, title="Plot", figsize=(10, 6), path=None):
+    """Draws ``plot_func`` headlessly and saves it to ``path`` (default: <title>.png); False on error."""
+    path = path or re.sub(r"[^A-Za-z0-9]+", "_", title).strip("_").lower() + ".png"
+    fig = None
     try:
-        plt.figure(figsize=figsize)
+        fig = plt.figure(figsize=figsize)
         plot_func()
         plt.title(title)
         plt.tight_layout()
-        plt.show()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fig.savefig(path)
         return True
     except Exception as e:
         print(f"Warning: Could not create {title}: {e}")
-        return False
\ No newline at end of file
+        return False
+    finally:
+        if fig is not None:
+            plt.close(fig)
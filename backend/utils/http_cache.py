@@ -0,0 +1,223 @@
+"""
+Conditional GET and compression cache for the JSON endpoints.
+
+Each cached payload is keyed by the version of the artifact files it is
+built from (mtime + size). ETag / Last-Modified are derived from that
+version with a single ``os.stat`` per file, so a matching If-None-Match is
+answered with 304 before any file is read or serialized. The serialized
+body and its gzip/brotli variants are kept per version and only rebuilt
+when one of the source files changes. Bodies the shared snapshot already
+holds serialized are sent from their files (``respond_files``), versioned by
+the table's content hash (``content_version``) and not cached per process.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+def file_version(paths):
+    """Returns (etag, last_modified) for a set of files using only stat calls."""
+    digest = hashlib.sha1()
+    latest_mtime = 0.0
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f"{path}:{st.st_mtime_ns}:{st.st_size};".encode())
+        latest_mtime = max(latest_mtime, st.st_mtime)
+    return f'W/"{digest.hexdigest()[:20]}"', latest_mtime
+
+
+def content_version(digest, modified):
+    """Returns (etag, last_modified) for content identified by a hash."""
+    return f'W/"{digest[:20]}"', modified
+
+
+def serialize_json(payload):
+    """Serializes a payload the same way Starlette's JSONResponse does."""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _etag_matches(header, etag):
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are considered equal
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(header, last_modified):
+    if header is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(last_modified) <= int(since)
+
+
+def _pick_encoding(accept_encoding):
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if BROTLI_AVAILABLE and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def encode_variants(body):
+    """{Content-Encoding: body} with the identity body (None) and every encoding worth sending."""
+    variants = {None: body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        variants["gzip"] = _compress(body, "gzip")
+        if BROTLI_AVAILABLE:
+            variants["br"] = _compress(body, "br")
+    return variants
+
+
+def _headers(etag, last_modified):
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def _is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("if-none-match")
+    return _etag_matches(if_none_match, etag) or (
+        if_none_match is None and _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    )
+
+
+class _Entry:
+    __slots__ = ("etag", "variants")
+
+    def __init__(self, etag, body):
+        self.etag = etag
+        self.variants = {None: body}
+
+
+class VersionedJSONCache:
+    """Caches serialized JSON bodies (and compressed variants) per file version."""
+
+    def __init__(self, observe=None):
+        """
+        ``observe(key, event, seconds)``, if given, is called for every lookup
+        (event "not_modified" / "hit" / "miss", seconds None) and with the time
+        spent in each stage of a miss ("build", "serialize", "compress").
+        """
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._observe = observe
+        self.stats = {"not_modified": 0, "hits": 0, "builds": 0, "compressions": 0}
+
+    def respond(self, request: Request, key, paths, build):
+        """
+        Returns a response for ``key`` whose payload is produced by ``build()``
+        from the files in ``paths``. ``build`` is only called when the files
+        changed since the last build.
+        """
+        etag, last_modified = file_version(paths)
+        headers = _headers(etag, last_modified)
+
+        if _is_not_modified(request, etag, last_modified):
+            self.stats["not_modified"] += 1
+            if self._observe:
+                self._observe(key, "not_modified", None)
+            return Response(status_code=304, headers=headers)
+
+        entry = self._entries.get(key)
+        if entry is None or entry.etag != etag:
+            if self._observe:
+                start = time.perf_counter()
+                payload = build()
+                built = time.perf_counter()
+                body = serialize_json(payload)
+                self._observe(key, "miss", None)
+                self._observe(key, "build", built - start)
+                self._observe(key, "serialize", time.perf_counter() - built)
+            else:
+                body = serialize_json(build())
+            entry = _Entry(etag, body)
+            with self._lock:
+                self._entries[key] = entry
+            self.stats["builds"] += 1
+        else:
+            self.stats["hits"] += 1
+            if self._observe:
+                self._observe(key, "hit", None)
+
+        encoding = _pick_encoding(request.headers.get("accept-encoding"))
+        if encoding is None or len(entry.variants[None]) < MIN_COMPRESS_SIZE:
+            return Response(content=entry.variants[None], media_type="application/json", headers=headers)
+
+        body = entry.variants.get(encoding)
+        if body is None:
+            start = time.perf_counter()
+            body = _compress(entry.variants[None], encoding)
+            entry.variants[encoding] = body
+            if self._observe:
+                self._observe(key, "compress", time.perf_counter() - start)
+            self.stats["compressions"] += 1
+        headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def respond_files(self, request: Request, key, version, files):
+        """
+        Like ``respond`` for a payload already serialized to files
+        ({Content-Encoding: path}, None for the identity body). The chosen
+        file is streamed from disk; nothing is kept in this process.
+        """
+        etag, last_modified = version
+        headers = _headers(etag, last_modified)
+        event = "not_modified" if _is_not_modified(request, etag, last_modified) else "hit"
+        self.stats["not_modified" if event == "not_modified" else "hits"] += 1
+        if self._observe:
+            self._observe(key, event, None)
+        if event == "not_modified":
+            return Response(status_code=304, headers=headers)
+
+        encoding = _pick_encoding(request.headers.get("accept-encoding"))
+        if encoding not in files:
+            encoding = None
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return FileResponse(files[encoding], media_type="application/json", headers=headers)
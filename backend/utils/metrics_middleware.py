@@ -0,0 +1,50 @@
+"""
+ASGI middleware recording per-route request latency (src/telemetry.py).
+
+Written as a plain ASGI wrapper rather than ``BaseHTTPMiddleware`` so it adds
+no extra task or body buffering per request: one ``perf_counter`` pair, a
+histogram update and an in-flight gauge. Requests are labelled with the route
+template (``/api/company-predictions``), never the raw path, so label
+cardinality stays bounded. Requests slower than ``AQVH_SLOW_REQUEST_MS``
+(default 1000) are logged as structured warnings.
+"""
+import logging
+import os
+import time
+
+import telemetry  # backend/src, on sys.path via main.py
+
+SLOW_REQUEST_SECONDS = float(os.environ.get("AQVH_SLOW_REQUEST_MS", 1000)) / 1000
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._in_flight = telemetry.http_in_flight.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        self._in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._in_flight.dec()
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            telemetry.http_request_seconds.labels(path, scope["method"], status["code"]).observe(elapsed)
+            if elapsed >= SLOW_REQUEST_SECONDS:
+                telemetry.log_event("slow_request", level=logging.WARNING, route=path, method=scope["method"],
+                                    status=status["code"], seconds=round(elapsed, 4))
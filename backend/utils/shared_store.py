@@ -0,0 +1,239 @@
+"""
+Shared, memory-mapped data snapshot for multi-worker deployments.
+
+A parent process publishes tables (as one ``.npy`` file per column) into a
+versioned directory, normally on ``/dev/shm``. Tables the API returns whole
+are also published as their serialized JSON response body, plus its gzip
+and brotli encodings:
+
+    <root>/CURRENT                  version counter of the live snapshot
+    <root>/v<N>/manifest.json       tables (columns, content hash, bodies) of version N
+    <root>/v<N>/tables/<table>/<column>.npy
+    <root>/v<N>/bodies/<table>.json[.gz|.br]
+
+Workers attach with ``np.load(..., mmap_mode="r")`` and send the bodies
+straight from their files, so every worker shares the same physical pages
+instead of holding its own pandas copy, row dicts and cached response.
+Publishing writes a complete new version and then atomically swaps CURRENT,
+so workers pick up refreshed data on their next access without restarting.
+
+Each table records a hash of its contents and the time that content was
+first published, so a table that did not change keeps its ETag (and its
+body files) when another table is republished.
+
+Model artifacts are not part of the snapshot; workers load them from the
+model store as before.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.http_cache import encode_variants, serialize_json
+
+# Older versions kept on disk so workers still reading them are not disturbed
+KEEP_VERSIONS = 2
+# Content-Encoding -> body file suffix
+BODY_SUFFIXES = {None: "", "gzip": ".gz", "br": ".br"}
+
+
+def frame_records(df):
+    """A DataFrame as a list of row dicts, with nulls and non-finite floats as None."""
+    df = df.replace([np.inf, -np.inf], np.nan)
+    df = df.astype(object).where(pd.notnull(df), None)
+    return df.to_dict(orient="records")
+
+
+def _write_column(path, series):
+    if series.dtype.kind in "biuf":
+        np.save(path + ".npy", series.to_numpy())
+        return "numeric"
+    # Strings / mixed columns: fixed-width unicode (mmap-able) plus a null mask
+    mask = series.isna().to_numpy()
+    values = series.where(~mask, "").astype(str).to_numpy().astype("U")
+    np.save(path + ".npy", values)
+    np.save(path + ".mask.npy", mask)
+    return "string"
+
+
+def _atomic_write_text(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _table_hash(df):
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _read_manifest(root, version):
+    try:
+        with open(os.path.join(root, f"v{version}", "manifest.json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"tables": {}}
+
+
+def current_version(root):
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _write_bodies(staging, name, df, previous_spec, previous_dir):
+    """Writes a table's JSON body and its encodings; returns {encoding or "identity": file}."""
+    os.makedirs(os.path.join(staging, "bodies"), exist_ok=True)
+    reuse = previous_spec.get("bodies")
+    if reuse:
+        # Same content as the previous version: link its files instead of serializing again
+        try:
+            for file in reuse.values():
+                os.link(os.path.join(previous_dir, "bodies", file), os.path.join(staging, "bodies", file))
+            return dict(reuse)
+        except OSError:
+            pass
+    files = {}
+    for encoding, body in encode_variants(serialize_json(frame_records(df))).items():
+        file = f"{name}.json{BODY_SUFFIXES[encoding]}"
+        path = os.path.join(staging, "bodies", file)
+        if os.path.exists(path):
+            os.remove(path)
+        with open(path, "wb") as f:
+            f.write(body)
+        files[encoding or "identity"] = file
+    return files
+
+
+def publish(root, tables, bodies=()):
+    """
+    Writes a new snapshot version and makes it current.
+
+    Args:
+        root: Shared directory (created if missing)
+        tables: Mapping of table name -> DataFrame
+        bodies: Names of tables to also publish as serialized JSON response bodies
+    Returns:
+        The new version number
+    """
+    os.makedirs(root, exist_ok=True)
+    version = current_version(root) + 1
+    version_dir = os.path.join(root, f"v{version}")
+    staging = tempfile.mkdtemp(dir=root, prefix=".staging-")
+
+    previous = _read_manifest(root, version - 1)["tables"]
+    published = time.time()
+    manifest = {"version": version, "tables": {}}
+    for name, df in tables.items():
+        table_dir = os.path.join(staging, "tables", name)
+        os.makedirs(table_dir)
+        columns = []
+        for i, column in enumerate(df.columns):
+            kind = _write_column(os.path.join(table_dir, f"c{i}"), df[column])
+            columns.append({"name": str(column), "file": f"c{i}", "kind": kind})
+        digest = _table_hash(df)
+        # Unchanged tables keep the time their content was first published
+        unchanged = previous.get(name, {}).get("hash") == digest
+        modified = previous[name]["modified"] if unchanged else published
+        manifest["tables"][name] = {"rows": len(df), "columns": columns, "hash": digest, "modified": modified}
+        if name in bodies:
+            manifest["tables"][name]["bodies"] = _write_bodies(
+                staging, name, df, previous[name] if unchanged else {}, os.path.join(root, f"v{version - 1}"))
+
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(staging, version_dir)
+    _atomic_write_text(os.path.join(root, "CURRENT"), str(version))
+
+    for old in range(version - KEEP_VERSIONS, 0, -1):
+        old_dir = os.path.join(root, f"v{old}")
+        if not os.path.isdir(old_dir):
+            break
+        # Workers that still map these files keep them alive until they detach
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return version
+
+
+class _Snapshot:
+    def __init__(self, root, version):
+        self.version = version
+        self.path = os.path.join(root, f"v{version}")
+        with open(os.path.join(self.path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self._columns = {}
+
+    def columns(self, table):
+        cached = self._columns.get(table)
+        if cached is not None:
+            return cached
+        spec = self.manifest["tables"][table]
+        table_dir = os.path.join(self.path, "tables", table)
+        columns = {}
+        for column in spec["columns"]:
+            base = os.path.join(table_dir, column["file"])
+            values = np.load(base + ".npy", mmap_mode="r")
+            mask = np.load(base + ".mask.npy", mmap_mode="r") if column["kind"] == "string" else None
+            columns[column["name"]] = (values, mask)
+        self._columns[table] = columns
+        return columns
+
+
+class SharedStore:
+    """Worker-side view of a published snapshot directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self.version_path = os.path.join(root, "CURRENT")
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._mtime = None
+
+    def snapshot(self):
+        """Returns the current snapshot, re-attaching if a newer version was published."""
+        mtime = os.stat(self.version_path).st_mtime_ns
+        if self._snapshot is None or mtime != self._mtime:
+            with self._lock:
+                version = current_version(self.root)
+                if self._snapshot is None or self._snapshot.version != version:
+                    self._snapshot = _Snapshot(self.root, version)
+                self._mtime = mtime
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self.snapshot().version
+
+    def has_table(self, table):
+        return table in self.snapshot().manifest["tables"]
+
+    def table_version(self, table):
+        """(content hash, time that content was first published) of a table."""
+        spec = self.snapshot().manifest["tables"][table]
+        return spec["hash"], spec["modified"]
+
+    def table_hashes(self):
+        return {name: spec["hash"] for name, spec in self.snapshot().manifest["tables"].items()}
+
+    def columns(self, table):
+        """Zero-copy column arrays of a table: {name: (values, null_mask or None)}."""
+        return self.snapshot().columns(table)
+
+    def body_files(self, table):
+        """Paths of a table's published JSON body per Content-Encoding (None: identity), or None."""
+        snapshot = self.snapshot()
+        files = snapshot.manifest["tables"].get(table, {}).get("bodies")
+        if not files:
+            return None
+        return {None if encoding == "identity" else encoding: os.path.join(snapshot.path, "bodies", file)
+                for encoding, file in files.items()}
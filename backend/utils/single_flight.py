@@ -0,0 +1,98 @@
+"""
+Single-flight request coalescing for the expensive endpoints.
+
+When identical requests (same route, normalized query parameters and the
+headers the response depends on) arrive while one is already being
+computed, they wait for that computation instead of starting their own, and
+all of them get its result. A successful result is also kept for a short
+TTL, so a burst of dashboard polls right after it finishes does not start
+another computation either.
+
+Errors are shared with the requests that were waiting but never cached.
+Every caller gets its own copy of a ``Response``, because middleware adds
+headers to the response it sends.
+"""
+import asyncio
+import functools
+import time
+
+from fastapi import Request, Response
+
+# Request headers that change what the file-backed endpoints send back
+VARY_HEADERS = ("accept-encoding", "if-none-match", "if-modified-since")
+
+
+def request_key(name, request: Request, vary=VARY_HEADERS):
+    """Coalescing key: endpoint name, sorted query parameters and the ``vary`` header values."""
+    params = tuple(sorted(request.query_params.multi_items()))
+    return (name, params, tuple(request.headers.get(header) for header in vary))
+
+
+def _copy(result):
+    if not isinstance(result, Response):
+        return result
+    clone = Response(content=result.body, status_code=result.status_code)
+    clone.raw_headers = list(result.raw_headers)
+    return clone
+
+
+def _cacheable(result):
+    if isinstance(result, Response):
+        return result.status_code < 500
+    return not (isinstance(result, dict) and "error" in result)
+
+
+class SingleFlight:
+    """Shares one in-flight call per key, and its result for ``ttl`` seconds."""
+
+    def __init__(self, ttl=0.0, observe=None):
+        """
+        ``observe(key, event)``, if given, is called for every call with
+        "miss" (this call computes), "joined" (waits for an in-flight call)
+        or "hit" (served from the TTL cache).
+        """
+        self.ttl = ttl
+        self._observe = observe
+        self._inflight = {}
+        self._results = {}
+        self.stats = {"miss": 0, "joined": 0, "hit": 0}
+
+    def _record(self, key, event):
+        self.stats[event] += 1
+        if self._observe:
+            self._observe(key, event)
+
+    async def run(self, key, factory, ttl=None):
+        """
+        Returns the result of ``await factory()`` for ``key``, calling it only
+        if no identical call is in flight and no fresh result is cached.
+        """
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._record(key, "hit")
+            return _copy(cached[1])
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._record(key, "miss")
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key, self.ttl if ttl is None else ttl))
+        else:
+            self._record(key, "joined")
+        # A waiter that disconnects must not cancel the computation the others are waiting for
+        return _copy(await asyncio.shield(task))
+
+    def _done(self, key, ttl, task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or ttl <= 0:
+            return
+        result = task.result()
+        if _cacheable(result):
+            now = time.monotonic()
+            for stale in [k for k, (expires, _) in self._results.items() if expires <= now]:
+                del self._results[stale]
+            self._results[key] = (now + ttl, result)
+
+    def clear(self):
+        self._results.clear()
@@ -0,0 +1,156 @@
+"""
+Online (streaming) statistics for live market data.
+
+Every indicator here updates in O(1) per new tick, so the live endpoint only
+has to feed the bars it has not seen yet instead of recomputing over the
+whole intraday history on each request.
+
+- RollingStats: Welford mean/variance over a fixed-size ring buffer
+- EMA:          exponential moving average (pandas ``ewm(adjust=False)``)
+- RSI:          Wilder's relative strength index built on two EMAs
+- LiveMetricsState: ties the above together for one ticker/interval
+"""
+import math
+from collections import deque
+
+
+class RollingStats:
+    """Mean and sample variance over the last ``window`` values (Welford)."""
+
+    def __init__(self, window=60):
+        self.window = window
+        self._buffer = deque(maxlen=window)
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def update(self, x):
+        if len(self._buffer) == self.window:
+            self._remove(self._buffer[0])
+        self._buffer.append(x)
+        n = len(self._buffer)
+        delta = x - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (x - self.mean)
+
+    def _remove(self, x):
+        n = len(self._buffer) - 1
+        if n == 0:
+            self.mean, self._m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / n
+        self._m2 -= delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1), matching ``pandas.Series.std``."""
+        n = len(self._buffer)
+        if n < 2:
+            return math.nan
+        return max(self._m2, 0.0) / (n - 1)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class EMA:
+    """Exponential moving average, seeded with the first value like ``ewm(adjust=False)``."""
+
+    def __init__(self, span=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class RSI:
+    """Wilder's RSI: EMAs (alpha = 1/period) of gains and losses."""
+
+    def __init__(self, period=14):
+        self._gain = EMA(alpha=1.0 / period)
+        self._loss = EMA(alpha=1.0 / period)
+        self._prev = None
+        self.value = None
+
+    def update(self, price):
+        if self._prev is not None:
+            change = price - self._prev
+            gain = self._gain.update(max(change, 0.0))
+            loss = self._loss.update(max(-change, 0.0))
+            if loss == 0:
+                self.value = 100.0 if gain > 0 else 50.0
+            else:
+                self.value = 100.0 - 100.0 / (1.0 + gain / loss)
+        self._prev = price
+        return self.value
+
+
+class LiveMetricsState:
+    """
+    Incremental state behind /api/live-metrics for one ticker and interval.
+
+    Feed bars in timestamp order with ``update``; bars at or before the last
+    seen timestamp are ignored, so the full history can be passed on every
+    poll and only the new tail is processed.
+    """
+
+    def __init__(self, volatility_window=60, rsi_period=14, ema_span=20):
+        self.returns = RollingStats(volatility_window)
+        self.rsi = RSI(rsi_period)
+        self.ema = EMA(span=ema_span)
+        self.last_timestamp = None
+        self.last_close = None
+        self.last_volume = None
+        self.total_volume = 0.0
+        self.reference_close = None
+        self.reference_date = None
+
+    def update(self, timestamp, close, volume):
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+        if self.last_close:
+            self.returns.update(close / self.last_close - 1.0)
+        self.rsi.update(close)
+        self.ema.update(close)
+        if volume is not None and not math.isnan(volume):
+            self.total_volume += volume
+        self.last_volume = volume
+        self.last_close = close
+        self.last_timestamp = timestamp
+        return True
+
+    def update_from_frame(self, data):
+        """Feeds the rows of a yfinance history frame newer than the last seen bar."""
+        if self.last_timestamp is not None:
+            data = data.iloc[data.index.searchsorted(self.last_timestamp, side="right"):]
+        fed = 0
+        for timestamp, close, volume in zip(data.index, data["Close"].to_numpy(), data["Volume"].to_numpy()):
+            if math.isnan(close):
+                continue
+            fed += self.update(timestamp, float(close), float(volume))
+        return fed
+
+    @property
+    def volatility(self):
+        std = self.returns.std
+        if math.isnan(std) or std == 0:
+            return None
+        return std
+
+    @property
+    def daily_change(self):
+        reference = self.reference_close if self.reference_close is not None else self.last_close
+        return self.last_close - reference
+
+    @property
+    def confidence(self):
+        return min(abs(self.daily_change) / (self.last_close if self.last_close else 1), 1.0)
@@ -5,16 +5,22 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from ".
 import { Badge } from "../components/ui/badge";
 import { TrendingUp, TrendingDown, Activity, BarChart3 } from "lucide-react";
 import ForecastChart from "../components/ForecastChart";
-import { companyList, fetchCompanyForecast } from "../services/api";
+import { companyList, fetchCompanies, fetchCompanyForecast } from "../services/api";
 
 
 const Forecast = () => {
 
+  const [companies, setCompanies] = useState<string[]>(companyList);
   const [selectedCompany, setSelectedCompany] = useState<string>(companyList[0]);
   const [forecastData, setForecastData] = useState<any[]>([]);
   const [searchTerm, setSearchTerm] = useState("");
   // Removed unused loading state
 
+  // Company list from the backend index; the hard-coded list is the fallback
+  useEffect(() => {
+    fetchCompanies().then(setCompanies).catch(() => setCompanies(companyList));
+  }, []);
+
 
   // Fetch forecast data for selected company
   useEffect(() => {
@@ -93,7 +99,7 @@ const Forecast = () => {
                     className="w-full px-3 py-2 rounded-lg border border-accent bg-[#1a1a2e] text-white placeholder:text-accent focus:outline-none focus:ring-2 focus:ring-accent focus:border-accent transition-all shadow-sm"
                   />
                 </div>
-                {companyList
+                {companies
                   .filter(company => company.toLowerCase().replace(/_/g, ' ').includes(searchTerm.toLowerCase()))
                   .map((company) => (
                     <SelectItem key={company} value={company} className="hover:bg-accent/40 hover:text-white rounded-lg cursor-pointer transition-colors text-white px-3 py-2">
@@ -5,14 +5,20 @@ import { Badge } from "../components/ui/badge";
 import { TrendingUp, TrendingDown, Activity, BarChart3 } from "lucide-react";
 import ForecastChart from "../components/ForecastChart";
 import CompanyMetrics from "../components/CompanyMetrics";
-import { companyList, fetchCompanyForecast } from "../services/api";
+import { companyList, fetchCompanies, fetchCompanyForecast } from "../services/api";
 
 const LiveTradingPage = () => {
+  const [companies, setCompanies] = useState<string[]>(companyList);
   const [selectedCompany, setSelectedCompany] = useState(companyList[0]);
   const [companyData, setCompanyData] = useState<any[]>([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
+  // Company list from the backend index; the hard-coded list is the fallback
+  useEffect(() => {
+    fetchCompanies().then(setCompanies).catch(() => setCompanies(companyList));
+  }, []);
+
   useEffect(() => {
     const fetchData = async () => {
       setLoading(true);
@@ -87,7 +93,7 @@ const LiveTradingPage = () => {
                 <SelectValue placeholder="Select a company" />
               </SelectTrigger>
               <SelectContent className="border border-accent/40 bg-gradient-to-br from-card/90 to-accent/10 backdrop-blur-md shadow-xl rounded-xl">
-                {companyList.map((company) => (
+                {companies.map((company) => (
                   <SelectItem key={company} value={company} className="rounded-lg px-4 py-2 hover:bg-accent/20 cursor-pointer transition-all">
                     <div className="flex items-center space-x-3">
                       <span className="font-medium">{company}</span>
@@ -14,10 +14,11 @@ import {
   Clock,
   AlertTriangle
 } from "lucide-react";
-import { fetchQuantumMetrics, type QuantumMetrics } from "../services/api";
+import { circuitDiagramPath, fetchQuantumMetrics, fetchRenderedImage, type QuantumMetrics } from "../services/api";
 
 const VQCAnalysisPage = () => {
   const [quantumMetrics, setQuantumMetrics] = useState<QuantumMetrics | null>(null);
+  const [circuitImage, setCircuitImage] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -35,6 +36,20 @@ const VQCAnalysisPage = () => {
     loadQuantumData();
   }, []);
 
+  useEffect(() => {
+    if (loading) return;
+    let imageUrl: string | null = null;
+    fetchRenderedImage(circuitDiagramPath(quantumMetrics?.qubits))
+      .then((url) => {
+        imageUrl = url;
+        setCircuitImage(url);
+      })
+      .catch((error) => console.error('Error loading circuit diagram:', error));
+    return () => {
+      if (imageUrl) URL.revokeObjectURL(imageUrl);
+    };
+  }, [loading, quantumMetrics?.qubits]);
+
   if (loading) {
     return (
       <div className="p-6">
@@ -93,6 +108,13 @@ const VQCAnalysisPage = () => {
         </CardHeader>
         <CardContent>
           <QuantumCircuit />
+          {circuitImage && (
+            <img
+              src={circuitImage}
+              alt="Rendered VQC circuit diagram"
+              className="mt-4 w-full rounded-md bg-white p-2"
+            />
+          )}
         </CardContent>
       </Card>
 
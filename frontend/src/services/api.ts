@@ -4,7 +4,7 @@ export async function fetchPredictionsLastUpdate() {
   if (!res.ok) throw new Error("Failed to fetch predictions last update time");
   return res.json();
 }
-// List of company CSVs in backend data folder (hardcoded for now, could be fetched from backend in future)
+// Fallback list of company CSVs in the backend data folder (see fetchCompanies)
 export const companyList = [
   "Airtel_Africa",
   "AstraZeneca",
@@ -17,6 +17,15 @@ export const companyList = [
   "Vodafone_Group"
 ];
 
+// Companies with a data file (and trained model, if any), from the backend's startup index
+export async function fetchCompanies(): Promise<string[]> {
+  const res = await fetch("http://localhost:8000/api/companies");
+  if (!res.ok) throw new Error("Failed to fetch company list");
+  const companies = await res.json();
+  const names = Array.isArray(companies) ? companies.map((company: { name: string }) => company.name) : [];
+  return names.length > 0 ? names : companyList;
+}
+
 // Fetch forecast for a specific company
 export async function fetchCompanyForecast(company: string) {
   const res = await fetch(`http://localhost:8000/api/company-predictions?company=${company}`);
@@ -43,6 +52,24 @@ export async function fetchQuantumMetrics(): Promise<QuantumMetrics> {
   return res.json();
 }
 
+// Circuit diagram / metric chart rendered by the backend; it answers 202 while a render is in progress
+export async function fetchRenderedImage(path: string, attempts = 30): Promise<string> {
+  for (let attempt = 0; attempt < attempts; attempt++) {
+    const res = await fetch(`http://localhost:8000${path}`);
+    if (res.status === 202) {
+      await new Promise((resolve) => setTimeout(resolve, 1000 * Number(res.headers.get("Retry-After") ?? 1)));
+      continue;
+    }
+    if (!res.ok) throw new Error(`Failed to fetch ${path}`);
+    return URL.createObjectURL(await res.blob());
+  }
+  throw new Error(`Timed out rendering ${path}`);
+}
+
+export function circuitDiagramPath(qubits?: number, format: "svg" | "png" = "svg") {
+  return `/api/circuit-diagram?format=${format}${qubits ? `&qubits=${qubits}` : ""}`;
+}
+
 // Types (adjust as needed)
 export interface MarketData {
   timestamp: string;